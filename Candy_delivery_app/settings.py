@@ -123,6 +123,13 @@ REST_FRAMEWORK = {
 }
 
 
+# Фоновые задачи загрузки (0 - выполнение в потоке запроса)
+JOBS_WORKERS = 4
+# Время в секундах без сохранения порции, после которого выполняемая
+# задача считается прерванной и захватывается командой process_jobs
+JOBS_STALE_TIME = 300
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.1/topics/i18n/
 
@@ -145,3 +152,56 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
 # Profiling
 SILKY_PYTHON_PROFILER = True
+
+
+def silky_intercept(request):
+    """Потоковая загрузка не буферизуется профилировщиком целиком"""
+    return request.path != '/orders/stream'
+
+
+SILKY_INTERCEPT_FUNC = silky_intercept
+
+# Подбор заказов для назначения: 'orm' - запросом к базе,
+# 'index' - по индексу новых заказов в памяти процесса,
+# 'vector' - проверкой всех кандидатов по столбцам numpy,
+# 'sql' - одним запросом к базе вместе с обновлением курьера
+# (заказы выбираются жадно, ASSIGN_PACKING не учитывается)
+ASSIGN_BACKEND = 'orm'
+
+# Время в секундах, после которого индекс новых заказов перечитывается
+# из базы, чтобы учесть заказы, загруженные другими процессами
+DISPATCH_INDEX_TTL = 60
+# Быстрый отказ в назначении по сводке новых заказов районов из индекса
+# новых заказов (минимальный вес и объединение периодов доставки),
+# без загрузки заказов. Отказ подтверждается одним запросом к базе
+ASSIGN_FAST_REJECT = False
+
+# Выбор заказов в пределах грузоподъемности: 'greedy' - по возрастанию
+# веса, 'knapsack' - набор с наибольшим весом
+ASSIGN_PACKING = 'greedy'
+# Время в секундах на точный подбор, после него заказы выбираются жадно
+ASSIGN_PACKING_TIME_BUDGET = 0.05
+
+# Готовые развозы свободных курьеров: рассчитываются в фоне при появлении
+# новых заказов в районах курьера и при изменении курьера, назначение
+# только подтверждает развоз
+ASSIGN_PROPOSALS = False
+# Время в секундах, после которого развоз не используется
+ASSIGN_PROPOSAL_TTL = 60
+
+# Выдача новых заказов свободным курьерам сразу после загрузки заказов,
+# без запроса /orders/assign от курьера
+ASSIGN_PUSH = False
+
+# Кэш ответов GET /couriers/$courier_id, сбрасывается при изменении
+# курьера, назначении и завершении его заказов
+COURIER_CACHE = False
+# Количество курьеров в кэше процесса
+COURIER_CACHE_SIZE = 10000
+# Название кэша из CACHES для версий и ответов курьеров, должен быть общим
+# для процессов (memcached, redis, база): кэш в памяти процесса не видит
+# изменений курьеров в других процессах, проверка rest_api.E001
+COURIER_CACHE_BACKEND = 'default'
+# Время жизни ответа в кэше в секундах, ограничивает устаревание ответа
+# при изменениях в базе мимо API
+COURIER_CACHE_TTL = 60
@@ -0,0 +1,99 @@
+import os
+import time
+from decimal import Decimal
+
+import django
+import numpy as np
+from django.utils.dateparse import parse_time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Candy_delivery_app.settings')
+django.setup()
+
+from rest_api.feasibility import CandidateOrders, get_feasible, \
+    get_feasible_orders  # noqa: E402
+from rest_api.packing import pack  # noqa: E402
+from rest_api.utils import hours_to_mask, is_intersections  # noqa: E402
+
+SIZES = (1000, 100000, 1000000)
+REGIONS = 1000
+COURIER_REGIONS = list(range(1, 31))
+CAPACITY = 50
+
+
+def make_candidates(size, seed=0):
+    """Случайные заказы: до трех периодов доставки на заказ"""
+    random = np.random.RandomState(seed)
+    windows = random.randint(1, 4, size)
+    window_order = np.repeat(np.arange(size), windows)
+    window_start = random.randint(0, 1380, len(window_order))
+    window_stop = window_start + random.randint(30, 180, len(window_order))
+    return CandidateOrders(
+        order_id=np.arange(1, size + 1, dtype=np.int64),
+        region=random.randint(1, REGIONS + 1, size).astype(np.int64),
+        weight=random.randint(1, 5001, size).astype(np.int64),
+        window_order=window_order,
+        window_start=window_start.astype(np.int16),
+        window_stop=np.minimum(window_stop, 1440).astype(np.int16),
+    )
+
+
+def python_loop(candidates, working_mask):
+    """Последовательная проверка каждого заказа, как до перехода на numpy"""
+    regions = set(COURIER_REGIONS)
+    capacity = CAPACITY * 100
+    masks = [0] * len(candidates)
+    for order, start, stop in zip(candidates.window_order.tolist(),
+                                  candidates.window_start.tolist(),
+                                  candidates.window_stop.tolist()):
+        masks[order] |= ((1 << (stop - start)) - 1) << start
+    orders = sorted(
+        zip(candidates.weight.tolist(), candidates.order_id.tolist(),
+            candidates.region.tolist(), masks)
+    )
+    chosen = []
+    current_weight = 0
+    for weight, order_id, region, mask in orders:
+        if region not in regions or weight > capacity:
+            continue
+        if current_weight + weight > capacity:
+            break
+        if is_intersections(working_mask, mask):
+            chosen.append(order_id)
+            current_weight += weight
+    return chosen
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    working_hours = [
+        (parse_time('09:00'), parse_time('11:00')),
+        (parse_time('14:00'), parse_time('18:00')),
+    ]
+    working_mask = hours_to_mask(tuple(working_hours))
+    print(f'{"orders":>9} {"numpy, ms":>10} {"orders/s":>12} '
+          f'{"python, ms":>11} {"orders/s":>12}')
+    for size in SIZES:
+        candidates = make_candidates(size)
+
+        def vectorized():
+            """Подбор, как в ASSIGN_BACKEND = 'vector'"""
+            feasible = get_feasible(candidates, COURIER_REGIONS,
+                                    CAPACITY, working_hours)
+            return pack(get_feasible_orders(candidates, feasible),
+                        Decimal(CAPACITY))
+
+        chosen, vector_time = measure(vectorized)
+        expected, loop_time = measure(python_loop, candidates, working_mask)
+        assert [order_id for order_id, _ in chosen] == expected
+        print(f'{size:>9} {vector_time * 1000:>10.1f} '
+              f'{size / vector_time:>12,.0f} '
+              f'{loop_time * 1000:>11.1f} {size / loop_time:>12,.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class RestApiConfig(AppConfig):
     name = 'rest_api'
+
+    def ready(self):
+        from . import checks  # noqa: F401
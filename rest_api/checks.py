@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Кэши, не общие для процессов
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_courier_cache(app_configs, **kwargs):
+    """Кэш ответов курьеров включается только с общим кэшем версий"""
+    if not settings.COURIER_CACHE:
+        return []
+    backend = settings.CACHES.get(settings.COURIER_CACHE_BACKEND)
+    if backend is None:
+        return [Error(
+            f'COURIER_CACHE_BACKEND {settings.COURIER_CACHE_BACKEND!r} '
+            f'is not in CACHES',
+            id='rest_api.E001'
+        )]
+    if backend['BACKEND'] in LOCAL_CACHE_BACKENDS:
+        return [Error(
+            'COURIER_CACHE requires a cache shared between processes',
+            hint='Set COURIER_CACHE_BACKEND to memcached, redis or '
+                 'database cache',
+            id='rest_api.E001'
+        )]
+    return []
@@ -35,11 +35,27 @@ class StatusCourier:
     )
 
 
+class StatusJob:
+    """Статус задачи загрузки"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETE = 'complete'
+    FAILED = 'failed'
+    choices = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (COMPLETE, 'Выполнена'),
+        (FAILED, 'Завершена с ошибкой'),
+    )
+
+
 class ErrorMessage:
     """Ответы сервера при ошибке клиента"""
     INSTANCE_NOT_FOUND = 'Instance not found'
     DATA_NOT_FOUND = 'Data not found'
     ERROR_DATA = 'Error data'
+    WRONG_HOURS = 'Wrong format of hours, expected HH:MM-HH:MM'
+    INTERNAL_ERROR = 'Internal error'
 
 
 # Грузоподъемность курьера
@@ -58,3 +74,12 @@ EARNINGS_COEFFICIENT = {
 
 # Формат времени
 FORMAT_TIME = '%H:%M'
+
+# Количество различных периодов времени в кэше разбора
+HOURS_CACHE_SIZE = 4096
+
+# Количество заказов в одной порции потоковой загрузки
+STREAM_CHUNK_SIZE = 1000
+
+# Количество заказов, сохраняемых одной транзакцией фоновой загрузки
+JOB_CHUNK_SIZE = 1000
@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .metrics import collector
+
+# Поколение ответов всех курьеров, увеличивается командами пересчета
+GENERATION_KEY = 'courier:generation'
+
+
+class CourierCache:
+    """
+    Ответы GET /couriers/$courier_id процесса: id курьера ->
+    (версия, ответ, время сохранения), не больше COURIER_CACHE_SIZE
+    последних курьеров. Версии курьеров и ответы хранятся также в кэше
+    Django COURIER_CACHE_BACKEND, общем для процессов. Версия курьера
+    увеличивается при изменении курьера, назначении и завершении его
+    заказов: сразу и еще раз после фиксации транзакции, чтобы ответ,
+    прочитанный до фиксации, не остался в кэше. Изменения в базе мимо
+    этих путей видны не позже чем через COURIER_CACHE_TTL
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def reset(self):
+        with self.lock:
+            self.entries = OrderedDict()
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    @staticmethod
+    def get_backend():
+        return caches[settings.COURIER_CACHE_BACKEND]
+
+    def get_version(self, courier_id):
+        """Версия ответа курьера: (поколение, версия курьера)"""
+        key = f'courier:{courier_id}:version'
+        versions = self.get_backend().get_many([GENERATION_KEY, key])
+        return versions.get(GENERATION_KEY, 0), versions.get(key, 0)
+
+    def get(self, courier_id):
+        """
+        Ответ курьера из кэша либо None и версия, с которой сохраняется
+        ответ, прочитанный из базы. Версия читается раньше базы
+        """
+        version = self.get_version(courier_id)
+        with self.lock:
+            entry = self.entries.get(courier_id)
+            if entry is not None and entry[0] == version \
+                    and time.time() - entry[2] <= settings.COURIER_CACHE_TTL:
+                self.entries.move_to_end(courier_id)
+                self.hits += 1
+                return entry[1], version
+        generation, courier_version = version
+        entry = self.get_backend().get(
+            f'courier:{courier_id}:{generation}:{courier_version}'
+        )
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+                return None, version
+            self.hits += 1
+        data, saved = entry
+        self.store(courier_id, version, data, saved)
+        return data, version
+
+    def set(self, courier_id, version, data):
+        """Сохранение ответа курьера, прочитанного из базы"""
+        saved = time.time()
+        self.store(courier_id, version, data, saved)
+        generation, courier_version = version
+        self.get_backend().set(
+            f'courier:{courier_id}:{generation}:{courier_version}',
+            (data, saved), timeout=settings.COURIER_CACHE_TTL
+        )
+
+    def store(self, courier_id, version, data, saved):
+        with self.lock:
+            self.entries[courier_id] = (version, data, saved)
+            self.entries.move_to_end(courier_id)
+            while len(self.entries) > settings.COURIER_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def increment(self, key):
+        """Увеличение версии в общем кэше"""
+        backend = self.get_backend()
+        # Версия, вытесненная из общего кэша, начинается с текущего
+        # времени, чтобы не совпасть с версией сохраненных ответов
+        backend.add(key, time.time_ns(), timeout=None)
+        try:
+            backend.incr(key)
+        except ValueError:
+            backend.set(key, time.time_ns(), timeout=None)
+
+    def bump(self, couriers_id):
+        """Увеличение версий курьеров"""
+        with self.lock:
+            for courier_id in couriers_id:
+                self.entries.pop(courier_id, None)
+        for courier_id in couriers_id:
+            self.increment(f'courier:{courier_id}:version')
+
+    def invalidate(self, couriers_id):
+        """Сброс ответов курьеров, изменяемых текущей транзакцией"""
+        if not settings.COURIER_CACHE:
+            return
+        couriers_id = list(couriers_id)
+        if not couriers_id:
+            return
+        with self.lock:
+            self.invalidations += len(couriers_id)
+        self.bump(couriers_id)
+        transaction.on_commit(lambda: self.bump(couriers_id))
+
+    def invalidate_all(self):
+        """Сброс ответов всех курьеров после фиксации изменений"""
+        if not settings.COURIER_CACHE:
+            return
+        with self.lock:
+            self.entries = OrderedDict()
+            self.invalidations += 1
+        self.increment(GENERATION_KEY)
+
+
+courier_cache = CourierCache()
+
+
+@collector('courier_cache')
+def get_courier_cache_info():
+    with courier_cache.lock:
+        requests = courier_cache.hits + courier_cache.misses
+        return {
+            'enabled': settings.COURIER_CACHE,
+            'couriers': len(courier_cache.entries),
+            'hits': courier_cache.hits,
+            'misses': courier_cache.misses,
+            'hit_ratio': courier_cache.hits / requests if requests else 0,
+            'invalidations': courier_cache.invalidations,
+        }
@@ -0,0 +1,335 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from itertools import takewhile
+
+from django.conf import settings
+
+from .const import StatusOrder, StatusCourier
+from .metrics import collector
+from .packing import pack
+from .models import Courier, Order, DeliveryHours, Regions, WorkingHours
+from .utils import is_intersections, get_hours_mask
+
+
+class DispatchIndex:
+    """
+    Новые заказы процесса, сгруппированные по районам и отсортированные
+    по весу, вместе с масками минут доставки. Для каждого района хранится
+    объединение масок его заказов, чтобы быстро отказать курьеру, которому
+    не подходит ни один заказ.
+    Индекс загружается из базы при первом обращении и перечитывается
+    по истечении DISPATCH_INDEX_TTL, чтобы учесть изменения других
+    процессов. Выдача заказа подтверждается условным обновлением в базе,
+    поэтому устаревшая запись индекса не приводит к повторной выдаче
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.regions = {}
+        # Объединение масок заказов района. При удалении заказа маска
+        # не уменьшается, поэтому может включать лишние минуты
+        self.region_masks = {}
+        self.orders = {}
+        self.load_time = None
+        self.checks = 0
+        self.rejects = 0
+        self.index_misses = 0
+
+    @property
+    def is_loaded(self):
+        return self.load_time is not None
+
+    @property
+    def is_expired(self):
+        return not self.is_loaded \
+            or time.monotonic() - self.load_time > settings.DISPATCH_INDEX_TTL
+
+    def reset(self):
+        """Сброс индекса, следующее обращение загрузит его из базы"""
+        with self.lock:
+            self.regions = {}
+            self.region_masks = {}
+            self.orders = {}
+            self.load_time = None
+            self.checks = 0
+            self.rejects = 0
+            self.index_misses = 0
+
+    @staticmethod
+    def fetch(orders):
+        """
+        Заказы с маской минут доставки: (id, вес, район, маска).
+        Периоды доставки читаются вторым запросом по id прочитанных заказов
+        """
+        orders = list(orders.values_list('order_id', 'weight', 'region'))
+        delivery_hours = DeliveryHours.get_orders_delivery_hours(
+            [order_id for order_id, _, _ in orders]
+        )
+        return [
+            (order_id, weight, region,
+             get_hours_mask(delivery_hours.get(order_id, ())))
+            for order_id, weight, region in orders
+        ]
+
+    def load(self):
+        """Загрузка всех новых заказов из базы"""
+        with self.lock:
+            self.regions = {}
+            self.region_masks = {}
+            self.orders = {}
+            for order in self.fetch(
+                Order.objects.filter(status_order=StatusOrder.NEW)
+            ):
+                self._insert(*order)
+            self.load_time = time.monotonic()
+
+    def _insert(self, order_id, weight, region, delivery_mask):
+        self._remove(order_id)
+        self.orders[order_id] = (weight, region, delivery_mask)
+        insort(self.regions.setdefault(region, []), (weight, order_id))
+        self.region_masks[region] = \
+            self.region_masks.get(region, 0) | delivery_mask
+
+    def _remove(self, order_id):
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return
+        weight, region, _ = order
+        region_orders = self.regions[region]
+        del region_orders[bisect_left(region_orders, (weight, order_id))]
+        if not region_orders:
+            del self.regions[region]
+            del self.region_masks[region]
+
+    def add(self, orders):
+        """
+        Добавление новых заказов: (id, вес, район, маска).
+        Пока индекс не загружен, заказы попадут в него при загрузке
+        """
+        with self.lock:
+            if not self.is_loaded:
+                return
+            for order in orders:
+                self._insert(*order)
+
+    def add_from_db(self, orders_id):
+        """Добавление заказов, вернувшихся в статус нового, по id"""
+        if not self.is_loaded or not orders_id:
+            return
+        self.add(self.fetch(Order.objects.filter(
+            order_id__in=orders_id,
+            status_order=StatusOrder.NEW
+        )))
+
+    def remove(self, orders_id):
+        """Удаление выданных заказов"""
+        with self.lock:
+            for order_id in orders_id:
+                self._remove(order_id)
+
+    def can_fit(self, regions, capacity, working_hours):
+        """
+        Проверка по районам, что курьеру может подойти хотя бы один
+        новый заказ: самый легкий заказ района помещается в
+        грузоподъемность и время доставки заказов района пересекается
+        со временем работы. Индекс не видит заказов других процессов
+        до перечитывания и заказов, удаленных при выдаче, которая
+        не зафиксирована, поэтому отказ по индексу подтверждается
+        запросом к базе без загрузки заказов. False означает, что
+        подходящих заказов нет
+        """
+        if self.is_expired:
+            self.load()
+        working_mask = get_hours_mask(working_hours)
+        with self.lock:
+            self.checks += 1
+            for region in set(regions):
+                region_orders = self.regions.get(region)
+                if region_orders and region_orders[0][0] <= capacity \
+                        and is_intersections(working_mask,
+                                             self.region_masks[region]):
+                    return True
+        if Order.has_candidates(regions, capacity, working_hours):
+            with self.lock:
+                self.index_misses += 1
+            return True
+        with self.lock:
+            self.rejects += 1
+        return False
+
+    def pick(self, regions, capacity, working_mask):
+        """
+        Выбор заказов, подходящих по району, весу и времени доставки,
+        способом из настройки ASSIGN_PACKING: [(id, вес)]
+        """
+        if self.is_expired:
+            self.load()
+        with self.lock:
+            orders = takewhile(
+                lambda order: order[0] <= capacity,
+                heapq.merge(*(
+                    self.regions.get(region, ()) for region in set(regions)
+                ))
+            )
+            return pack((
+                (order_id, weight) for weight, order_id in orders
+                if is_intersections(working_mask, self.orders[order_id][2])
+            ), capacity)
+
+
+dispatch_index = DispatchIndex()
+
+
+class CourierIndex:
+    """
+    Свободные курьеры процесса, сгруппированные по районам, вместе
+    с грузоподъемностью и маской минут работы. Используется для выдачи
+    новых заказов без запроса курьера (ASSIGN_PUSH).
+    Загружается из базы при первом обращении и перечитывается по
+    истечении DISPATCH_INDEX_TTL. Курьер перед выдачей блокируется
+    и проверяется в базе, поэтому устаревшая запись не приводит
+    к выдаче занятому курьеру
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.regions = {}
+        self.couriers = {}
+        self.load_time = None
+
+    @property
+    def is_loaded(self):
+        return self.load_time is not None
+
+    @property
+    def is_expired(self):
+        return not self.is_loaded \
+            or time.monotonic() - self.load_time > settings.DISPATCH_INDEX_TTL
+
+    def reset(self):
+        """Сброс индекса, следующее обращение загрузит его из базы"""
+        with self.lock:
+            self.regions = {}
+            self.couriers = {}
+            self.load_time = None
+
+    @staticmethod
+    def fetch(couriers):
+        """
+        Курьеры с районами и маской минут работы:
+        (id, грузоподъемность, районы, маска)
+        """
+        couriers = dict(couriers.values_list('courier_id', 'lifting_capacity'))
+        regions = {courier_id: [] for courier_id in couriers}
+        for courier_id, region in Regions.objects.filter(
+            courier_id__in=couriers
+        ).values_list('courier_id', 'region'):
+            regions[courier_id].append(region)
+        working_hours = {courier_id: [] for courier_id in couriers}
+        for courier_id, start_time, stop_time in WorkingHours.objects.filter(
+            courier_id__in=couriers
+        ).values_list('courier_id', 'start_time', 'stop_time'):
+            working_hours[courier_id].append((start_time, stop_time))
+        return [
+            (courier_id, capacity, regions[courier_id],
+             get_hours_mask(working_hours[courier_id]))
+            for courier_id, capacity in couriers.items()
+        ]
+
+    def load(self):
+        """Загрузка всех свободных курьеров из базы"""
+        with self.lock:
+            self.regions = {}
+            self.couriers = {}
+            for courier in self.fetch(Courier.objects.filter(
+                status_courier=StatusCourier.FREE
+            )):
+                self._insert(*courier)
+            self.load_time = time.monotonic()
+
+    def _insert(self, courier_id, capacity, regions, working_mask):
+        self._remove(courier_id)
+        self.couriers[courier_id] = (capacity, regions, working_mask)
+        for region in set(regions):
+            self.regions.setdefault(region, set()).add(courier_id)
+
+    def _remove(self, courier_id):
+        courier = self.couriers.pop(courier_id, None)
+        if courier is None:
+            return
+        for region in set(courier[1]):
+            self.regions[region].discard(courier_id)
+            if not self.regions[region]:
+                del self.regions[region]
+
+    def refresh(self, couriers_id):
+        """
+        Обновление записей курьеров по данным базы: свободные курьеры
+        добавляются заново, остальные удаляются.
+        Пока индекс не загружен, курьеры попадут в него при загрузке
+        """
+        couriers_id = list(couriers_id)
+        if not self.is_loaded or not couriers_id:
+            return
+        couriers = self.fetch(Courier.objects.filter(
+            courier_id__in=couriers_id,
+            status_courier=StatusCourier.FREE
+        ))
+        with self.lock:
+            for courier_id in couriers_id:
+                self._remove(courier_id)
+            for courier in couriers:
+                self._insert(*courier)
+
+    def remove(self, couriers_id):
+        """Удаление курьеров, получивших заказы"""
+        with self.lock:
+            for courier_id in couriers_id:
+                self._remove(courier_id)
+
+    def match(self, orders):
+        """
+        id свободных курьеров, которые могут взять хотя бы один из
+        заказов (id, вес, район, маска) по району, грузоподъемности
+        и времени работы
+        """
+        if self.is_expired:
+            self.load()
+        matched = set()
+        with self.lock:
+            for _, weight, region, delivery_mask in orders:
+                for courier_id in self.regions.get(region, ()):
+                    capacity, _, working_mask = self.couriers[courier_id]
+                    if weight <= capacity \
+                            and is_intersections(working_mask, delivery_mask):
+                        matched.add(courier_id)
+        return matched
+
+
+courier_index = CourierIndex()
+
+
+@collector('dispatch_index')
+def get_dispatch_index_info():
+    return {
+        'backend': settings.ASSIGN_BACKEND,
+        'orders': len(dispatch_index.orders),
+        'age': None if not dispatch_index.is_loaded
+        else round(time.monotonic() - dispatch_index.load_time, 3),
+        'fast_reject': {
+            'enabled': settings.ASSIGN_FAST_REJECT,
+            'checks': dispatch_index.checks,
+            'rejects': dispatch_index.rejects,
+            'index_misses': dispatch_index.index_misses,
+        },
+    }
+
+
+@collector('courier_index')
+def get_courier_index_info():
+    return {
+        'push': settings.ASSIGN_PUSH,
+        'couriers': len(courier_index.couriers),
+        'age': None if not courier_index.is_loaded
+        else round(time.monotonic() - courier_index.load_time, 3),
+    }
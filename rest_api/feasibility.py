@@ -0,0 +1,105 @@
+from decimal import Decimal
+
+import numpy as np
+
+from .models import DeliveryHours
+from .packing import to_hundredths
+from .utils import get_minute
+
+
+class CandidateOrders:
+    """
+    Заказы-кандидаты в виде столбцов: id, район, вес в сотых долях
+    и периоды доставки в минутах суток. Периоды всех заказов хранятся
+    подряд, window_order - номер заказа, к которому относится период
+    """
+    def __init__(self, order_id, region, weight,
+                 window_order, window_start, window_stop):
+        self.order_id = order_id
+        self.region = region
+        self.weight = weight
+        self.window_order = window_order
+        self.window_start = window_start
+        self.window_stop = window_stop
+
+    def __len__(self):
+        return len(self.order_id)
+
+    @classmethod
+    def from_orders(cls, orders):
+        """Столбцы из списка (id, вес, район, периоды [(начало, конец)])"""
+        order_id, region, weight = [], [], []
+        window_order, window_start, window_stop = [], [], []
+        for number, (current_id, current_weight, current_region,
+                     delivery_hours) in enumerate(orders):
+            order_id.append(current_id)
+            weight.append(to_hundredths(current_weight))
+            region.append(current_region)
+            for start, stop in delivery_hours:
+                window_order.append(number)
+                window_start.append(get_minute(start))
+                window_stop.append(get_minute(stop, round_up=True))
+        return cls(
+            np.array(order_id, dtype=np.int64),
+            np.array(region, dtype=np.int64),
+            np.array(weight, dtype=np.int64),
+            np.array(window_order, dtype=np.int64),
+            np.array(window_start, dtype=np.int16),
+            np.array(window_stop, dtype=np.int16),
+        )
+
+    @classmethod
+    def from_queryset(cls, orders):
+        """Столбцы для заказов из запроса: два запроса к базе"""
+        orders = list(orders.values_list('order_id', 'weight', 'region'))
+        delivery_hours = DeliveryHours.get_orders_delivery_hours(
+            [order_id for order_id, _, _ in orders]
+        )
+        return cls.from_orders(
+            (order_id, weight, region, delivery_hours.get(order_id, ()))
+            for order_id, weight, region in orders
+        )
+
+
+def get_feasible(candidates, regions, capacity, working_hours):
+    """
+    Маска заказов, которые курьер может взять: район курьера,
+    вес не больше грузоподъемности и пересечение хотя бы одного
+    периода доставки со временем работы. Все заказы проверяются
+    одним проходом по столбцам, цикл только по периодам работы курьера
+    """
+    feasible = np.isin(candidates.region, list(regions)) \
+        & (candidates.weight <= to_hundredths(capacity))
+    # Период, у которого конец не позже начала, не занимает ни одной минуты
+    overlap = np.zeros(len(candidates.window_order), dtype=bool)
+    for start, stop in working_hours:
+        first = get_minute(start)
+        last = get_minute(stop, round_up=True)
+        if last > first:
+            overlap |= (candidates.window_start < last) \
+                & (candidates.window_stop > first)
+    overlap &= candidates.window_stop > candidates.window_start
+    intersects = np.zeros(len(candidates), dtype=bool)
+    intersects[candidates.window_order[overlap]] = True
+    return feasible & intersects
+
+
+def sort_feasible(candidates, feasible):
+    """Номера подходящих заказов по возрастанию веса и id"""
+    index = np.flatnonzero(feasible)
+    return index[np.lexsort(
+        (candidates.order_id[index], candidates.weight[index])
+    )]
+
+
+def get_feasible_orders(candidates, feasible):
+    """
+    Подходящие заказы [(id, вес)] по возрастанию веса и id,
+    в порядке, в котором их выбирает pack
+    """
+    index = sort_feasible(candidates, feasible)
+    return list(zip(
+        candidates.order_id[index].tolist(),
+        (Decimal(weight).scaleb(-2)
+         for weight in candidates.weight[index].tolist())
+    ))
@@ -0,0 +1,166 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .const import StatusJob, StatusCourier, ErrorMessage, JOB_CHUNK_SIZE
+from .dispatch import courier_index
+from .models import Courier, Job
+from .serializer import OrderCreateSerializer, OrdersAssignBatchSerializer
+from .utils import get_error_id
+
+logger = logging.getLogger(__name__)
+
+executor = None
+
+
+def get_executor():
+    """Пул фоновых обработчиков, создается при первой задаче"""
+    global executor
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=settings.JOBS_WORKERS,
+                                      thread_name_prefix='jobs')
+    return executor
+
+
+def run_in_thread(function, *args):
+    """Выполнение функции в потоке пула со своим соединением с базой"""
+    close_old_connections()
+    try:
+        function(*args)
+    except Exception:
+        logger.exception('Background task %s failed', function.__name__)
+    finally:
+        close_old_connections()
+
+
+def submit(function, *args):
+    """
+    Запуск функции в фоновом пуле.
+    При JOBS_WORKERS = 0 функция выполняется сразу в текущем потоке
+    """
+    if not settings.JOBS_WORKERS:
+        function(*args)
+        return
+    get_executor().submit(run_in_thread, function, *args)
+
+
+def claim_job(job_id=None):
+    """
+    Захват задачи в очереди или задачи, которая выполняется, но не
+    обновлялась дольше JOBS_STALE_TIME: процесс, выполнявший ее,
+    перезапущен. Строка задачи блокируется с SKIP LOCKED, поэтому
+    задачу захватывает один обработчик. Возвращает задачу или None
+    """
+    now = timezone.now()
+    stale_time = now - timedelta(seconds=settings.JOBS_STALE_TIME)
+    with transaction.atomic():
+        jobs = Job.objects.select_for_update(skip_locked=True).filter(
+            Q(status_job=StatusJob.QUEUED)
+            | Q(status_job=StatusJob.RUNNING, update_time__lt=stale_time)
+        )
+        if job_id is not None:
+            jobs = jobs.filter(pk=job_id)
+        job = jobs.order_by('pk').first()
+        if job is None:
+            return None
+        job.status_job = StatusJob.RUNNING
+        job.update_time = now
+        job.save(update_fields=['status_job', 'update_time'])
+    return job
+
+
+def process_orders_job(job_id):
+    """Загрузка заказов задачи, если она еще не захвачена"""
+    job = claim_job(job_id)
+    if job is not None:
+        run_orders_job(job)
+
+
+def run_orders_job(job):
+    """
+    Загрузка заказов задачи по правилам OrderCreateSerializer: заказы
+    проверяются целиком, сохраняются порциями по JOB_CHUNK_SIZE, каждая
+    в одной транзакции с processed. Задача, прерванная перезапуском,
+    продолжается с первой несохраненной порции
+    """
+    orders = job.data['data'] if isinstance(job.data, dict) else None
+    saved = orders[:job.processed] if isinstance(orders, list) else []
+    try:
+        serializer = OrderCreateSerializer(data=dict(
+            job.data, data=orders[job.processed:]
+        ) if saved else job.data)
+        if not serializer.is_valid():
+            finish_job(job, StatusJob.FAILED, {
+                'validation_error': {
+                    'orders': get_error_id(serializer.errors['data'],
+                                           serializer.initial_data['data'],
+                                           'order_id')
+                }
+            })
+            return
+        validated = serializer.validated_data['data']
+        for start in range(0, len(validated), JOB_CHUNK_SIZE):
+            chunk = validated[start:start + JOB_CHUNK_SIZE]
+            with transaction.atomic():
+                # Задачу, захваченную другим обработчиком, не продолжаем
+                if not Job.objects.filter(
+                    pk=job.pk, processed=job.processed
+                ).update(processed=F('processed') + len(chunk),
+                         update_time=timezone.now()):
+                    return
+                serializer.create({'data': chunk})
+            job.processed += len(chunk)
+    except Exception:
+        logger.exception('Orders job %s failed', job.pk)
+        finish_job(job, StatusJob.FAILED, {
+            'error': ErrorMessage.INTERNAL_ERROR
+        })
+        return
+    finish_job(job, StatusJob.COMPLETE, {
+        'orders': [
+            {
+                'id': order['order_id']
+            } for order in saved
+        ] + [
+            {
+                'id': order['order_id']
+            } for order in validated
+        ]
+    })
+
+
+def finish_job(job, status_job, result):
+    job.status_job = status_job
+    job.result = result
+    job.data = None
+    job.update_time = job.complete_time = timezone.now()
+    job.save(update_fields=['status_job', 'result', 'data', 'update_time',
+                            'complete_time'])
+
+
+def push_orders(couriers_id):
+    """
+    Выдача новых заказов свободным курьерам, подобранным по индексу
+    свободных курьеров (ASSIGN_PUSH), одним расчетом, как в
+    POST /orders/assign/batch. Курьеры, которые уже получают заказы
+    в другом запросе, пропускаются
+    """
+    with transaction.atomic():
+        couriers = list(Courier.objects.select_for_update(
+            skip_locked=True
+        ).filter(
+            courier_id__in=couriers_id,
+            status_courier=StatusCourier.FREE
+        ).order_by('courier_id'))
+        assigned = OrdersAssignBatchSerializer().assign_free(
+            couriers, timezone.now()
+        ) if couriers else {}
+    # Курьеры, не получившие заказов, обновляются по данным базы
+    courier_index.refresh(
+        courier_id for courier_id in couriers_id if courier_id not in assigned
+    )
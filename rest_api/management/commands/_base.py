@@ -0,0 +1,118 @@
+import json
+import tempfile
+from abc import ABCMeta, abstractmethod
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+
+class BaseImportCommand(BaseCommand, metaclass=ABCMeta):
+    """
+    Загрузка объектов из файла через COPY во временные таблицы
+    и перенос в рабочие таблицы одним запросом
+    """
+    # Название объектов в отчете
+    entity = None
+    # Поле с id объекта
+    id_field = None
+    # Временные таблицы: название -> описание колонок
+    staging_tables = {}
+    # Запрос переноса данных, возвращающий id отклоненных строк
+    merge_sql = None
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'file',
+            help='Файл .json в формате API ({"data": [...]}) '
+                 'или файл с одним объектом JSON на строку'
+        )
+
+    def read_items(self, path):
+        """
+        Чтение объектов из файла. Файл открывается и файл .json
+        разбирается сразу, ошибки возвращаются как CommandError
+        """
+        try:
+            file = open(path, 'r', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(e)
+        if not path.endswith('.json'):
+            return self.read_lines(file)
+        with file:
+            try:
+                items = json.load(file)['data']
+            except (KeyError, TypeError, ValueError) as e:
+                raise CommandError(f'Wrong format of file: {e!r}')
+        if not isinstance(items, list):
+            raise CommandError('Wrong format of file: data is not a list')
+        return items
+
+    def read_lines(self, file):
+        """Объекты из строк файла, невалидная строка возвращается как None"""
+        with file:
+            try:
+                for line in file:
+                    if not line.strip():
+                        continue
+                    try:
+                        item = json.loads(line)
+                    except ValueError:
+                        item = None
+                    yield item
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Wrong format of file: {e!r}')
+
+    @abstractmethod
+    def get_rows(self, line, item):
+        """
+        Строки для временных таблиц: название -> список строк.
+        Для невалидного объекта возвращает None
+        """
+
+    def handle(self, *args, **options):
+        items = self.read_items(options['file'])
+        try:
+            files = {
+                table: tempfile.TemporaryFile('w+')
+                for table in self.staging_tables
+            }
+        except OSError as e:
+            raise CommandError(e)
+        rejected = []
+        received = 0
+        for line, item in enumerate(items, start=1):
+            received += 1
+            rows = self.get_rows(line, item)
+            if rows is None:
+                rejected.append(self.get_item_id(item, line))
+                continue
+            for table, table_rows in rows.items():
+                for row in table_rows:
+                    files[table].write('\t'.join(map(str, row)) + '\n')
+        with transaction.atomic(), connection.cursor() as cursor:
+            for table, columns in self.staging_tables.items():
+                cursor.execute(
+                    f'CREATE TEMPORARY TABLE {table} ({columns}) '
+                    f'ON COMMIT DROP'
+                )
+                files[table].seek(0)
+                cursor.copy_expert(f'COPY {table} FROM STDIN', files[table])
+                files[table].close()
+            cursor.execute(self.merge_sql)
+            rejected.extend(row[0] for row in cursor.fetchall())
+            for table in self.staging_tables:
+                cursor.execute(f'DROP TABLE {table}')
+        self.stdout.write(
+            f'Imported {self.entity}: {received - len(rejected)}'
+        )
+        if rejected:
+            self.stdout.write(
+                f'Rejected {self.entity}: '
+                + ', '.join(map(str, rejected))
+            )
+
+    def get_item_id(self, item, line):
+        """id отклоненного объекта, либо номер строки, если id нет"""
+        if isinstance(item, dict) and item.get(self.id_field) is not None:
+            return item[self.id_field]
+        return f'line {line}'
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_api.const import StatusCourier
+from rest_api.models import Courier
+from rest_api.serializer import OrdersAssignBatchSerializer
+from rest_api.utils import get_error_id
+
+
+class Command(BaseCommand):
+    help = 'Назначение заказов нескольким курьерам одним расчетом'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'courier_id', nargs='*', type=int,
+            help='id курьеров'
+        )
+        parser.add_argument(
+            '--free', action='store_true',
+            help='Назначить заказы всем свободным курьерам'
+        )
+
+    def handle(self, *args, **options):
+        couriers_id = options['courier_id']
+        if options['free']:
+            couriers_id += [
+                courier_id for courier_id in Courier.objects.filter(
+                    status_courier=StatusCourier.FREE
+                ).order_by('courier_id').values_list('courier_id', flat=True)
+                if courier_id not in couriers_id
+            ]
+        if not couriers_id:
+            raise CommandError('Specify courier ids or --free')
+        data = [
+            {
+                'courier_id': courier_id
+            } for courier_id in couriers_id
+        ]
+        serializer = OrdersAssignBatchSerializer(data={'data': data})
+        if not serializer.is_valid():
+            raise CommandError(
+                'Wrong couriers: ' + ', '.join(
+                    str(error['id']) for error in get_error_id(
+                        serializer.errors['data'], data, 'courier_id'
+                    )
+                )
+            )
+        assigned = 0
+        for courier in serializer.save():
+            orders_id = [order['id'] for order in courier['orders']]
+            assigned += len(orders_id)
+            self.stdout.write(
+                f'Courier {courier["courier_id"]}: '
+                + (', '.join(map(str, orders_id)) or 'no orders')
+            )
+        self.stdout.write(f'Assigned orders: {assigned}')
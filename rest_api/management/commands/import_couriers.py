@@ -0,0 +1,90 @@
+from rest_api.const import StatusCourier, LIFTING_CAPACITY
+from rest_api.serializer import courier_validator
+from ._base import BaseImportCommand
+
+
+class Command(BaseImportCommand):
+    help = 'Загрузка курьеров из файла через COPY'
+    entity = 'couriers'
+    id_field = 'courier_id'
+    staging_tables = {
+        'import_courier': 'line integer, courier_id integer, '
+                          'courier_type varchar(4), '
+                          'lifting_capacity numeric(4, 2)',
+        'import_working_hours': 'line integer, '
+                                'start_time time, stop_time time',
+        'import_regions': 'line integer, region integer',
+    }
+    # Из повторяющихся courier_id принимается первая строка файла,
+    # существующие курьеры не перезаписываются
+    merge_sql = f"""
+        WITH received AS (
+            SELECT DISTINCT ON (courier_id) line, courier_id, courier_type,
+                                            lifting_capacity
+            FROM import_courier
+            ORDER BY courier_id, line
+        ), accepted AS (
+            SELECT received.*, nextval(pg_get_serial_sequence(
+                'rest_api_quantityorders', 'id'
+            )) AS quantity_orders_id
+            FROM received
+            WHERE NOT EXISTS (
+                SELECT 1 FROM rest_api_courier courier
+                WHERE courier.courier_id = received.courier_id
+            )
+        ), quantity_orders AS (
+            INSERT INTO rest_api_quantityorders (id, foot, bike, car)
+            SELECT quantity_orders_id, 0, 0, 0 FROM accepted
+        ), inserted AS (
+            INSERT INTO rest_api_courier (
+                courier_id, courier_type, lifting_capacity,
+                current_weight_orders, orders_in_process, status_courier,
+                complete_order_in_delivery, quantity_orders_id
+            )
+            SELECT courier_id, courier_type, lifting_capacity,
+                   0, 0, '{StatusCourier.FREE}', 0, quantity_orders_id
+            FROM accepted
+            ON CONFLICT (courier_id) DO NOTHING
+            RETURNING courier_id
+        ), working_hours AS (
+            INSERT INTO rest_api_workinghours (start_time, stop_time,
+                                               courier_id)
+            SELECT hours.start_time, hours.stop_time, received.courier_id
+            FROM import_working_hours hours
+            JOIN received ON received.line = hours.line
+            JOIN inserted ON inserted.courier_id = received.courier_id
+        ), regions AS (
+            INSERT INTO rest_api_regions (region, courier_id)
+            SELECT regions.region, received.courier_id
+            FROM import_regions regions
+            JOIN received ON received.line = regions.line
+            JOIN inserted ON inserted.courier_id = received.courier_id
+        )
+        SELECT staging.courier_id
+        FROM import_courier staging
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM received
+            JOIN inserted ON inserted.courier_id = received.courier_id
+            WHERE received.line = staging.line
+        )
+        ORDER BY staging.line
+    """
+
+    def get_rows(self, line, item):
+        courier, errors = courier_validator.validate_item(item)
+        if errors:
+            return None
+        return {
+            'import_courier': [
+                (line, courier['courier_id'], courier['courier_type'],
+                 LIFTING_CAPACITY[courier['courier_type']])
+            ],
+            'import_working_hours': [
+                (line, hours['start_time'], hours['stop_time'])
+                for hours in courier['working_hours']
+            ],
+            'import_regions': [
+                (line, region['region']) for region in courier['regions']
+            ],
+        }
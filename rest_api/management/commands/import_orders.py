@@ -0,0 +1,61 @@
+from rest_api.const import StatusOrder
+from rest_api.serializer import order_validator
+from ._base import BaseImportCommand
+
+
+class Command(BaseImportCommand):
+    help = 'Загрузка заказов из файла через COPY'
+    entity = 'orders'
+    id_field = 'order_id'
+    staging_tables = {
+        'import_order': 'line integer, order_id integer, '
+                        'weight numeric(4, 2), region integer',
+        'import_delivery_hours': 'line integer, '
+                                 'start_time time, stop_time time',
+    }
+    # Из повторяющихся order_id принимается первая строка файла,
+    # существующие заказы не перезаписываются
+    merge_sql = f"""
+        WITH received AS (
+            SELECT DISTINCT ON (order_id) line, order_id, weight, region
+            FROM import_order
+            ORDER BY order_id, line
+        ), inserted AS (
+            INSERT INTO rest_api_order (order_id, weight, region,
+                                        status_order)
+            SELECT order_id, weight, region, '{StatusOrder.NEW}'
+            FROM received
+            ON CONFLICT (order_id) DO NOTHING
+            RETURNING order_id
+        ), delivery_hours AS (
+            INSERT INTO rest_api_deliveryhours (start_time, stop_time,
+                                                order_id)
+            SELECT hours.start_time, hours.stop_time, received.order_id
+            FROM import_delivery_hours hours
+            JOIN received ON received.line = hours.line
+            JOIN inserted ON inserted.order_id = received.order_id
+        )
+        SELECT staging.order_id
+        FROM import_order staging
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM received
+            JOIN inserted ON inserted.order_id = received.order_id
+            WHERE received.line = staging.line
+        )
+        ORDER BY staging.line
+    """
+
+    def get_rows(self, line, item):
+        order, errors = order_validator.validate_item(item)
+        if errors:
+            return None
+        return {
+            'import_order': [
+                (line, order['order_id'], order['weight'], order['region'])
+            ],
+            'import_delivery_hours': [
+                (line, hours['start_time'], hours['stop_time'])
+                for hours in order['delivery_hours']
+            ],
+        }
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rest_api.jobs import claim_job, run_orders_job
+
+
+class Command(BaseCommand):
+    help = 'Выполнение задач загрузки в очереди и задач, прерванных ' \
+           'перезапуском процесса'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить найденные задачи и завершиться'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1,
+            help='Пауза в секундах между проверками очереди'
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            job = claim_job()
+            if job is not None:
+                run_orders_job(job)
+                processed += 1
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(f'Processed jobs: {processed}')
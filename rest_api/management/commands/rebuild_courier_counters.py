@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, IntegerField, \
+    OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from rest_api.const import StatusOrder
+from rest_api.courier_cache import courier_cache
+from rest_api.models import Courier, Order
+
+
+class Command(BaseCommand):
+    help = 'Проверка и пересчет счетчиков текущего развоза курьеров ' \
+           'по заказам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить счетчики, не исправляя их'
+        )
+
+    def handle(self, *args, **options):
+        in_process = Order.objects.filter(
+            courier_id=OuterRef('courier_id'),
+            status_order=StatusOrder.IN_PROCESS
+        ).order_by().values('courier_id')
+        with transaction.atomic():
+            # Блокируются только курьеры с неверными счетчиками
+            wrong = list(Courier.objects.select_for_update().annotate(
+                actual_orders=Coalesce(
+                    Subquery(in_process.annotate(
+                        count=Count('order_id')
+                    ).values('count'), output_field=IntegerField()),
+                    Value(0)
+                ),
+                actual_weight=Coalesce(
+                    Subquery(in_process.annotate(
+                        weight=Sum('weight')
+                    ).values('weight'), output_field=DecimalField()),
+                    Value(Decimal(0))
+                ),
+            ).exclude(
+                orders_in_process=F('actual_orders'),
+                current_weight_orders=F('actual_weight')
+            ).order_by('courier_id'))
+            if wrong and options['check']:
+                raise CommandError(
+                    'Wrong counters for couriers: '
+                    + ', '.join(str(courier.courier_id) for courier in wrong)
+                )
+            for courier in wrong:
+                courier.orders_in_process = courier.actual_orders
+                courier.current_weight_orders = courier.actual_weight
+            Courier.objects.bulk_update(
+                wrong, ['orders_in_process', 'current_weight_orders'],
+                batch_size=1000
+            )
+            courier_cache.invalidate(courier.courier_id for courier in wrong)
+        self.stdout.write(f'Rebuilt couriers: {len(wrong)}')
+        if wrong:
+            self.stdout.write(
+                'Couriers: '
+                + ', '.join(str(courier.courier_id) for courier in wrong)
+            )
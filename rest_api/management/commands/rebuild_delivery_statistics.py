@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from rest_api.const import StatusOrder
+from rest_api.courier_cache import courier_cache
+
+
+class Command(BaseCommand):
+    help = 'Пересчет статистики времени доставки курьеров по районам ' \
+           'из завершенных заказов'
+
+    # Сначала, как и в завершениях, блокируются курьеры: вставка строк
+    # статистики со ссылкой на курьера ждет завершений, заблокировавших
+    # курьеров, и не держит при этом блокировку таблицы. Таблица
+    # блокируется до чтения заказов: завершения, ожидающие блокировки,
+    # увеличивают уже пересчитанную статистику
+    rebuild_sql = f"""
+        SELECT courier_id FROM rest_api_courier
+        ORDER BY courier_id FOR KEY SHARE;
+        LOCK TABLE rest_api_deliverystatistics IN EXCLUSIVE MODE;
+        DELETE FROM rest_api_deliverystatistics;
+        INSERT INTO rest_api_deliverystatistics
+            (courier_id, region, delivery_time_sum, delivery_count)
+        SELECT courier_id, region, SUM(delivery_time), COUNT(*)
+        FROM rest_api_order
+        WHERE status_order = '{StatusOrder.COMPLETE}'
+        GROUP BY courier_id, region;
+    """
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(self.rebuild_sql)
+            cursor.execute('SELECT COUNT(*) FROM rest_api_deliverystatistics')
+            rebuilt, = cursor.fetchone()
+        # Рейтинг мог измениться у любого курьера
+        courier_cache.invalidate_all()
+        self.stdout.write(f'Rebuilt statistics: {rebuilt}')
@@ -0,0 +1,14 @@
+collectors = {}
+
+
+def collector(name):
+    """Регистрация функции, возвращающей счетчики для GET /metrics"""
+    def decorator(function):
+        collectors[name] = function
+        return function
+    return decorator
+
+
+def collect():
+    """Текущие значения всех зарегистрированных счетчиков процесса"""
+    return {name: function() for name, function in collectors.items()}
@@ -0,0 +1,50 @@
+# Generated by Django 3.1.7 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rest_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.AutoField(
+                    auto_created=True,
+                    primary_key=True, serialize=False, verbose_name='ID')
+                 ),
+                ('status_job', models.CharField(
+                    choices=[
+                        ('queued', 'В очереди'),
+                        ('running', 'Выполняется'),
+                        ('complete', 'Выполнена'),
+                        ('failed', 'Завершена с ошибкой')
+                    ],
+                    default='queued', max_length=8,
+                    verbose_name='Статус задачи')
+                 ),
+                ('data', models.JSONField(
+                    null=True, verbose_name='Данные запроса')
+                 ),
+                ('total', models.PositiveIntegerField(
+                    default=0, verbose_name='Количество объектов')
+                 ),
+                ('processed', models.PositiveIntegerField(
+                    default=0, verbose_name='Обработано объектов')
+                 ),
+                ('result', models.JSONField(
+                    null=True, verbose_name='Результат')
+                 ),
+                ('create_time', models.DateTimeField(
+                    auto_now_add=True, verbose_name='Время создания')
+                 ),
+                ('complete_time', models.DateTimeField(
+                    null=True, verbose_name='Время завершения')
+                 ),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.1.7 on 2026-10-18 12:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rest_api', '0002_job'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(
+                condition=models.Q(status_order='N'),
+                fields=['region', 'weight'],
+                name='order_new_region_weight_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(
+                condition=models.Q(status_order='I'),
+                fields=['courier', 'weight'],
+                name='order_in_process_courier_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(
+                condition=models.Q(status_order='C'),
+                fields=['courier', 'region', 'delivery_time'],
+                name='order_complete_courier_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='regions',
+            index=models.Index(
+                fields=['courier', 'region'],
+                name='regions_courier_region_idx'),
+        ),
+    ]
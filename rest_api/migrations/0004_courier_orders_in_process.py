@@ -0,0 +1,35 @@
+# Generated by Django 3.1.7 on 2026-10-18 13:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rest_api', '0003_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courier',
+            name='orders_in_process',
+            field=models.PositiveIntegerField(
+                default=0,
+                verbose_name='Количество заказов в текущем развозе'),
+        ),
+        # Счетчики существующих курьеров по заказам в развозе
+        migrations.RunSQL(
+            """
+            UPDATE rest_api_courier courier
+            SET orders_in_process = orders.count
+            FROM (
+                SELECT courier_id, COUNT(*) AS count
+                FROM rest_api_order
+                WHERE status_order = 'I'
+                GROUP BY courier_id
+            ) orders
+            WHERE orders.courier_id = courier.courier_id
+            """,
+            migrations.RunSQL.noop
+        ),
+    ]
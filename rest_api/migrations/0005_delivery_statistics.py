@@ -0,0 +1,50 @@
+# Generated by Django 3.1.7 on 2026-10-18 13:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rest_api', '0004_courier_orders_in_process'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryStatistics',
+            fields=[
+                ('id', models.AutoField(
+                    auto_created=True, primary_key=True, serialize=False,
+                    verbose_name='ID')),
+                ('region', models.PositiveIntegerField(
+                    verbose_name='Район')),
+                ('delivery_time_sum', models.BigIntegerField(
+                    default=0,
+                    verbose_name='Суммарное время доставки в секундах')),
+                ('delivery_count', models.PositiveIntegerField(
+                    default=0, verbose_name='Количество доставок')),
+                ('courier', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    to='rest_api.courier')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='deliverystatistics',
+            constraint=models.UniqueConstraint(
+                fields=('courier', 'region'),
+                name='delivery_statistics_unique'),
+        ),
+        # Статистика по уже завершенным заказам
+        migrations.RunSQL(
+            """
+            INSERT INTO rest_api_deliverystatistics
+                (courier_id, region, delivery_time_sum, delivery_count)
+            SELECT courier_id, region, SUM(delivery_time), COUNT(*)
+            FROM rest_api_order
+            WHERE status_order = 'C'
+            GROUP BY courier_id, region
+            """,
+            migrations.RunSQL.noop
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.1.7 on 2026-10-18 13:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rest_api', '0005_delivery_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='update_time',
+            field=models.DateTimeField(null=True,
+                                       verbose_name='Время обновления'),
+        ),
+    ]
@@ -1,10 +1,18 @@
+from datetime import time
 from decimal import Decimal
 
-from django.db import models
-from django.db.models import Avg, Min
+from django.db import connection, models
+from django.db.models import Min, Q
+from django.db.models.functions import Cast
 
-from .const import CourierType, StatusOrder, StatusCourier, FORMAT_TIME
-from .utils import calculate_rating
+from .const import CourierType, StatusOrder, StatusCourier, StatusJob, \
+    FORMAT_TIME
+from .utils import calculate_rating, get_hours_mask, get_minute, \
+    is_intersections
+
+
+# Целое число без ограничения точности для деления в базе
+NUMERIC = models.DecimalField(max_digits=20, decimal_places=0)
 
 
 class QuantityOrders(models.Model):
@@ -29,6 +37,9 @@ class Courier(models.Model):
         'Текущий вес назначенных заказов',
         max_digits=4, decimal_places=2, default=Decimal(0)
     )
+    orders_in_process = models.PositiveIntegerField(
+        'Количество заказов в текущем развозе', default=0
+    )
     assign_time = models.DateTimeField('Время назначения', null=True)
     last_complete_time = models.DateTimeField('Время последней доставки',
                                               null=True)
@@ -45,15 +56,18 @@ class Courier(models.Model):
 
     @staticmethod
     def get_rating(courier_id):
-        query_min_of_average = Order.objects.filter(
-            courier_id=courier_id,
-            status_order=StatusOrder.COMPLETE
-        ).values('region').annotate(
-            Avg('delivery_time')
-        ).aggregate(Min('delivery_time__avg'))
-        min_of_average = Decimal(
+        query_min_of_average = DeliveryStatistics.objects.filter(
+            courier_id=courier_id
+        ).aggregate(
+            delivery_time__avg__min=DeliveryStatistics.get_min_average()
+        )
+        return Courier.get_rating_by_average(
             query_min_of_average['delivery_time__avg__min']
         )
+
+    @staticmethod
+    def get_rating_by_average(min_of_average):
+        min_of_average = Decimal(min_of_average)
         rating = Decimal(
             (60 * 60 - min(min_of_average, 60 * 60)) / (60 * 60) * 5
         ).quantize(Decimal('1.11'))
@@ -88,6 +102,12 @@ class Regions(models.Model):
     region = models.PositiveIntegerField('Район')
     courier = models.ForeignKey(Courier, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['courier', 'region'],
+                         name='regions_courier_region_idx'),
+        ]
+
     @staticmethod
     def get_regions(courier_id):
         return [obj.region for obj in Regions.objects.filter(
@@ -108,6 +128,85 @@ class Order(models.Model):
                                                 null=True)
     courier = models.ForeignKey(Courier, on_delete=models.CASCADE, null=True)
 
+    class Meta:
+        indexes = [
+            # Поиск новых заказов для назначения по районам и весу
+            models.Index(fields=['region', 'weight'],
+                         name='order_new_region_weight_idx',
+                         condition=Q(status_order=StatusOrder.NEW)),
+            # Заказы в текущем развозе курьера
+            models.Index(fields=['courier', 'weight'],
+                         name='order_in_process_courier_idx',
+                         condition=Q(status_order=StatusOrder.IN_PROCESS)),
+            # Выполненные заказы курьера для расчета рейтинга
+            models.Index(fields=['courier', 'region', 'delivery_time'],
+                         name='order_complete_courier_idx',
+                         condition=Q(status_order=StatusOrder.COMPLETE)),
+        ]
+
+    @staticmethod
+    def get_feasible(courier, orders_id=None):
+        """
+        Новые заказы, которые может взять курьер, по возрастанию веса
+        и id: [(id, вес)]. orders_id ограничивает проверку этими заказами
+        """
+        # Районы курьера подставляются подзапросом, периоды доставки
+        # загружаются одним запросом на все заказы-кандидаты
+        orders = Order.objects.filter(
+            status_order=StatusOrder.NEW,
+            region__in=Regions.objects.filter(
+                courier_id=courier.courier_id
+            ).values('region'),
+            weight__lte=courier.lifting_capacity
+        )
+        if orders_id is not None:
+            orders = orders.filter(order_id__in=orders_id)
+        orders = orders.order_by('weight', 'order_id').prefetch_related(
+            'deliveryhours_set'
+        )
+        if not orders:
+            return []
+        working_mask = get_hours_mask(
+            WorkingHours.get_working_hours(courier.courier_id)
+        )
+        return [
+            (order.order_id, order.weight) for order in orders
+            if is_intersections(working_mask, get_hours_mask(
+                (hours.start_time, hours.stop_time)
+                for hours in order.deliveryhours_set.all()
+            ))
+        ]
+
+    @staticmethod
+    def has_candidates(regions, capacity, working_hours):
+        """
+        Проверка одним запросом, что в районах есть новые заказы
+        не тяжелее грузоподъемности с периодом доставки, который может
+        пересекаться со временем работы. Периоды работы расширяются
+        до границ минут, поэтому заказ, подходящий по маскам минут,
+        не пропускается
+        """
+        overlap = Q()
+        for start, stop in working_hours:
+            first = get_minute(start)
+            last = get_minute(stop, round_up=True)
+            if last <= first:
+                continue
+            period = Q(deliveryhours__stop_time__gt=time(*divmod(first, 60)))
+            if last < 24 * 60:
+                period &= Q(
+                    deliveryhours__start_time__lt=time(*divmod(last, 60))
+                )
+            overlap |= period
+        if not overlap:
+            return False
+        return Order.objects.filter(
+            overlap,
+            status_order=StatusOrder.NEW,
+            region__in=regions,
+            weight__lte=capacity
+        ).exists()
+
 
 class DeliveryHours(models.Model):
     start_time = models.TimeField('Начало для доставки')
@@ -119,3 +218,96 @@ class DeliveryHours(models.Model):
         return [(hours.start_time, hours.stop_time)
                 for hours in DeliveryHours.objects.filter(
                 order_id=order_id)]
+
+    @staticmethod
+    def get_orders_delivery_hours(orders_id):
+        delivery_hours = {}
+        for order_id, start_time, stop_time in DeliveryHours.objects.filter(
+            order_id__in=orders_id
+        ).values_list('order_id', 'start_time', 'stop_time'):
+            delivery_hours.setdefault(order_id, []).append(
+                (start_time, stop_time)
+            )
+        return delivery_hours
+
+
+class DeliveryStatistics(models.Model):
+    courier = models.ForeignKey(Courier, on_delete=models.CASCADE)
+    region = models.PositiveIntegerField('Район')
+    delivery_time_sum = models.BigIntegerField(
+        'Суммарное время доставки в секундах', default=0
+    )
+    delivery_count = models.PositiveIntegerField('Количество доставок',
+                                                 default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['courier', 'region'],
+                                    name='delivery_statistics_unique'),
+        ]
+
+    @staticmethod
+    def get_min_average():
+        """Минимальное среднее время доставки по районам"""
+        # Среднее по району считается в numeric, как Avg по заказам
+        return Min(
+            Cast('delivery_time_sum', NUMERIC)
+            / Cast('delivery_count', NUMERIC)
+        )
+
+    @staticmethod
+    def add_delivery(courier_id, region, delivery_time):
+        """Добавление доставки заказа курьера в районе"""
+        DeliveryStatistics.add_deliveries(
+            {(courier_id, region): (delivery_time, 1)}
+        )
+
+    @staticmethod
+    def add_deliveries(deliveries):
+        """
+        Добавление доставок нескольких курьеров:
+        (id курьера, район) -> (суммарное время, количество).
+        Строки увеличиваются одним запросом INSERT ... ON CONFLICT
+        без чтения: строки, пересозданные командой
+        rebuild_delivery_statistics после начала транзакции, увеличиваются,
+        а не перезаписываются по старым id
+        """
+        if not deliveries:
+            return
+        # Строки блокируются в одном порядке во всех транзакциях
+        rows = [
+            (courier_id, region, delivery_time, count)
+            for (courier_id, region), (delivery_time, count)
+            in sorted(deliveries.items())
+        ]
+        table = DeliveryStatistics._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table}
+                    (courier_id, region, delivery_time_sum, delivery_count)
+                VALUES {', '.join(['(%s, %s, %s, %s)'] * len(rows))}
+                ON CONFLICT (courier_id, region) DO UPDATE SET
+                    delivery_time_sum = {table}.delivery_time_sum
+                        + EXCLUDED.delivery_time_sum,
+                    delivery_count = {table}.delivery_count
+                        + EXCLUDED.delivery_count
+                """,
+                [value for row in rows for value in row]
+            )
+
+
+class Job(models.Model):
+    status_job = models.CharField('Статус задачи',
+                                  max_length=8,
+                                  choices=StatusJob.choices,
+                                  default=StatusJob.QUEUED)
+    data = models.JSONField('Данные запроса', null=True)
+    total = models.PositiveIntegerField('Количество объектов', default=0)
+    processed = models.PositiveIntegerField('Обработано объектов',
+                                            default=0)
+    result = models.JSONField('Результат', null=True)
+    create_time = models.DateTimeField('Время создания', auto_now_add=True)
+    # Время захвата задачи обработчиком и сохранения последней порции
+    update_time = models.DateTimeField('Время обновления', null=True)
+    complete_time = models.DateTimeField('Время завершения', null=True)
@@ -0,0 +1,174 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+
+from .metrics import collector
+from .utils import is_intersections
+
+
+def to_hundredths(weight):
+    """Вес в целых сотых долях килограмма"""
+    return int(Decimal(weight).scaleb(2))
+
+
+def pack_greedy(orders, capacity):
+    """
+    Заказы по возрастанию веса, пока следующий помещается в
+    грузоподъемность. orders - [(id, вес)], отсортированные по весу и id
+    """
+    chosen = []
+    current_weight = Decimal(0)
+    for order_id, weight in orders:
+        if current_weight + weight > capacity:
+            break
+        chosen.append((order_id, weight))
+        current_weight += weight
+    return chosen
+
+
+def pack_knapsack(orders, capacity, deadline):
+    """
+    Набор заказов с наибольшим суммарным весом, не больше
+    грузоподъемности. Достижимые суммы веса в сотых долях хранятся
+    битами целого числа, после каждого заказа сохраняется состояние
+    для восстановления набора. При равных суммах предпочитаются более
+    легкие заказы. Если не уложились до deadline, возвращается None
+    """
+    limit = to_hundredths(capacity)
+    orders = [(order_id, weight, to_hundredths(weight))
+              for order_id, weight in orders if weight <= capacity]
+    if sum(hundredths for _, _, hundredths in orders) <= limit:
+        return [(order_id, weight) for order_id, weight, _ in orders]
+    full = (1 << (limit + 1)) - 1
+    reachable = 1
+    states = []
+    for number, (_, _, hundredths) in enumerate(orders):
+        if number % 64 == 0 and time.monotonic() > deadline:
+            return None
+        states.append(reachable)
+        reachable = (reachable | reachable << hundredths) & full
+        if reachable >> limit & 1:
+            break
+    target = reachable.bit_length() - 1
+    chosen = []
+    for (order_id, weight, hundredths), state in zip(
+        reversed(orders[:len(states)]), reversed(states)
+    ):
+        if not state >> target & 1:
+            chosen.append((order_id, weight))
+            target -= hundredths
+    chosen.reverse()
+    return chosen
+
+
+def pack_best_fit(couriers, orders):
+    """
+    Распределение заказов между несколькими курьерами.
+    couriers - [(id, грузоподъемность, районы, маска работы)],
+    orders - [(id, вес, район, маска доставки)].
+    Заказы перебираются от тяжелых к легким, при равном весе сначала
+    заказы с меньшим числом подходящих курьеров, каждый заказ получает
+    подходящий курьер с наименьшим остатком грузоподъемности после него.
+    Возвращает id курьера -> [(id заказа, вес)]
+    """
+    region_couriers = {}
+    remaining = {}
+    for courier_id, capacity, regions, working_mask in couriers:
+        remaining[courier_id] = capacity
+        for region in set(regions):
+            region_couriers.setdefault(region, []).append(
+                (courier_id, capacity, working_mask)
+            )
+    options = []
+    for order_id, weight, region, delivery_mask in orders:
+        feasible = [
+            courier_id
+            for courier_id, capacity, working_mask
+            in region_couriers.get(region, ())
+            if weight <= capacity
+            and is_intersections(working_mask, delivery_mask)
+        ]
+        if feasible:
+            options.append((order_id, weight, feasible))
+    options.sort(key=lambda option: (-option[1], len(option[2]), option[0]))
+    plan = {courier_id: [] for courier_id in remaining}
+    for order_id, weight, feasible in options:
+        best = min(
+            ((remaining[courier_id] - weight, courier_id)
+             for courier_id in feasible
+             if remaining[courier_id] >= weight),
+            default=None
+        )
+        if best is None:
+            continue
+        left, courier_id = best
+        remaining[courier_id] = left
+        plan[courier_id].append((order_id, weight))
+    for chosen in plan.values():
+        chosen.sort(key=lambda order: (order[1], order[0]))
+    return plan
+
+
+class PackingStats:
+    """Счетчики заполнения курьеров при назначении заказов"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.trips = 0
+        self.orders = 0
+        self.fill = 0
+        self.fallbacks = 0
+        self.time = 0
+        self.max_time = 0
+
+    def record(self, chosen, capacity, elapsed, fallback):
+        with self.lock:
+            if chosen:
+                self.trips += 1
+                self.orders += len(chosen)
+                self.fill += float(sum(weight for _, weight in chosen)
+                                   / capacity)
+            self.fallbacks += fallback
+            self.time += elapsed
+            self.max_time = max(self.max_time, elapsed)
+
+
+stats = PackingStats()
+
+
+def pack(orders, capacity):
+    """
+    Выбор заказов для курьера способом из настройки ASSIGN_PACKING.
+    Если точный подбор не уложился в ASSIGN_PACKING_TIME_BUDGET,
+    заказы выбираются жадно
+    """
+    start = time.monotonic()
+    fallback = False
+    if settings.ASSIGN_PACKING == 'knapsack':
+        orders = list(orders)
+        chosen = pack_knapsack(
+            orders, capacity, start + settings.ASSIGN_PACKING_TIME_BUDGET
+        )
+        if chosen is None:
+            fallback = True
+            chosen = pack_greedy(orders, capacity)
+    else:
+        chosen = pack_greedy(orders, capacity)
+    stats.record(chosen, capacity, time.monotonic() - start, fallback)
+    return chosen
+
+
+@collector('packing')
+def get_packing_info():
+    with stats.lock:
+        return {
+            'engine': settings.ASSIGN_PACKING,
+            'trips': stats.trips,
+            'orders': stats.orders,
+            'fill_ratio': round(stats.fill / stats.trips, 4)
+            if stats.trips else None,
+            'fallbacks': stats.fallbacks,
+            'time_ms': round(stats.time * 1000, 3),
+            'max_time_ms': round(stats.max_time * 1000, 3),
+        }
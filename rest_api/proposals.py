@@ -0,0 +1,128 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from .const import StatusCourier
+from .metrics import collector
+from .models import Courier, Order, Regions, WorkingHours
+from .packing import pack
+from .utils import get_hours_mask
+
+
+class ProposalStore:
+    """
+    Готовые развозы свободных курьеров процесса: id курьера ->
+    (заказы [(id, вес)], время расчета, параметры курьера).
+    Развоз сбрасывается, когда в районах курьера появляются новые заказы
+    или курьер изменяется, и пересчитывается в фоне после фиксации
+    транзакции. Развоз старше ASSIGN_PROPOSAL_TTL не используется, чтобы
+    учесть заказы, загруженные другими процессами. Развоз выдается,
+    только если грузоподъемность, районы и время работы курьера
+    не изменились с расчета (курьер мог измениться в другом процессе),
+    заказы развоза перед выдачей проверяются по базе
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.proposals = {}
+        # Номер изменения курьера: расчет, начатый до сброса, не сохраняется
+        self.versions = {}
+        self.hits = 0
+        self.misses = 0
+
+    def reset(self):
+        with self.lock:
+            self.proposals = {}
+            self.versions = {}
+            self.hits = 0
+            self.misses = 0
+
+    def invalidate(self, couriers_id):
+        """Сброс развозов курьеров"""
+        with self.lock:
+            for courier_id in couriers_id:
+                self.proposals.pop(courier_id, None)
+                self.versions[courier_id] = \
+                    self.versions.get(courier_id, 0) + 1
+
+    def refresh(self, couriers_id):
+        """
+        Сброс развозов курьеров и пересчет в фоне после фиксации
+        текущей транзакции
+        """
+        if not settings.ASSIGN_PROPOSALS:
+            return
+        couriers_id = list(couriers_id)
+        if not couriers_id:
+            return
+        self.invalidate(couriers_id)
+        # jobs импортирует сериализаторы, которые используют этот модуль
+        from .jobs import submit
+        transaction.on_commit(lambda: submit(self.compute, couriers_id))
+
+    def refresh_regions(self, regions):
+        """Пересчет развозов свободных курьеров, работающих в районах"""
+        if not settings.ASSIGN_PROPOSALS or not regions:
+            return
+        self.refresh(Courier.objects.filter(
+            status_courier=StatusCourier.FREE,
+            regions__region__in=regions
+        ).distinct().values_list('courier_id', flat=True))
+
+    def compute(self, couriers_id):
+        """Расчет развозов свободных курьеров"""
+        with self.lock:
+            versions = {courier_id: self.versions.get(courier_id, 0)
+                        for courier_id in couriers_id}
+        for courier in Courier.objects.filter(
+            courier_id__in=couriers_id,
+            status_courier=StatusCourier.FREE
+        ):
+            key = self.get_key(
+                courier, Regions.get_regions(courier.courier_id),
+                WorkingHours.get_working_hours(courier.courier_id)
+            )
+            chosen = pack(Order.get_feasible(courier),
+                          courier.lifting_capacity)
+            with self.lock:
+                if self.versions.get(courier.courier_id, 0) \
+                        == versions[courier.courier_id]:
+                    self.proposals[courier.courier_id] = \
+                        (chosen, time.monotonic(), key)
+
+    @staticmethod
+    def get_key(courier, regions, working_hours):
+        """Параметры курьера, по которым рассчитан развоз"""
+        return (courier.lifting_capacity, tuple(sorted(regions)),
+                get_hours_mask(working_hours))
+
+    def take(self, courier_id, key):
+        """
+        Развоз курьера для выдачи: [(id, вес)], либо None, если
+        развоза нет, он устарел или рассчитан для других параметров
+        курьера key. Развоз выдается один раз
+        """
+        with self.lock:
+            proposal = self.proposals.pop(courier_id, None)
+            if proposal is not None and proposal[2] == key \
+                    and time.monotonic() - proposal[1] \
+                    <= settings.ASSIGN_PROPOSAL_TTL:
+                self.hits += 1
+                return proposal[0]
+            self.misses += 1
+            return None
+
+
+proposal_store = ProposalStore()
+
+
+@collector('proposals')
+def get_proposals_info():
+    with proposal_store.lock:
+        return {
+            'enabled': settings.ASSIGN_PROPOSALS,
+            'couriers': len(proposal_store.proposals),
+            'hits': proposal_store.hits,
+            'misses': proposal_store.misses,
+        }
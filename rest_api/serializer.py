@@ -1,13 +1,25 @@
 from decimal import Decimal
 
+from django.conf import settings
 from rest_framework import serializers
+from django.db import connection, transaction
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import Case, When, Value, IntegerField, F, \
+    OuterRef, Subquery
 from django.utils import timezone
 
 from .models import WorkingHours, QuantityOrders, Courier, Order, \
-    DeliveryHours, Regions
-from .const import CourierType, LIFTING_CAPACITY, StatusCourier, StatusOrder
-from .utils import parse_time, is_intersections, get_correct_hours, \
-    get_regions
+    DeliveryHours, DeliveryStatistics, Regions, Job
+from .const import CourierType, LIFTING_CAPACITY, StatusCourier, \
+    StatusOrder, ErrorMessage
+from .utils import is_intersections, get_regions, get_hours_mask
+from .validators import ItemValidator
+from .dispatch import DispatchIndex, dispatch_index, courier_index
+from .feasibility import CandidateOrders, get_feasible, \
+    get_feasible_orders
+from .packing import pack, pack_best_fit
+from .proposals import proposal_store
+from .courier_cache import courier_cache
 
 
 class WorkingHoursSerializer(serializers.ModelSerializer):
@@ -51,6 +63,11 @@ class BaseCourierSerializer(serializers.ModelSerializer):
         return data
 
 
+courier_validator = ItemValidator(BaseCourierSerializer, 'courier_id',
+                                  'Courier id already exist',
+                                  'Courier id is not unique')
+
+
 class CourierCreateSerializer(serializers.ModelSerializer):
     """Serializer for create couriers"""
     data = BaseCourierSerializer(many=True)
@@ -60,34 +77,47 @@ class CourierCreateSerializer(serializers.ModelSerializer):
         fields = ('data',)
 
     def create(self, validated_data):
-        couriers_id = []
+        couriers = []
+        working_hours = []
+        regions = []
         for courier in validated_data['data']:
-            working_hours = courier.pop('working_hours')
-            regions = courier.pop('regions')
-            quantity_orders = QuantityOrders.objects.create()
+            for hours in courier.pop('working_hours'):
+                working_hours.append(
+                    WorkingHours(courier_id=courier['courier_id'], **hours)
+                )
+            for region in courier.pop('regions'):
+                regions.append(
+                    Regions(courier_id=courier['courier_id'], **region)
+                )
             courier['lifting_capacity'] = LIFTING_CAPACITY[
                 courier['courier_type']
             ]
-            courier['quantity_orders'] = quantity_orders
-            instance = Courier.objects.create(**courier)
-            for hours in working_hours:
-                instance.workinghours_set.create(**hours)
-            for region in regions:
-                instance.regions_set.create(**region)
-            couriers_id.append({'id': courier['courier_id']})
-        return couriers_id
+            couriers.append(Courier(**courier))
+        with transaction.atomic():
+            quantity_orders = QuantityOrders.objects.bulk_create(
+                QuantityOrders() for _ in couriers
+            )
+            for courier, quantity in zip(couriers, quantity_orders):
+                courier.quantity_orders = quantity
+            Courier.objects.bulk_create(couriers)
+            WorkingHours.objects.bulk_create(working_hours)
+            Regions.objects.bulk_create(regions)
+        proposal_store.refresh(courier.courier_id for courier in couriers)
+        courier_index.refresh(courier.courier_id for courier in couriers)
+        return [
+            {
+                'id': courier.courier_id
+            } for courier in couriers
+        ]
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        for current_courier in self.initial_data['data']:
-            if current_courier.get('working_hours'):
-                current_courier['working_hours'] = get_correct_hours(
-                    current_courier['working_hours']
-                )
-            if current_courier.get('regions'):
-                current_courier['regions'] = get_regions(
-                    current_courier['regions']
-                )
+    def to_internal_value(self, data):
+        if not isinstance(data, dict) \
+                or not isinstance(data.get('data'), list):
+            return super().to_internal_value(data)
+        couriers, errors = courier_validator.validate(data['data'])
+        if any(errors):
+            raise serializers.ValidationError({'data': errors})
+        return {'data': couriers}
 
 
 class CourierUpdateSerializer(BaseCourierSerializer):
@@ -99,10 +129,6 @@ class CourierUpdateSerializer(BaseCourierSerializer):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        if 'working_hours' in self.initial_data:
-            self.initial_data['working_hours'] = get_correct_hours(
-                self.initial_data['working_hours']
-            )
         if 'regions' in self.initial_data:
             self.initial_data['regions'] = get_regions(
                 self.initial_data['regions']
@@ -113,6 +139,21 @@ class CourierUpdateSerializer(BaseCourierSerializer):
             raise serializers.ValidationError('Wrong field courier_id')
         return data
 
+    def to_internal_value(self, data):
+        # Периоды работы проверяются и разбираются так же, как в
+        # POST /couriers, поле DRF получает готовые объекты времени
+        if isinstance(data, dict) and 'working_hours' in data:
+            try:
+                working_hours = courier_validator.validate_field(
+                    'working_hours', data['working_hours']
+                )
+            except serializers.ValidationError as exc:
+                raise serializers.ValidationError(
+                    {'working_hours': exc.detail}
+                )
+            data = {**data, 'working_hours': working_hours}
+        return super().to_internal_value(data)
+
     def to_representation(self, instance):
         data = {
             'courier_id': self.instance.courier_id,
@@ -126,6 +167,7 @@ class CourierUpdateSerializer(BaseCourierSerializer):
         return data
 
     def update(self, instance, validated_data):
+        released_orders = []
         if self.initial_data.get('courier_type'):
             self.instance.lifting_capacity = LIFTING_CAPACITY[
                 validated_data['courier_type']
@@ -139,36 +181,41 @@ class CourierUpdateSerializer(BaseCourierSerializer):
                         status_order=StatusOrder.IN_PROCESS,
                     ).order_by('-weight'):
                         order.status_order = StatusOrder.NEW
+                        released_orders.append(order.order_id)
                         order.courier = None
                         order.assign_time = None
                         self.instance.current_weight_orders -= order.weight
+                        self.instance.orders_in_process -= 1
                         if self.instance.current_weight_orders <= \
                                 self.instance.lifting_capacity:
                             order.save()
                             break
                         order.save()
-        if self.initial_data.get('working_hours'):
+        if validated_data.get('working_hours'):
             WorkingHours.objects.filter(
                 courier_id=self.instance.courier_id
             ).delete()
-            for time in self.initial_data['working_hours']:
+            for time in validated_data['working_hours']:
                 self.instance.workinghours_set.create(**time)
             if self.instance.status_courier == StatusCourier.BUSY:
-                working_hours = WorkingHours.get_working_hours(
-                    self.instance.courier_id
+                working_mask = get_hours_mask(
+                    WorkingHours.get_working_hours(self.instance.courier_id)
                 )
                 for order in Order.objects.filter(
                     courier_id=self.instance.courier_id,
                     status_order=StatusOrder.IN_PROCESS
-                ):
-                    delivery_hours = DeliveryHours.get_delivery_hours(
-                        order.order_id
+                ).prefetch_related('deliveryhours_set'):
+                    delivery_mask = get_hours_mask(
+                        (hours.start_time, hours.stop_time)
+                        for hours in order.deliveryhours_set.all()
                     )
-                    if not is_intersections(working_hours, delivery_hours):
+                    if not is_intersections(working_mask, delivery_mask):
                         order.status_order = StatusOrder.NEW
+                        released_orders.append(order.order_id)
                         order.courier = None
                         order.assign_time = None
                         self.instance.current_weight_orders -= order.weight
+                        self.instance.orders_in_process -= 1
                         order.save()
         if self.initial_data.get('regions'):
             Regions.objects.filter(
@@ -185,15 +232,14 @@ class CourierUpdateSerializer(BaseCourierSerializer):
                     status_order=StatusOrder.IN_PROCESS,
                 ):
                     order.status_order = StatusOrder.NEW
+                    released_orders.append(order.order_id)
                     order.courier = None
                     order.assign_time = None
                     self.instance.current_weight_orders -= order.weight
+                    self.instance.orders_in_process -= 1
                     order.save()
         if self.instance.status_courier == StatusCourier.BUSY:
-            if not Order.objects.filter(
-                    courier_id=self.instance.courier_id,
-                    status_order=StatusOrder.IN_PROCESS
-            ).first():
+            if not self.instance.orders_in_process:
                 self.instance.status_courier = StatusCourier.FREE
                 self.instance.assign_time = None
                 self.instance.last_complete_time = None
@@ -211,6 +257,14 @@ class CourierUpdateSerializer(BaseCourierSerializer):
                     self.instance.quantity_orders.save()
                 self.instance.courier_type_in_delivery = None
         self.instance.save()
+        dispatch_index.add_from_db(released_orders)
+        if released_orders:
+            proposal_store.refresh_regions(Order.objects.filter(
+                order_id__in=released_orders
+            ).values('region'))
+        proposal_store.refresh([self.instance.courier_id])
+        courier_index.refresh([self.instance.courier_id])
+        courier_cache.invalidate([self.instance.courier_id])
         return self.instance
 
 
@@ -246,6 +300,11 @@ class BaseOrderSerializer(serializers.ModelSerializer):
         return data
 
 
+order_validator = ItemValidator(BaseOrderSerializer, 'order_id',
+                                'Order id already exist',
+                                'Order id is not unique')
+
+
 class OrderCreateSerializer(serializers.ModelSerializer):
     """Serializer for create orders"""
     data = BaseOrderSerializer(many=True)
@@ -255,36 +314,129 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         fields = ('data',)
 
     def create(self, validated_data):
-        orders_id = []
+        orders = []
+        delivery_hours = []
+        new_orders = []
         for order in validated_data['data']:
-            delivery_hours = order.pop('delivery_hours')
-            instance = Order.objects.create(**order)
-            for hours in delivery_hours:
-                instance.deliveryhours_set.create(**hours)
-            orders_id.append(
-                {
-                    'id': order['order_id']
-                }
-            )
-        return orders_id
+            order_hours = order.pop('delivery_hours')
+            for hours in order_hours:
+                delivery_hours.append(
+                    DeliveryHours(order_id=order['order_id'], **hours)
+                )
+            orders.append(Order(**order))
+            new_orders.append((
+                order['order_id'], order['weight'], order['region'],
+                get_hours_mask((hours['start_time'], hours['stop_time'])
+                               for hours in order_hours)
+            ))
+        with transaction.atomic():
+            Order.objects.bulk_create(orders)
+            DeliveryHours.objects.bulk_create(delivery_hours)
+        dispatch_index.add(new_orders)
+        proposal_store.refresh_regions({order.region for order in orders})
+        if settings.ASSIGN_PUSH:
+            couriers_id = courier_index.match(new_orders)
+            if couriers_id:
+                # jobs импортирует сериализаторы, поэтому импорт здесь
+                from .jobs import submit, push_orders
+                transaction.on_commit(
+                    lambda: submit(push_orders, couriers_id)
+                )
+        return [
+            {
+                'id': order.order_id
+            } for order in orders
+        ]
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        for current_order in self.initial_data['data']:
-            time = []
-            for current_time in current_order['delivery_hours']:
-                start, stop = parse_time(current_time)
-                time.append({
-                    'start_time': start,
-                    'stop_time': stop
-                })
-            current_order['delivery_hours'] = time
+    def to_internal_value(self, data):
+        if not isinstance(data, dict) \
+                or not isinstance(data.get('data'), list):
+            return super().to_internal_value(data)
+        orders, errors = order_validator.validate(data['data'])
+        if any(errors):
+            raise serializers.ValidationError({'data': errors})
+        return {'data': orders}
 
 
 class OrdersAssignSerializer(serializers.ModelSerializer):
     """Serializer for assign orders"""
     courier_id = serializers.IntegerField(min_value=1)
 
+    # Назначение одним запросом: подходящие заказы по возрастанию веса,
+    # пока накопленный вес помещается в грузоподъемность, блокируются
+    # с SKIP LOCKED и выдаются курьеру, курьер получает статус занятого.
+    # Периоды пересекаются, если пересекаются их минуты суток, как
+    # в get_hours_mask. Возвращает id выбранных заказов и id и вес
+    # выданных, заказы из skipped не выбираются
+    assign_sql = f"""
+        WITH candidates AS (
+            SELECT orders.order_id,
+                   SUM(orders.weight) OVER (
+                       ORDER BY orders.weight, orders.order_id
+                   ) AS total_weight
+            FROM rest_api_order orders
+            WHERE orders.status_order = '{StatusOrder.NEW}'
+              AND orders.weight <= %(capacity)s
+              AND orders.order_id <> ALL(%(skipped)s)
+              AND orders.region IN (
+                  SELECT region
+                  FROM rest_api_regions
+                  WHERE courier_id = %(courier_id)s
+              )
+              AND EXISTS (
+                  SELECT 1
+                  FROM rest_api_deliveryhours delivery
+                  JOIN rest_api_workinghours working
+                    ON working.courier_id = %(courier_id)s
+                  WHERE delivery.order_id = orders.order_id
+                    AND floor(extract(epoch FROM delivery.start_time) / 60)
+                        < ceil(extract(epoch FROM working.stop_time) / 60)
+                    AND ceil(extract(epoch FROM delivery.stop_time) / 60)
+                        > floor(extract(epoch FROM working.start_time) / 60)
+                    AND ceil(extract(epoch FROM delivery.stop_time) / 60)
+                        > floor(extract(epoch FROM delivery.start_time) / 60)
+                    AND ceil(extract(epoch FROM working.stop_time) / 60)
+                        > floor(extract(epoch FROM working.start_time) / 60)
+              )
+        ), chosen AS (
+            SELECT order_id
+            FROM candidates
+            WHERE total_weight <= %(capacity)s
+        ), locked AS (
+            SELECT order_id
+            FROM rest_api_order
+            WHERE order_id IN (SELECT order_id FROM chosen)
+              AND status_order = '{StatusOrder.NEW}'
+            FOR UPDATE SKIP LOCKED
+        ), assigned AS (
+            UPDATE rest_api_order
+            SET status_order = '{StatusOrder.IN_PROCESS}',
+                assign_time = %(assign_time)s,
+                courier_id = %(courier_id)s
+            WHERE order_id IN (SELECT order_id FROM locked)
+            RETURNING order_id, weight
+        ), courier AS (
+            UPDATE rest_api_courier
+            SET status_courier = '{StatusCourier.BUSY}',
+                assign_time = %(assign_time)s,
+                last_complete_time = %(assign_time)s,
+                courier_type_in_delivery = courier_type,
+                current_weight_orders = %(current_weight)s + total.weight,
+                orders_in_process = %(orders_count)s + total.count
+            FROM (
+                SELECT SUM(weight) AS weight, COUNT(*) AS count
+                FROM assigned
+            ) total
+            WHERE courier_id = %(courier_id)s
+              AND total.weight IS NOT NULL
+        )
+        SELECT ARRAY(SELECT order_id FROM chosen),
+               ARRAY(SELECT order_id FROM assigned
+                     ORDER BY weight, order_id),
+               ARRAY(SELECT weight FROM assigned
+                     ORDER BY weight, order_id)
+    """
+
     class Meta:
         model = Courier
         fields = ('courier_id',)
@@ -292,6 +444,7 @@ class OrdersAssignSerializer(serializers.ModelSerializer):
 
     def validate(self, validated_data):
         response = {}
+        self.courier_saved = False
         if self.instance.status_courier == StatusCourier.BUSY:
             response['orders'] = [
                 {
@@ -303,52 +456,384 @@ class OrdersAssignSerializer(serializers.ModelSerializer):
             ]
             response['assign_time'] = self.instance.assign_time
             return response
+        if settings.ASSIGN_FAST_REJECT and not dispatch_index.can_fit(
+            Regions.get_regions(self.instance.courier_id),
+            self.instance.lifting_capacity,
+            WorkingHours.get_working_hours(self.instance.courier_id)
+        ):
+            response['orders'] = []
+            return response
+        assign_time = timezone.now()
+        proposal = None
+        if settings.ASSIGN_PROPOSALS:
+            # Развоз сверяется с заблокированной строкой курьера
+            # и его районами и временем работы из базы
+            proposal = proposal_store.take(
+                self.instance.courier_id,
+                proposal_store.get_key(
+                    self.instance,
+                    Regions.get_regions(self.instance.courier_id),
+                    WorkingHours.get_working_hours(self.instance.courier_id)
+                )
+            )
+        if proposal is not None:
+            orders_id, current_weight = self.assign_proposal(proposal,
+                                                             assign_time)
+        elif settings.ASSIGN_BACKEND == 'sql':
+            orders_id, current_weight = self.assign_with_sql(assign_time)
+        elif settings.ASSIGN_BACKEND == 'index':
+            orders_id, current_weight = self.assign_from_index(assign_time)
+        elif settings.ASSIGN_BACKEND == 'vector':
+            orders_id, current_weight = self.assign_from_arrays(assign_time)
+        else:
+            orders_id, current_weight = self.assign_from_db(assign_time)
+        dispatch_index.remove(orders_id)
+        if orders_id:
+            proposal_store.invalidate([self.instance.courier_id])
+            courier_index.remove([self.instance.courier_id])
+            courier_cache.invalidate([self.instance.courier_id])
+            self.instance.last_complete_time = assign_time
+            self.instance.assign_time = assign_time
+            self.instance.current_weight_orders = current_weight
+            self.instance.orders_in_process = len(orders_id)
+            self.instance.status_courier = StatusCourier.BUSY
+            self.instance.courier_type_in_delivery = \
+                self.instance.courier_type
+            response['assign_time'] = assign_time
+            response['orders'] = [
+                {
+                    'id': order_id
+                } for order_id in orders_id
+            ]
+        else:
+            response['orders'] = []
+        return response
+
+    def update(self, instance, validated_data):
+        # Запрос назначения уже обновил курьера
+        if self.courier_saved:
+            return instance
+        return super().update(instance, validated_data)
+
+    def assign_with_sql(self, assign_time):
+        """
+        Назначение заказов и обновление курьера запросом assign_sql:
+        (id заказов, вес). Запрос повторяется, только если часть
+        выбранных заказов выдает параллельный запрос
+        """
+        orders_id = []
+        current_weight = Decimal(0)
+        skipped = []
+        self.courier_saved = True
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute(self.assign_sql, {
+                    'courier_id': self.instance.courier_id,
+                    'capacity': self.instance.lifting_capacity
+                    - current_weight,
+                    'current_weight': current_weight,
+                    'orders_count': len(orders_id),
+                    'assign_time': assign_time,
+                    'skipped': skipped,
+                })
+                chosen_id, assigned_id, weights = cursor.fetchone()
+                orders_id.extend(assigned_id)
+                current_weight += sum(weights, Decimal(0))
+                if len(assigned_id) == len(chosen_id):
+                    break
+                assigned_id = set(assigned_id)
+                skipped.extend(order_id for order_id in chosen_id
+                               if order_id not in assigned_id)
+        return orders_id, current_weight
+
+    def assign_orders(self, chosen, assign_time):
+        """
+        Выдача выбранных заказов [(id, вес)] курьеру.
+        Строки заказов блокируются с SKIP LOCKED: заказы, которые
+        выдает параллельный запрос или уже выданы, пропускаются.
+        Возвращаются выданные заказы
+        """
+        locked_id = set(Order.objects.select_for_update(
+            skip_locked=True
+        ).filter(
+            order_id__in=[order_id for order_id, _ in chosen],
+            status_order=StatusOrder.NEW
+        ).values_list('order_id', flat=True))
+        if locked_id:
+            Order.objects.filter(order_id__in=locked_id).update(
+                assign_time=assign_time,
+                status_order=StatusOrder.IN_PROCESS,
+                courier=self.instance
+            )
+        return [(order_id, weight) for order_id, weight in chosen
+                if order_id in locked_id]
+
+    def assign_picked(self, pick, assign_time):
+        """
+        Выдача заказов, выбранных функцией pick(остаток грузоподъемности):
+        (id заказов, вес). Если часть заказов выдать не удалось,
+        подбор повторяется на оставшуюся грузоподъемность
+        """
+        orders_id = []
+        current_weight = Decimal(0)
+        while True:
+            chosen = pick(self.instance.lifting_capacity - current_weight)
+            if not chosen:
+                break
+            assigned = self.assign_orders(chosen, assign_time)
+            for order_id, weight in assigned:
+                orders_id.append(order_id)
+                current_weight += weight
+            if len(assigned) == len(chosen):
+                break
+        return orders_id, current_weight
+
+    def assign_feasible(self, feasible, assign_time):
+        """Выдача заказов из списка подходящих [(id, вес)] по весу и id"""
+        picked = set()
+
+        def pick(capacity):
+            chosen = pack((order for order in feasible
+                           if order[0] not in picked), capacity)
+            picked.update(order_id for order_id, _ in chosen)
+            return chosen
+        return self.assign_picked(pick, assign_time)
+
+    def assign_proposal(self, proposal, assign_time):
+        """
+        Выдача готового развоза: (id заказов, вес). Заказы развоза
+        проверяются по базе, как при подборе запросом, и выбираются
+        в пределах грузоподъемности. Если часть заказов уже выдана
+        другим курьерам, остаток грузоподъемности заполняется подбором
+        запросом к базе
+        """
+        picked = set()
+        feasible = []
+        checked = []
+
+        def pick(capacity):
+            chosen = []
+            if not checked:
+                checked.append(True)
+                chosen = pack(Order.get_feasible(
+                    self.instance,
+                    [order_id for order_id, _ in proposal]
+                ), capacity)
+            if not chosen:
+                if not feasible:
+                    feasible.extend(Order.get_feasible(self.instance))
+                chosen = pack((order for order in feasible
+                               if order[0] not in picked), capacity)
+            picked.update(order_id for order_id, _ in chosen)
+            return chosen
+        return self.assign_picked(pick, assign_time)
+
+    def assign_from_db(self, assign_time):
+        """Подбор заказов запросом к базе: (id заказов, вес)"""
+        return self.assign_feasible(Order.get_feasible(self.instance),
+                                    assign_time)
+
+    def assign_from_arrays(self, assign_time):
+        """
+        Подбор заказов проверкой всех кандидатов по столбцам:
+        (id заказов, вес)
+        """
         regions = Regions.get_regions(self.instance.courier_id)
-        new_orders = Order.objects.filter(
+        capacity = self.instance.lifting_capacity
+        candidates = CandidateOrders.from_queryset(Order.objects.filter(
             status_order=StatusOrder.NEW,
             region__in=regions,
-            weight__lte=self.instance.lifting_capacity
-        ).order_by('weight')
-        if new_orders:
-            orders_id = []
-            assign_time = timezone.now()
-            current_weight = Decimal(0)
-            working_hours = WorkingHours.get_working_hours(
-                self.instance.courier_id
-            )
-            for order in new_orders:
-                if current_weight + order.weight > \
-                        self.instance.lifting_capacity:
-                    break
-                delivery_hours = DeliveryHours.get_delivery_hours(
-                    order.order_id
-                )
-                if is_intersections(working_hours, delivery_hours):
-                    order.assign_time = assign_time
-                    order.status_order = StatusOrder.IN_PROCESS
-                    order.courier_id = self.instance
-                    orders_id.append(order.order_id)
-                    order.save()
-                    current_weight += order.weight
-            if orders_id:
-                self.instance.last_complete_time = assign_time
-                self.instance.assign_time = assign_time
-                self.instance.current_weight_orders = current_weight
-                self.instance.status_courier = StatusCourier.BUSY
-                self.instance.courier_type_in_delivery = \
-                    self.instance.courier_type
-                response['assign_time'] = assign_time
-                response['orders'] = [
+            weight__lte=capacity
+        ))
+        feasible = get_feasible(
+            candidates, regions, capacity,
+            WorkingHours.get_working_hours(self.instance.courier_id)
+        )
+        return self.assign_feasible(
+            get_feasible_orders(candidates, feasible), assign_time
+        )
+
+    def assign_from_index(self, assign_time):
+        """
+        Подбор заказов по индексу новых заказов: (id заказов, вес).
+        Выбранные заказы удаляются из индекса, в том числе те,
+        которые уже выданы другим процессом
+        """
+        regions = Regions.get_regions(self.instance.courier_id)
+        working_mask = get_hours_mask(
+            WorkingHours.get_working_hours(self.instance.courier_id)
+        )
+
+        def pick(capacity):
+            chosen = dispatch_index.pick(regions, capacity, working_mask)
+            dispatch_index.remove(order_id for order_id, _ in chosen)
+            return chosen
+        return self.assign_picked(pick, assign_time)
+
+
+class CourierIdSerializer(serializers.Serializer):
+    """Serializer for courier id"""
+    courier_id = serializers.IntegerField(min_value=1)
+
+
+class OrdersAssignBatchSerializer(serializers.Serializer):
+    """Serializer for assign orders to many couriers"""
+    data = CourierIdSerializer(many=True)
+
+    def validate_data(self, data):
+        couriers_id = [item['courier_id'] for item in data]
+        existing_id = set(Courier.objects.filter(
+            courier_id__in=couriers_id
+        ).values_list('courier_id', flat=True))
+        errors = []
+        unique_id = set()
+        for courier_id in couriers_id:
+            if courier_id not in existing_id:
+                errors.append({
+                    'courier_id': [ErrorMessage.INSTANCE_NOT_FOUND]
+                })
+            elif courier_id in unique_id:
+                errors.append({'courier_id': ['Courier id is not unique']})
+            else:
+                errors.append({})
+            unique_id.add(courier_id)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return data
+
+    def create(self, validated_data):
+        """
+        Назначение заказов всем курьерам одним расчетом и одной
+        транзакцией. Занятые курьеры получают текущий развоз,
+        свободным заказы распределяются функцией pack_best_fit
+        """
+        couriers_id = [item['courier_id'] for item in validated_data['data']]
+        assign_time = timezone.now()
+        with transaction.atomic():
+            # Курьеры блокируются по возрастанию id, чтобы пересекающиеся
+            # пакеты не блокировали друг друга
+            couriers = {
+                courier.courier_id: courier
+                for courier in Courier.objects.select_for_update().filter(
+                    courier_id__in=couriers_id
+                ).order_by('courier_id')
+            }
+            free = [courier for courier in couriers.values()
+                    if courier.status_courier == StatusCourier.FREE]
+            orders = {courier_id: [] for courier_id in couriers}
+            for order_id, courier_id in Order.objects.filter(
+                courier_id__in=couriers,
+                status_order=StatusOrder.IN_PROCESS
+            ).values_list('order_id', 'courier_id'):
+                orders[courier_id].append(order_id)
+            if free:
+                for courier_id, chosen in self.assign_free(
+                    free, assign_time
+                ).items():
+                    orders[courier_id] = chosen
+        response = []
+        for courier_id in couriers_id:
+            courier = couriers[courier_id]
+            data = {
+                'courier_id': courier_id,
+                'orders': [
                     {
                         'id': order_id
-                    } for order_id in orders_id
+                    } for order_id in orders[courier_id]
                 ]
-            else:
-                response['orders'] = []
-        else:
-            response['orders'] = []
+            }
+            if orders[courier_id]:
+                data['assign_time'] = courier.assign_time
+            response.append(data)
         return response
 
+    def assign_free(self, couriers, assign_time):
+        """
+        Распределение новых заказов между свободными курьерами:
+        id курьера -> id назначенных заказов
+        """
+        regions = {courier.courier_id: [] for courier in couriers}
+        for courier_id, region in Regions.objects.filter(
+            courier_id__in=regions
+        ).values_list('courier_id', 'region'):
+            regions[courier_id].append(region)
+        working_hours = {courier.courier_id: [] for courier in couriers}
+        for courier_id, start_time, stop_time in WorkingHours.objects.filter(
+            courier_id__in=working_hours
+        ).values_list('courier_id', 'start_time', 'stop_time'):
+            working_hours[courier_id].append((start_time, stop_time))
+        plan = pack_best_fit(
+            [
+                (courier.courier_id, courier.lifting_capacity,
+                 regions[courier.courier_id],
+                 get_hours_mask(working_hours[courier.courier_id]))
+                for courier in couriers
+            ],
+            DispatchIndex.fetch(Order.objects.filter(
+                status_order=StatusOrder.NEW,
+                region__in={region for courier_regions in regions.values()
+                            for region in courier_regions},
+                weight__lte=max(courier.lifting_capacity
+                                for courier in couriers)
+            ))
+        )
+        chosen = {
+            order_id: courier_id
+            for courier_id, courier_orders in plan.items()
+            for order_id, _ in courier_orders
+        }
+        if not chosen:
+            return {}
+        # Заказы, которые выдает параллельный запрос, пропускаются
+        locked_id = set(Order.objects.select_for_update(
+            skip_locked=True
+        ).filter(
+            order_id__in=chosen,
+            status_order=StatusOrder.NEW
+        ).values_list('order_id', flat=True))
+        dispatch_index.remove(chosen)
+        chosen = {order_id: courier_id for order_id, courier_id
+                  in chosen.items() if order_id in locked_id}
+        if not chosen:
+            return {}
+        # Все заказы выдаются одним запросом, курьер выбирается по id заказа
+        Order.objects.filter(order_id__in=chosen).update(
+            assign_time=assign_time,
+            status_order=StatusOrder.IN_PROCESS,
+            courier_id=Case(
+                *(When(order_id=order_id, then=Value(courier_id))
+                  for order_id, courier_id in chosen.items()),
+                output_field=IntegerField()
+            )
+        )
+        assigned = {}
+        updated = []
+        for courier in couriers:
+            courier_orders = [order for order in plan[courier.courier_id]
+                              if order[0] in chosen]
+            if not courier_orders:
+                continue
+            assigned[courier.courier_id] = [
+                order_id for order_id, _ in courier_orders
+            ]
+            courier.last_complete_time = assign_time
+            courier.assign_time = assign_time
+            courier.current_weight_orders = sum(
+                (weight for _, weight in courier_orders), Decimal(0)
+            )
+            courier.orders_in_process = len(courier_orders)
+            courier.status_courier = StatusCourier.BUSY
+            courier.courier_type_in_delivery = courier.courier_type
+            updated.append(courier)
+        Courier.objects.bulk_update(updated, [
+            'last_complete_time', 'assign_time', 'current_weight_orders',
+            'orders_in_process', 'status_courier', 'courier_type_in_delivery'
+        ])
+        proposal_store.invalidate(assigned)
+        courier_index.remove(assigned)
+        courier_cache.invalidate(assigned)
+        return assigned
+
 
 class OrdersCompleteSerializer(serializers.ModelSerializer):
     """Serializer for orders complete"""
@@ -379,41 +864,242 @@ class OrdersCompleteSerializer(serializers.ModelSerializer):
 
     def validate(self, validated_data):
         if self.instance.status_order == StatusOrder.IN_PROCESS:
-            self.instance.status_order = StatusOrder.COMPLETE
-            self.instance.complete_time = validated_data['complete_time']
-            self.instance.delivery_time = (
-                    validated_data['complete_time']
-                    - self.instance.courier.last_complete_time
-            ).seconds
-            self.instance.courier.last_complete_time = \
-                validated_data['complete_time']
-            self.instance.courier.complete_order_in_delivery += 1
-            self.instance.courier.current_weight_orders -= self.instance.weight
-            if not Order.objects.exclude(
-                    order_id=validated_data['order_id']
-            ).filter(
-                courier_id=validated_data['courier_id'],
-                status_order=StatusOrder.IN_PROCESS
-            ).first():
-                self.instance.courier.status_courier = StatusCourier.FREE
-                self.instance.courier.current_weight_orders = Decimal(0)
-                self.instance.courier.complete_order_in_delivery = 0
-                self.instance.courier.last_complete_time = None
-                self.instance.courier.assign_time = None
-                if self.instance.courier.courier_type_in_delivery \
-                        == CourierType.FOOT:
-                    self.instance.courier.quantity_orders.foot += 1
-                elif self.instance.courier.courier_type_in_delivery \
-                        == CourierType.BIKE:
-                    self.instance.courier.quantity_orders.bike += 1
-                else:
-                    self.instance.courier.quantity_orders.car += 1
-                self.instance.courier.quantity_orders.save()
-                self.instance.courier.courier_type_in_delivery = None
-            self.instance.save()
-            self.instance.courier.save()
+            self.complete(validated_data['complete_time'])
         return validated_data
 
+    def complete(self, complete_time):
+        """
+        Завершение заказа условным обновлением, счетчики курьера
+        изменяются в базе. Строка курьера блокируется, чтобы время
+        доставки считалось от предыдущего завершения этого курьера,
+        завершения у разных курьеров выполняются параллельно
+        """
+        courier_id = self.instance.courier_id
+        with transaction.atomic():
+            courier = Courier.objects.select_for_update().only(
+                'last_complete_time', 'orders_in_process',
+                'courier_type_in_delivery', 'quantity_orders'
+            ).get(courier_id=courier_id)
+            # У свободного курьера нет заказов в развозе
+            completed = courier.last_complete_time is not None
+            if completed:
+                delivery_time = (
+                    complete_time - courier.last_complete_time
+                ).seconds
+                completed = Order.objects.filter(
+                    order_id=self.instance.order_id,
+                    courier_id=courier_id,
+                    status_order=StatusOrder.IN_PROCESS
+                ).update(
+                    status_order=StatusOrder.COMPLETE,
+                    complete_time=complete_time,
+                    delivery_time=delivery_time
+                )
+            if not completed:
+                # Заказ уже завершен параллельным запросом или снят
+                # с курьера
+                if not Order.objects.filter(
+                    order_id=self.instance.order_id,
+                    courier_id=courier_id,
+                    status_order=StatusOrder.COMPLETE
+                ).exists():
+                    raise serializers.ValidationError(
+                        {'courier_id': ['Order is not assigned']}
+                    )
+                return
+            DeliveryStatistics.add_delivery(
+                courier_id, self.instance.region, delivery_time
+            )
+            courier_cache.invalidate([courier_id])
+            # Завершенный заказ был последним в развозе
+            free = courier.orders_in_process <= 1
+            if not free:
+                Courier.objects.filter(courier_id=courier_id).update(
+                    last_complete_time=complete_time,
+                    complete_order_in_delivery=F(
+                        'complete_order_in_delivery'
+                    ) + 1,
+                    current_weight_orders=F(
+                        'current_weight_orders'
+                    ) - self.instance.weight,
+                    orders_in_process=F('orders_in_process') - 1
+                )
+            else:
+                Courier.objects.filter(courier_id=courier_id).update(
+                    status_courier=StatusCourier.FREE,
+                    current_weight_orders=Decimal(0),
+                    orders_in_process=0,
+                    complete_order_in_delivery=0,
+                    last_complete_time=None,
+                    assign_time=None,
+                    courier_type_in_delivery=None
+                )
+                if courier.courier_type_in_delivery == CourierType.FOOT:
+                    counter = 'foot'
+                elif courier.courier_type_in_delivery == CourierType.BIKE:
+                    counter = 'bike'
+                else:
+                    counter = 'car'
+                QuantityOrders.objects.filter(
+                    pk=courier.quantity_orders_id
+                ).update(**{counter: F(counter) + 1})
+        if free:
+            proposal_store.refresh([courier_id])
+            courier_index.refresh([courier_id])
+
+
+class CompleteItemSerializer(serializers.Serializer):
+    """Serializer for one order complete in batch"""
+    order_id = serializers.IntegerField(min_value=1)
+    courier_id = serializers.IntegerField(min_value=1)
+    complete_time = serializers.DateTimeField()
+
+
+class OrdersCompleteBatchSerializer(serializers.Serializer):
+    """Serializer for complete many orders"""
+    data = serializers.ListField(child=serializers.JSONField())
+
+    def create(self, validated_data):
+        """
+        Завершение заказов по правилам OrdersCompleteSerializer одной
+        транзакцией. Завершения применяются по курьерам в порядке времени,
+        чтобы время доставки считалось от предыдущего завершения.
+        Возвращает результат для каждого элемента в порядке запроса
+        """
+        items = validated_data['data']
+        results = [None] * len(items)
+        completes = []
+        for number, item in enumerate(items):
+            serializer = CompleteItemSerializer(data=item)
+            if serializer.is_valid():
+                completes.append((number, serializer.validated_data))
+            else:
+                results[number] = {
+                    'order_id': item.get('order_id')
+                    if isinstance(item, dict) else None,
+                    'validation_error': serializer.errors
+                }
+        completes.sort(key=lambda complete: (
+            complete[1]['courier_id'], complete[1]['complete_time'],
+            complete[0]
+        ))
+        freed = []
+        with transaction.atomic():
+            # Курьеры блокируются раньше заказов, как при назначении
+            couriers = {
+                courier.courier_id: courier
+                for courier in Courier.objects.select_for_update().filter(
+                    courier_id__in={complete['courier_id']
+                                    for _, complete in completes}
+                ).select_related('quantity_orders').order_by('courier_id')
+            }
+            orders = {
+                order.order_id: order
+                for order in Order.objects.select_for_update().filter(
+                    order_id__in={complete['order_id']
+                                  for _, complete in completes}
+                ).order_by('order_id')
+            }
+            completed = []
+            for number, complete in completes:
+                try:
+                    if self.complete_order(orders.get(complete['order_id']),
+                                           couriers, complete):
+                        completed.append(orders[complete['order_id']])
+                except serializers.ValidationError as e:
+                    results[number] = {
+                        'order_id': complete['order_id'],
+                        'validation_error': e.detail
+                    }
+                    continue
+                results[number] = {
+                    'order_id': complete['order_id']
+                }
+            changed = {order.courier_id for order in completed}
+            deliveries = {}
+            for order in completed:
+                delivery_time, count = deliveries.get(
+                    (order.courier_id, order.region), (0, 0)
+                )
+                deliveries[order.courier_id, order.region] = (
+                    delivery_time + order.delivery_time, count + 1
+                )
+            for courier_id in changed:
+                if couriers[courier_id].status_courier == StatusCourier.FREE:
+                    freed.append(courier_id)
+            Order.objects.bulk_update(completed, [
+                'status_order', 'complete_time', 'delivery_time'
+            ])
+            Courier.objects.bulk_update(
+                [couriers[courier_id] for courier_id in changed], [
+                    'last_complete_time', 'complete_order_in_delivery',
+                    'current_weight_orders', 'orders_in_process',
+                    'status_courier', 'assign_time',
+                    'courier_type_in_delivery'
+                ]
+            )
+            QuantityOrders.objects.bulk_update(
+                [couriers[courier_id].quantity_orders
+                 for courier_id in freed],
+                ['foot', 'bike', 'car']
+            )
+            if deliveries:
+                DeliveryStatistics.add_deliveries(deliveries)
+            courier_cache.invalidate(changed)
+        proposal_store.refresh(freed)
+        courier_index.refresh(freed)
+        return results
+
+    @staticmethod
+    def complete_order(order, couriers, complete):
+        """
+        Завершение заказа в памяти с изменением курьера.
+        Возвращает False, если заказ уже был завершен
+        """
+        if order is None:
+            raise serializers.ValidationError(
+                {'order_id': [ErrorMessage.INSTANCE_NOT_FOUND]}
+            )
+        if not order.courier_id:
+            raise serializers.ValidationError(
+                {'courier_id': ['Order is not assigned']}
+            )
+        if order.courier_id != complete['courier_id']:
+            raise serializers.ValidationError(
+                {'courier_id': ['Order is assigned to a different courier']}
+            )
+        if order.assign_time \
+                and complete['complete_time'] < order.assign_time:
+            raise serializers.ValidationError(
+                {'complete_time': ['Complete time is less than assign time']}
+            )
+        if order.status_order != StatusOrder.IN_PROCESS:
+            return False
+        courier = couriers[order.courier_id]
+        order.status_order = StatusOrder.COMPLETE
+        order.complete_time = complete['complete_time']
+        order.delivery_time = (
+            complete['complete_time'] - courier.last_complete_time
+        ).seconds
+        courier.last_complete_time = complete['complete_time']
+        courier.complete_order_in_delivery += 1
+        courier.current_weight_orders -= order.weight
+        courier.orders_in_process -= 1
+        if not courier.orders_in_process:
+            courier.status_courier = StatusCourier.FREE
+            courier.current_weight_orders = Decimal(0)
+            courier.complete_order_in_delivery = 0
+            courier.last_complete_time = None
+            courier.assign_time = None
+            if courier.courier_type_in_delivery == CourierType.FOOT:
+                courier.quantity_orders.foot += 1
+            elif courier.courier_type_in_delivery == CourierType.BIKE:
+                courier.quantity_orders.bike += 1
+            else:
+                courier.quantity_orders.car += 1
+            courier.courier_type_in_delivery = None
+        return True
+
 
 class CouriersGetSerializer(serializers.ModelSerializer):
     """Serializer for get information about courier"""
@@ -426,29 +1112,53 @@ class CouriersGetSerializer(serializers.ModelSerializer):
         fields = ('data', 'courier_id', 'courier_type',
                   'regions', 'working_hours',)
 
+    @staticmethod
+    def get_queryset():
+        """
+        Курьеры для ответа: количество развозов, районы и минимальное
+        среднее время доставки читаются одним запросом с курьером,
+        время работы - вторым
+        """
+        return Courier.objects.select_related('quantity_orders').annotate(
+            min_of_average=Subquery(
+                DeliveryStatistics.objects.filter(
+                    courier_id=OuterRef('courier_id')
+                ).order_by().values('courier_id').annotate(
+                    min_of_average=DeliveryStatistics.get_min_average()
+                ).values('min_of_average')
+            ),
+            regions_list=Subquery(
+                Regions.objects.filter(
+                    courier_id=OuterRef('courier_id')
+                ).order_by().values('courier_id').annotate(
+                    regions=ArrayAgg('region', ordering='id')
+                ).values('regions')
+            )
+        ).prefetch_related('workinghours_set')
+
     def get_data(self, instance):
         statistics = {}
-        if instance.quantity_orders.foot != 0 \
-                or instance.quantity_orders.bike != 0 \
-                or instance.quantity_orders.car != 0:
-            statistics['rating'] = Courier.get_rating(self.instance.courier_id)
+        quantity_orders = instance.quantity_orders
+        if quantity_orders.foot != 0 \
+                or quantity_orders.bike != 0 \
+                or quantity_orders.car != 0:
+            statistics['rating'] = Courier.get_rating_by_average(
+                instance.min_of_average
+            )
             statistics['earnings'] = Courier.get_earnings(
-                self.instance.quantity_orders.foot,
-                self.instance.quantity_orders.bike,
-                self.instance.quantity_orders.car
+                quantity_orders.foot,
+                quantity_orders.bike,
+                quantity_orders.car
             )
         else:
             statistics['earnings'] = 0
         return statistics
 
-    def get_working_hours(self, data):
-        for hours in WorkingHours.objects.filter(
-                courier_id=self.instance.courier_id
-        ):
-            yield str(hours)
+    def get_working_hours(self, instance):
+        return [str(hours) for hours in instance.workinghours_set.all()]
 
-    def get_regions(self, data):
-        return Regions.get_regions(self.instance.courier_id)
+    def get_regions(self, instance):
+        return instance.regions_list or []
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
@@ -457,3 +1167,13 @@ class CouriersGetSerializer(serializers.ModelSerializer):
         representation.pop('data')
         response.update(representation)
         return response
+
+
+class JobGetSerializer(serializers.ModelSerializer):
+    """Serializer for get information about job"""
+    job_id = serializers.IntegerField(source='id')
+    status = serializers.CharField(source='status_job')
+
+    class Meta:
+        model = Job
+        fields = ('job_id', 'status', 'total', 'processed', 'result',)
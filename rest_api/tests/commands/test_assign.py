@@ -0,0 +1,44 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from rest_api.const import StatusOrder
+from rest_api.models import Order
+
+
+class AssignTestCase(TestCase):
+    def setUp(self):
+        """Инициализация данных"""
+        with open('rest_api/tests/orders/good_orders.json', 'r',
+                  encoding='utf-8') as file:
+            self.client.post(
+                '/orders',
+                data=json.load(file),
+                content_type='application/json'
+            )
+        with open('rest_api/tests/couriers/good_couriers.json', 'r',
+                  encoding='utf-8') as file:
+            self.client.post(
+                '/couriers',
+                data=json.load(file),
+                content_type='application/json'
+            )
+
+    def test_assign_free(self):
+        """Назначение заказов всем свободным курьерам"""
+        out = StringIO()
+        call_command('assign_orders', '--free', stdout=out)
+        self.assertIn('Courier 1: ', out.getvalue())
+        self.assertIn('Courier 2: no orders', out.getvalue())
+        self.assertIn('Assigned orders: 7', out.getvalue())
+        self.assertEqual(Order.objects.filter(
+            status_order=StatusOrder.IN_PROCESS
+        ).count(), 7)
+
+    def test_wrong_courier_id(self):
+        """Назначение заказов несуществующему курьеру"""
+        with self.assertRaisesMessage(CommandError, 'Wrong couriers: 100'):
+            call_command('assign_orders', '1', '100', stdout=StringIO())
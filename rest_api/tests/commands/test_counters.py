@@ -0,0 +1,93 @@
+import json
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from rest_api.const import StatusCourier
+from rest_api.models import Courier
+
+
+class CourierCountersTestCase(TestCase):
+    def setUp(self):
+        """Инициализация данных, заказы назначены свободным курьерам"""
+        with open('rest_api/tests/orders/good_orders.json', 'r',
+                  encoding='utf-8') as file:
+            self.client.post(
+                '/orders',
+                data=json.load(file),
+                content_type='application/json'
+            )
+        with open('rest_api/tests/couriers/good_couriers.json', 'r',
+                  encoding='utf-8') as file:
+            self.client.post(
+                '/couriers',
+                data=json.load(file),
+                content_type='application/json'
+            )
+        for courier_id in (1, 6, 8):
+            self.client.post(
+                '/orders/assign',
+                data={'courier_id': courier_id},
+                content_type='application/json'
+            )
+
+    def test_consistent_counters(self):
+        """Назначение заказов поддерживает счетчики развоза"""
+        out = StringIO()
+        call_command('rebuild_courier_counters', '--check', stdout=out)
+        self.assertIn('Rebuilt couriers: 0', out.getvalue())
+        courier = Courier.objects.get(courier_id=1)
+        self.assertEqual(courier.orders_in_process, 2)
+        self.assertEqual(courier.current_weight_orders, Decimal('1.02'))
+
+    def test_rebuild(self):
+        """Неверные счетчики находятся проверкой и пересчитываются"""
+        Courier.objects.filter(courier_id=1).update(orders_in_process=5)
+        Courier.objects.filter(courier_id=2).update(
+            current_weight_orders=Decimal(3)
+        )
+        with self.assertRaisesMessage(
+            CommandError, 'Wrong counters for couriers: 1, 2'
+        ):
+            call_command('rebuild_courier_counters', '--check',
+                         stdout=StringIO())
+        out = StringIO()
+        call_command('rebuild_courier_counters', stdout=out)
+        self.assertIn('Rebuilt couriers: 2', out.getvalue())
+        courier = Courier.objects.get(courier_id=1)
+        self.assertEqual(courier.orders_in_process, 2)
+        self.assertEqual(
+            Courier.objects.get(courier_id=2).current_weight_orders,
+            Decimal(0)
+        )
+        call_command('rebuild_courier_counters', '--check',
+                     stdout=StringIO())
+
+    def test_complete_and_release(self):
+        """Завершение и снятие заказов с курьера уменьшают счетчики"""
+        courier = Courier.objects.get(courier_id=1)
+        self.client.post(
+            '/orders/complete',
+            data={
+                'courier_id': 1,
+                'order_id': 3,
+                'complete_time': courier.assign_time.isoformat()
+            },
+            content_type='application/json'
+        )
+        self.assertEqual(
+            Courier.objects.get(courier_id=1).orders_in_process, 1
+        )
+        self.client.patch(
+            '/couriers/1',
+            data={'regions': [1]},
+            content_type='application/json'
+        )
+        courier = Courier.objects.get(courier_id=1)
+        self.assertEqual(courier.orders_in_process, 0)
+        self.assertEqual(courier.status_courier, StatusCourier.FREE)
+        call_command('rebuild_courier_counters', '--check',
+                     stdout=StringIO())
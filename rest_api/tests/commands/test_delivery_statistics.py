@@ -0,0 +1,174 @@
+import json
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Avg, Min
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from rest_api.const import StatusOrder
+from rest_api.models import Courier, DeliveryStatistics, Order
+
+
+class DeliveryStatisticsMixin:
+    def setUp(self):
+        """Инициализация данных, заказы назначены свободным курьерам"""
+        with open('rest_api/tests/orders/good_orders.json', 'r',
+                  encoding='utf-8') as file:
+            self.client.post(
+                '/orders',
+                data=json.load(file),
+                content_type='application/json'
+            )
+        with open('rest_api/tests/couriers/good_couriers.json', 'r',
+                  encoding='utf-8') as file:
+            self.client.post(
+                '/couriers',
+                data=json.load(file),
+                content_type='application/json'
+            )
+        for courier_id in (1, 7):
+            self.client.post(
+                '/orders/assign',
+                data={'courier_id': courier_id},
+                content_type='application/json'
+            )
+
+    def get_time(self, courier_id, seconds):
+        """Время через seconds секунд после назначения заказов курьеру"""
+        return (Courier.objects.get(courier_id=courier_id).assign_time
+                + timedelta(seconds=seconds)).isoformat()
+
+    def complete(self):
+        """Завершение заказов одиночными и пакетными запросами"""
+        self.complete_single()
+        self.complete_batch()
+
+    def complete_single(self):
+        self.client.post(
+            '/orders/complete',
+            data={
+                'courier_id': 1,
+                'order_id': 3,
+                'complete_time': self.get_time(1, 601)
+            },
+            content_type='application/json'
+        )
+
+    def complete_batch(self):
+        self.client.post(
+            '/orders/complete/batch',
+            data={
+                'data': [
+                    {
+                        'courier_id': 1,
+                        'order_id': 5,
+                        'complete_time': self.get_time(1, 1001)
+                    },
+                    {
+                        'courier_id': 7,
+                        'order_id': 7,
+                        'complete_time': self.get_time(7, 333)
+                    },
+                    {
+                        'courier_id': 7,
+                        'order_id': 6,
+                        'complete_time': self.get_time(7, 1000)
+                    },
+                ]
+            },
+            content_type='application/json'
+        )
+
+    @staticmethod
+    def get_orders_rating(courier_id):
+        """Рейтинг по средним временам доставки заказов курьера"""
+        min_of_average = Decimal(Order.objects.filter(
+            courier_id=courier_id,
+            status_order=StatusOrder.COMPLETE
+        ).values('region').annotate(
+            Avg('delivery_time')
+        ).aggregate(Min('delivery_time__avg'))['delivery_time__avg__min'])
+        return Decimal(
+            (60 * 60 - min(min_of_average, 60 * 60)) / (60 * 60) * 5
+        ).quantize(Decimal('1.11'))
+
+    def assertRatings(self):
+        for courier_id in (1, 7):
+            self.assertEqual(Courier.get_rating(courier_id),
+                             self.get_orders_rating(courier_id))
+
+    def assertStatistics(self):
+        self.assertEqual(
+            set(DeliveryStatistics.objects.values_list(
+                'courier_id', 'delivery_time_sum', 'delivery_count'
+            )),
+            {(1, 1001, 2), (7, 333, 1), (7, 667, 1)}
+        )
+        self.assertRatings()
+
+
+class DeliveryStatisticsTestCase(DeliveryStatisticsMixin, TestCase):
+    def test_complete(self):
+        """Завершения накапливают статистику, рейтинг не меняется"""
+        self.complete()
+        self.assertStatistics()
+        self.assertEqual(Courier.get_rating(1), Decimal('4.30'))
+
+    def test_rebuild(self):
+        """Статистика пересчитывается из завершенных заказов"""
+        self.complete()
+        DeliveryStatistics.objects.filter(courier_id=1).delete()
+        DeliveryStatistics.objects.update(delivery_count=10)
+        out = StringIO()
+        call_command('rebuild_delivery_statistics', stdout=out)
+        self.assertIn('Rebuilt statistics: 3', out.getvalue())
+        self.assertRatings()
+
+
+@override_settings(JOBS_WORKERS=0)
+class DeliveryStatisticsRebuildTestCase(DeliveryStatisticsMixin,
+                                        TransactionTestCase):
+    def test_rebuild_before_write(self):
+        """
+        Пересчет статистики, запущенный в другом соединении после
+        завершения заказов и до записи статистики пакетным завершением,
+        дожидается завершения без взаимной блокировки и не теряет доставки
+        """
+        self.complete_single()
+        rebuilt = []
+
+        errors = []
+
+        def rebuild():
+            try:
+                call_command('rebuild_delivery_statistics',
+                             stdout=StringIO())
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        def execute(execute, sql, params, many, context):
+            if not rebuilt and 'rest_api_deliverystatistics' in sql \
+                    and sql.lstrip().startswith(('INSERT', 'UPDATE')):
+                rebuilt.append(sql)
+                threads.append(threading.Thread(target=rebuild))
+                threads[0].start()
+                # Пересчет успевает дойти до блокировок
+                threads[0].join(1)
+            return execute(sql, params, many, context)
+
+        threads = []
+        with connection.execute_wrapper(execute):
+            self.complete_batch()
+        threads[0].join()
+        self.assertTrue(rebuilt)
+        self.assertEqual(errors, [])
+        self.assertEqual(Order.objects.filter(
+            status_order=StatusOrder.COMPLETE
+        ).count(), 4)
+        self.assertStatistics()
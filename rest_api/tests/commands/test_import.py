@@ -0,0 +1,179 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from rest_api.management.commands._base import BaseImportCommand
+from rest_api.models import Courier, Order, DeliveryHours, WorkingHours, \
+    Regions
+
+
+class ImportTestCase(TestCase):
+    def call_import(self, command, items):
+        """Загрузка объектов командой из временного файла"""
+        file = tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False)
+        self.addCleanup(os.remove, file.name)
+        with file:
+            for item in items:
+                file.write(json.dumps(item) + '\n')
+        out = StringIO()
+        call_command(command, file.name, stdout=out)
+        return out.getvalue()
+
+    def test_import_orders(self):
+        """Загрузка заказов, проверка сохранения заказов и времени доставки"""
+        with open('rest_api/tests/orders/good_orders.json', 'r',
+                  encoding='utf-8') as file:
+            orders = json.load(file)['data']
+        out = self.call_import('import_orders', orders)
+        self.assertIn('Imported orders: 11', out)
+        self.assertNotIn('Rejected', out)
+        self.assertEqual(Order.objects.count(), 11)
+        self.assertEqual(DeliveryHours.objects.count(), 11)
+        order = Order.objects.get(order_id=3)
+        self.assertEqual(str(order.weight), '0.01')
+        self.assertEqual(order.status_order, 'N')
+
+    def test_import_orders_rejected(self):
+        """
+        Загрузка заказов с невалидными и повторяющимися order_id,
+        проверка отчета об отклоненных заказах
+        """
+        self.call_import('import_orders', [{
+            "order_id": 1,
+            "weight": 1,
+            "region": 1,
+            "delivery_hours": ["09:00-18:00"]
+        }])
+        out = self.call_import('import_orders', [
+            {
+                "order_id": 1,
+                "weight": 2,
+                "region": 1,
+                "delivery_hours": ["09:00-18:00"]
+            },
+            {
+                "order_id": 2,
+                "weight": 50.1,
+                "region": 1,
+                "delivery_hours": ["09:00-18:00"]
+            },
+            {
+                "order_id": 3,
+                "weight": 3,
+                "region": 1,
+                "delivery_hours": ["09:00-25:00"]
+            },
+            {
+                "order_id": 4,
+                "weight": 4,
+                "region": 2,
+                "delivery_hours": ["10:00-11:00", "12:00-13:00"]
+            },
+            {
+                "order_id": 4,
+                "weight": 5,
+                "region": 3,
+                "delivery_hours": ["10:00-11:00"]
+            },
+        ])
+        self.assertIn('Imported orders: 1', out)
+        self.assertIn('Rejected orders: 2, 3, 1, 4', out)
+        self.assertEqual(Order.objects.get(order_id=1).weight, 1)
+        self.assertEqual(Order.objects.get(order_id=4).region, 2)
+        self.assertEqual(
+            DeliveryHours.objects.filter(order_id=4).count(), 2
+        )
+
+    def test_import_couriers(self):
+        """
+        Загрузка курьеров, проверка сохранения графика работы, районов
+        и назначения заказов загруженному курьеру
+        """
+        with open('rest_api/tests/couriers/good_couriers.json', 'r',
+                  encoding='utf-8') as file:
+            couriers = json.load(file)['data']
+        out = self.call_import('import_couriers', couriers + [{
+            "courier_id": 1,
+            "courier_type": "bus",
+            "regions": [1],
+            "working_hours": ["09:00-18:00"]
+        }])
+        self.assertIn('Imported couriers: 8', out)
+        self.assertIn('Rejected couriers: 1', out)
+        self.assertEqual(Courier.objects.count(), 8)
+        courier = Courier.objects.get(courier_id=1)
+        self.assertEqual(courier.lifting_capacity, 10)
+        self.assertEqual(courier.status_courier, 'F')
+        self.assertEqual(Regions.get_regions(1), [1, 12, 22])
+        self.assertEqual(len(WorkingHours.get_working_hours(1)), 2)
+        with open('rest_api/tests/orders/good_orders.json', 'r',
+                  encoding='utf-8') as file:
+            self.call_import('import_orders', json.load(file)['data'])
+        response = self.client.post(
+            '/orders/assign',
+            data={"courier_id": 1},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        response_orders = [{"id": 3}, {"id": 5}]
+        response = sorted(response.data['orders'], key=lambda dct: dct['id'])
+        self.assertEqual(response, response_orders)
+
+    def test_base_command(self):
+        """Команда загрузки без чтения строк объектов не создается"""
+        with self.assertRaises(TypeError):
+            BaseImportCommand()
+
+    def write_file(self, suffix, content):
+        """Временный файл с содержимым"""
+        file = tempfile.NamedTemporaryFile('wb', suffix=suffix, delete=False)
+        self.addCleanup(os.remove, file.name)
+        with file:
+            file.write(content)
+        return file.name
+
+    def test_missing_file(self):
+        """Отсутствующий файл возвращает ошибку команды"""
+        with self.assertRaisesMessage(CommandError, 'No such file'):
+            call_command('import_orders', '/nonexistent.jsonl',
+                         stdout=StringIO())
+
+    def test_malformed_file(self):
+        """
+        Файл .json не в формате API и файл не в UTF-8 возвращают ошибку
+        команды, объекты не загружаются
+        """
+        for suffix, content in (
+            ('.json', b'{"data": [1,'),
+            ('.json', b'[{"order_id": 1}]'),
+            ('.json', b'{"orders": []}'),
+            ('.json', b'{"data": 1}'),
+            ('.jsonl', b'\xff\xfe\n'),
+        ):
+            with self.subTest(suffix=suffix, content=content):
+                with self.assertRaisesMessage(CommandError,
+                                              'Wrong format of file'):
+                    call_command('import_orders',
+                                 self.write_file(suffix, content),
+                                 stdout=StringIO())
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_not_dict_items(self):
+        """Объекты не словари отклоняются по номеру строки"""
+        out = StringIO()
+        call_command('import_orders', self.write_file(
+            '.json', b'{"data": [1, "order", [2], null]}'
+        ), stdout=out)
+        self.assertIn('Imported orders: 0', out.getvalue())
+        self.assertIn('Rejected orders: line 1, line 2, line 3, line 4',
+                      out.getvalue())
+        out = StringIO()
+        call_command('import_couriers', self.write_file(
+            '.jsonl', b'1\n[2]\n{"courier_id"\n'
+        ), stdout=out)
+        self.assertIn('Rejected couriers: line 1, line 2, line 3',
+                      out.getvalue())
@@ -0,0 +1,96 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from rest_api.const import StatusJob
+from rest_api.models import Job, Order
+from rest_api.serializer import OrderCreateSerializer
+
+
+@override_settings(JOBS_STALE_TIME=60)
+class ProcessJobsTestCase(TestCase):
+    def setUp(self):
+        """Задачи загрузки заказов, оставшиеся после перезапуска процесса"""
+        with open('rest_api/tests/orders/good_orders.json', 'r',
+                  encoding='utf-8') as file:
+            self.orders = json.load(file)
+
+    def create_job(self, **fields):
+        return Job.objects.create(
+            data=self.orders, total=len(self.orders['data']), **fields
+        )
+
+    def process_jobs(self):
+        out = StringIO()
+        with mock.patch('rest_api.jobs.JOB_CHUNK_SIZE', 4):
+            call_command('process_jobs', '--once', stdout=out)
+        return out.getvalue()
+
+    def assertComplete(self, job):
+        job.refresh_from_db()
+        self.assertEqual(job.status_job, StatusJob.COMPLETE)
+        self.assertEqual(job.processed, 11)
+        self.assertEqual(
+            job.result,
+            {'orders': [{'id': order_id} for order_id in range(1, 12)]}
+        )
+        self.assertIsNone(job.data)
+        self.assertEqual(Order.objects.count(), 11)
+
+    def test_queued_job(self):
+        """Задача в очереди, не запущенная до перезапуска, выполняется"""
+        job = self.create_job()
+        self.assertIn('Processed jobs: 1', self.process_jobs())
+        self.assertComplete(job)
+
+    def test_interrupted_job(self):
+        """
+        Задача, прерванная после сохранения первой порции, продолжается
+        со следующей порции
+        """
+        serializer = OrderCreateSerializer(
+            data={'data': self.orders['data'][:4]}
+        )
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+        job = self.create_job(
+            status_job=StatusJob.RUNNING, processed=4,
+            update_time=timezone.now() - timedelta(minutes=5)
+        )
+        self.assertIn('Processed jobs: 1', self.process_jobs())
+        self.assertComplete(job)
+
+    def test_running_job(self):
+        """Задачу, которая обновлялась недавно, выполняет ее обработчик"""
+        job = self.create_job(status_job=StatusJob.RUNNING,
+                              update_time=timezone.now())
+        self.assertIn('Processed jobs: 0', self.process_jobs())
+        job.refresh_from_db()
+        self.assertEqual(job.status_job, StatusJob.RUNNING)
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_progress(self):
+        """processed увеличивается после сохранения каждой порции"""
+        job = self.create_job()
+        create = OrderCreateSerializer.create
+        progress = []
+
+        def create_chunk(serializer, validated_data):
+            progress.append(Job.objects.get(pk=job.pk).processed)
+            if len(progress) == 3:
+                raise RuntimeError
+            return create(serializer, validated_data)
+        with mock.patch.object(OrderCreateSerializer, 'create',
+                               create_chunk), \
+                self.assertLogs('rest_api.jobs', 'ERROR'):
+            self.process_jobs()
+        self.assertEqual(progress, [4, 8, 11])
+        job.refresh_from_db()
+        self.assertEqual(job.status_job, StatusJob.FAILED)
+        self.assertEqual(job.processed, 8)
+        self.assertEqual(Order.objects.count(), 8)
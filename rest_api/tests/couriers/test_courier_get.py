@@ -2,6 +2,9 @@ import json
 
 from django.test import TestCase
 
+from rest_api.models import Courier
+from rest_api.tests.utils import CaptureAppQueries
+
 
 class CouriersGetTestCase(TestCase):
     def setUp(self):
@@ -122,3 +125,30 @@ class CouriersGetTestCase(TestCase):
         self.assertContains(response, 'earnings')
         self.assertContains(response, 'rating')
         self.assertEqual(response.data['earnings'], 1000)
+
+    def test_queries_count(self):
+        """
+        Курьер, количество развозов, время работы, районы и рейтинг
+        читаются не больше чем двумя запросами к базе
+        """
+        self.client.post(
+            '/orders/complete',
+            data={
+                "courier_id": self.courier,
+                "order_id": 5,
+                "complete_time": "2121-03-17T09:53:11.649422Z"
+            },
+            content_type='application/json'
+        )
+        with CaptureAppQueries() as queries:
+            response = self.client.get(
+                f'/couriers/{self.courier}',
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), 2)
+        self.assertEqual(response.data['rating'],
+                         Courier.get_rating(self.courier))
+        self.assertEqual(response.data['regions'], [1, 12, 22])
+        self.assertEqual(response.data['working_hours'],
+                         ['11:35-14:05', '09:00-11:00'])
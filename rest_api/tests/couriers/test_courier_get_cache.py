@@ -0,0 +1,175 @@
+import json
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase, TransactionTestCase, \
+    override_settings
+
+from rest_api.checks import check_courier_cache
+from rest_api.courier_cache import courier_cache
+from rest_api.models import Courier, DeliveryStatistics
+from rest_api.tests.utils import CaptureAppQueries
+
+
+@override_settings(COURIER_CACHE=True, JOBS_WORKERS=0)
+class CourierGetCacheTestCase(TransactionTestCase):
+    def setUp(self):
+        """
+        Инициализация данных, версии курьеров увеличиваются после фиксации
+        транзакции, поэтому тесты выполняются без общей транзакции
+        """
+        courier_cache.reset()
+        caches['default'].clear()
+        with open('rest_api/tests/orders/good_orders.json', 'r',
+                  encoding='utf-8') as file:
+            self.client.post(
+                '/orders',
+                data=json.load(file),
+                content_type='application/json'
+            )
+        with open('rest_api/tests/couriers/good_couriers.json', 'r',
+                  encoding='utf-8') as file:
+            self.client.post(
+                '/couriers',
+                data=json.load(file),
+                content_type='application/json'
+            )
+        self.client.post(
+            '/orders/assign',
+            data={'courier_id': 1},
+            content_type='application/json'
+        )
+
+    def tearDown(self):
+        courier_cache.reset()
+        caches['default'].clear()
+
+    def get(self, courier_id):
+        """Информация о курьере: (ответ, количество запросов к базе)"""
+        with CaptureAppQueries() as queries:
+            response = self.client.get(f'/couriers/{courier_id}')
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def complete(self, order_id):
+        response = self.client.post(
+            '/orders/complete',
+            data={
+                'courier_id': 1,
+                'order_id': order_id,
+                'complete_time': "2121-03-17T09:53:11.649422Z"
+            },
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_hit_without_queries(self):
+        """Повторный запрос курьера возвращается без запросов к базе"""
+        data, queries = self.get(1)
+        self.assertGreater(queries, 0)
+        cached, queries = self.get(1)
+        self.assertEqual(queries, 0)
+        self.assertEqual(cached, data)
+        self.assertEqual(cached['working_hours'],
+                         ['11:35-14:05', '09:00-11:00'])
+        response = self.client.get('/couriers/100')
+        self.assertEqual(response.status_code, 400)
+        info = self.client.get('/metrics').data['courier_cache']
+        self.assertEqual(info['hits'], 1)
+        self.assertEqual(info['misses'], 2)
+        self.assertAlmostEqual(info['hit_ratio'], 1 / 3)
+
+    def test_invalidation(self):
+        """Изменение курьера, назначение и завершение сбрасывают ответ"""
+        invalidations = courier_cache.invalidations
+        self.assertEqual(self.get(1)[0]['earnings'], 0)
+        self.complete(3)
+        self.complete(5)
+        data, queries = self.get(1)
+        self.assertGreater(queries, 0)
+        self.assertEqual(data['earnings'], 1000)
+        self.assertIn('rating', data)
+        self.client.patch(
+            '/couriers/1',
+            data={'courier_type': 'car'},
+            content_type='application/json'
+        )
+        self.assertEqual(self.get(1)[0]['courier_type'], 'car')
+        self.get(7)
+        self.client.post(
+            '/orders/assign',
+            data={'courier_id': 7},
+            content_type='application/json'
+        )
+        self.assertGreater(self.get(7)[1], 0)
+        self.assertEqual(courier_cache.invalidations, invalidations + 4)
+
+    @override_settings(COURIER_CACHE_SIZE=1)
+    def test_size(self):
+        """
+        Из кэша процесса вытесняется давно запрошенный курьер,
+        его ответ читается из общего кэша
+        """
+        self.get(1)
+        self.get(2)
+        self.assertEqual(list(courier_cache.entries), [2])
+        self.assertEqual(self.get(1)[1], 0)
+        self.assertEqual(list(courier_cache.entries), [1])
+
+    def test_shared_backend(self):
+        """
+        Ответы и версии из общего кэша видны другим процессам,
+        изменение в другом процессе сбрасывает ответ процесса
+        """
+        data, _ = self.get(1)
+        courier_cache.reset()
+        cached, queries = self.get(1)
+        self.assertEqual(queries, 0)
+        self.assertEqual(cached, data)
+        self.assertEqual(courier_cache.hits, 1)
+        caches['default'].set('courier:1:version', 1)
+        self.assertGreater(self.get(1)[1], 0)
+
+    @override_settings(COURIER_CACHE_TTL=-1)
+    def test_ttl(self):
+        """Устаревший ответ читается из базы"""
+        self.get(1)
+        self.assertGreater(self.get(1)[1], 0)
+        self.assertEqual(courier_cache.hits, 0)
+
+    def test_commands(self):
+        """Команды пересчета сбрасывают ответы курьеров"""
+        self.get(1)
+        self.get(2)
+        Courier.objects.filter(courier_id=1).update(orders_in_process=0)
+        DeliveryStatistics.objects.create(
+            courier_id=2, region=1, delivery_time_sum=1800, delivery_count=1
+        )
+        call_command('rebuild_courier_counters', stdout=StringIO())
+        self.assertGreater(self.get(1)[1], 0)
+        self.assertEqual(self.get(2)[1], 0)
+        call_command('rebuild_delivery_statistics', stdout=StringIO())
+        data, queries = self.get(2)
+        self.assertGreater(queries, 0)
+        self.assertNotIn('rating', data)
+
+
+class CourierCacheCheckTestCase(SimpleTestCase):
+    def test_local_backend(self):
+        """Кэш ответов не включается с кэшем в памяти процесса"""
+        self.assertEqual(check_courier_cache(None), [])
+        with override_settings(COURIER_CACHE=True):
+            errors = check_courier_cache(None)
+            self.assertEqual([error.id for error in errors],
+                             ['rest_api.E001'])
+        with override_settings(COURIER_CACHE=True,
+                               COURIER_CACHE_BACKEND='courier'):
+            errors = check_courier_cache(None)
+            self.assertEqual([error.id for error in errors],
+                             ['rest_api.E001'])
+        with override_settings(COURIER_CACHE=True, CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'cache',
+        }}):
+            self.assertEqual(check_courier_cache(None), [])
@@ -2,6 +2,9 @@ import json
 
 from django.test import TestCase
 
+from rest_api.const import ErrorMessage
+from rest_api.models import WorkingHours
+
 
 class CouriersPatchTestCase(TestCase):
     def setUp(self):
@@ -109,6 +112,37 @@ class CouriersPatchTestCase(TestCase):
         )
         self.assertEqual(response.status_code, 400)
 
+    def test_wrong_hours(self):
+        """
+        Запрос на изменение с периодом из одного времени, из трех времен,
+        не строкой и за пределами суток, проверка статуса 400
+        и сохраненного времени работы
+        """
+        for working_hours, error in (
+            (["09:00"], ErrorMessage.WRONG_HOURS),
+            (["09:00-10:00-11:00"], ErrorMessage.WRONG_HOURS),
+            ([900], ErrorMessage.WRONG_HOURS),
+            (["09:00-24:30"], None),
+        ):
+            with self.subTest(working_hours=working_hours):
+                response = self.client.patch(
+                    '/couriers/1',
+                    data={"working_hours": working_hours},
+                    content_type='application/json'
+                )
+                self.assertEqual(response.status_code, 400)
+                if error:
+                    self.assertEqual(
+                        response.data['working_hours'][0]['non_field_errors'],
+                        [error]
+                    )
+                self.assertEqual(
+                    sorted(map(str, WorkingHours.objects.filter(
+                        courier_id=1
+                    ))),
+                    ['09:00-11:00', '11:35-14:05']
+                )
+
     def test_negative_region(self):
         """Запрос на изменение с отрицательным районом, проверка статуса 400"""
         courier = {
@@ -252,3 +252,39 @@ class CouriersPostTestCase(TestCase):
             }
         }
         self.assertEqual(response.data, response_data)
+
+    def test_duplicate_id_in_data(self):
+        """
+        Загрузка данных с повторяющимся courier_id внутри запроса,
+        проверка статуса 400
+        """
+        couriers = {
+            "data": [
+                {
+                    "courier_id": 1,
+                    "courier_type": "foot",
+                    "regions": [1, 12, 22],
+                    "working_hours": ["11:35-14:05", "09:00-11:00"]
+                },
+                {
+                    "courier_id": 1,
+                    "courier_type": "car",
+                    "regions": [3],
+                    "working_hours": ["09:00-18:00"]
+                }
+            ]
+        }
+        response = self.client.post(
+            '/couriers',
+            data=couriers,
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        response_data = {
+            'validation_error': {
+                "couriers": [
+                    {"id": 1}
+                ]
+            }
+        }
+        self.assertEqual(response.data, response_data)
@@ -2,6 +2,10 @@ import json
 
 from django.test import TestCase
 
+from rest_api.const import StatusOrder
+from rest_api.models import Order
+from rest_api.tests.utils import CaptureAppQueries
+
 
 class OrdersAssignTestCase(TestCase):
     def setUp(self):
@@ -218,3 +222,80 @@ class OrdersAssignTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         response_orders = [{'id': 11}]
         self.assertEqual(response.data['orders'], response_orders)
+
+    def test_adjacent_time(self):
+        """
+        Обращение к обработчику, промежутки, которые только касаются
+        времени работы курьера, не пересекаются, проверка статуса 200
+        """
+        orders = {
+            "data": [
+                {
+                    "order_id": 100,
+                    "weight": 1,
+                    "region": 13,
+                    "delivery_hours": ["18:00-19:00", "08:00-09:00"]
+                },
+                {
+                    "order_id": 101,
+                    "weight": 1,
+                    "region": 13,
+                    "delivery_hours": ["17:59-19:00"]
+                }
+            ]
+        }
+        self.client.post(
+            '/orders',
+            data=orders,
+            content_type='application/json'
+        )
+        response = self.client.post(
+            '/orders/assign',
+            data={'courier_id': 4},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['orders'], [{'id': 101}])
+
+    def assign_queries(self, courier_id):
+        """Количество запросов к базе для назначения заказов курьеру"""
+        with CaptureAppQueries() as queries:
+            response = self.client.post(
+                '/orders/assign',
+                data={'courier_id': courier_id},
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_queries_count(self):
+        """
+        Обращение к обработчику, количество запросов к базе
+        не зависит от количества заказов в районах курьера
+        """
+        _, small_backlog_queries = self.assign_queries(1)
+        orders = {
+            "data": [
+                {
+                    "order_id": order_id,
+                    "weight": 0.01,
+                    "region": 33,
+                    "delivery_hours": [
+                        "09:00-10:00" if order_id % 2 else "22:00-23:00"
+                    ]
+                } for order_id in range(100, 600)
+            ]
+        }
+        self.client.post(
+            '/orders',
+            data=orders,
+            content_type='application/json'
+        )
+        response, large_backlog_queries = self.assign_queries(3)
+        assigned = {order['id'] for order in response.data['orders']}
+        self.assertTrue(set(range(101, 600, 2)) <= assigned)
+        self.assertEqual(Order.objects.filter(
+            order_id__in=assigned, courier_id=3,
+            status_order=StatusOrder.IN_PROCESS
+        ).count(), len(assigned))
+        self.assertLessEqual(large_backlog_queries, small_backlog_queries)
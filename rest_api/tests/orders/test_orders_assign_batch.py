@@ -0,0 +1,142 @@
+import json
+
+from django.test import TestCase
+
+from rest_api.const import StatusCourier, StatusOrder
+from rest_api.models import Courier, Order
+from rest_api.tests.utils import CaptureAppQueries
+
+
+class OrdersAssignBatchTestCase(TestCase):
+    def setUp(self):
+        """Инициализация данных"""
+        with open('rest_api/tests/orders/good_orders.json', 'r',
+                  encoding='utf-8') as file:
+            self.orders = json.load(file)
+        self.client.post(
+            '/orders',
+            data=self.orders,
+            content_type='application/json'
+        )
+        with open('rest_api/tests/couriers/good_couriers.json', 'r',
+                  encoding='utf-8') as file:
+            self.couriers = json.load(file)
+        self.client.post(
+            '/couriers',
+            data=self.couriers,
+            content_type='application/json'
+        )
+
+    def assign_batch(self, couriers_id):
+        return self.client.post(
+            '/orders/assign/batch',
+            data={
+                'data': [
+                    {
+                        'courier_id': courier_id
+                    } for courier_id in couriers_id
+                ]
+            },
+            content_type='application/json'
+        )
+
+    def test_missing_data(self):
+        """Обращение к обработчику с пустым телом, проверка статуса 400"""
+        response = self.client.post(
+            '/orders/assign/batch',
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_wrong_courier_id(self):
+        """
+        Обращение к обработчику с несуществующим и повторным courier_id,
+        проверка статуса 400 и списка неверных id
+        """
+        response = self.assign_batch([1, 100, 1])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data['validation_error']['couriers'],
+            [{'id': 100}, {'id': 1}]
+        )
+        self.assertFalse(Order.objects.filter(
+            status_order=StatusOrder.IN_PROCESS
+        ).exists())
+
+    def test_orders_assign_batch(self):
+        """
+        Обращение к обработчику, каждый заказ назначен не более
+        одного раза и подходит курьеру, проверка статуса 200
+        """
+        couriers_id = [courier['courier_id']
+                       for courier in self.couriers['data']]
+        with CaptureAppQueries() as queries:
+            response = self.assign_batch(couriers_id)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), 12)
+        self.assertEqual(
+            [courier['courier_id'] for courier in response.data['couriers']],
+            couriers_id
+        )
+        orders = {order['order_id']: order for order in self.orders['data']}
+        couriers = {courier['courier_id']: courier
+                    for courier in self.couriers['data']}
+        assigned = []
+        for result in response.data['couriers']:
+            courier = Courier.objects.get(courier_id=result['courier_id'])
+            orders_id = [order['id'] for order in result['orders']]
+            assigned += orders_id
+            if not orders_id:
+                self.assertNotIn('assign_time', result)
+                self.assertEqual(courier.status_courier, StatusCourier.FREE)
+                continue
+            self.assertEqual(result['assign_time'], courier.assign_time)
+            self.assertEqual(courier.status_courier, StatusCourier.BUSY)
+            self.assertLessEqual(
+                sum(orders[order_id]['weight'] for order_id in orders_id),
+                courier.lifting_capacity
+            )
+            self.assertEqual(
+                set(Order.objects.filter(
+                    courier_id=courier.courier_id,
+                    status_order=StatusOrder.IN_PROCESS
+                ).values_list('order_id', flat=True)),
+                set(orders_id)
+            )
+            for order_id in orders_id:
+                self.assertIn(orders[order_id]['region'],
+                              couriers[courier.courier_id]['regions'])
+        self.assertEqual(len(assigned), len(set(assigned)))
+        self.assertEqual(set(assigned), {2, 3, 4, 5, 6, 7, 10})
+
+    def test_busy_courier(self):
+        """
+        Обращение к обработчику, занятый курьер получает текущий развоз,
+        проверка статуса 200
+        """
+        single = self.client.post(
+            '/orders/assign',
+            data={'courier_id': 1},
+            content_type='application/json'
+        )
+        response = self.assign_batch([1, 6])
+        self.assertEqual(response.status_code, 200)
+        first, second = response.data['couriers']
+        self.assertEqual(first['assign_time'], single.data['assign_time'])
+        self.assertEqual(
+            sorted(order['id'] for order in first['orders']),
+            sorted(order['id'] for order in single.data['orders'])
+        )
+        self.assertEqual(second['orders'], [{'id': 4}, {'id': 2}])
+
+    def test_lock_order(self):
+        """Курьеры блокируются по возрастанию id независимо от запроса"""
+        with CaptureAppQueries() as queries:
+            response = self.assign_batch([6, 1, 4])
+        self.assertEqual(response.status_code, 200)
+        locks = [query['sql'] for query in queries.app_queries
+                 if 'FOR UPDATE' in query['sql']
+                 and 'FROM "rest_api_courier"' in query['sql']]
+        self.assertEqual(len(locks), 1)
+        self.assertIn('ORDER BY "rest_api_courier"."courier_id" ASC',
+                      locks[0])
@@ -0,0 +1,88 @@
+import json
+import time
+
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from rest_api.models import Order
+
+
+@override_settings(JOBS_WORKERS=0)
+class OrdersAsyncTestCase(TestCase):
+    def setUp(self):
+        """Инициализация данных"""
+        with open('rest_api/tests/orders/good_orders.json', 'r',
+                  encoding='utf-8') as file:
+            self.orders = json.load(file)
+
+    def test_orders_async(self):
+        """
+        Загрузка данных в асинхронном режиме, проверка статуса 202
+        и результата задачи
+        """
+        response = self.client.post(
+            '/orders?async=true',
+            data=self.orders,
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 202)
+        job_id = response.data['job_id']
+        self.assertEqual(response['Location'], f'/jobs/{job_id}')
+        response = self.client.get(f'/jobs/{job_id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'complete')
+        self.assertEqual(response.data['total'], 11)
+        self.assertEqual(response.data['processed'], 11)
+        self.assertEqual(
+            response.data['result'],
+            {'orders': [{'id': order_id} for order_id in range(1, 12)]}
+        )
+        self.assertEqual(Order.objects.count(), 11)
+
+    def test_orders_async_bad(self):
+        """
+        Загрузка невалидных данных в асинхронном режиме,
+        проверка ошибки в результате задачи
+        """
+        with open('rest_api/tests/orders/bad_orders.json', 'r',
+                  encoding='utf-8') as file:
+            orders = json.load(file)
+        response = self.client.post(
+            '/orders?async=true',
+            data=orders,
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 202)
+        response = self.client.get(f'/jobs/{response.data["job_id"]}')
+        self.assertEqual(response.data['status'], 'failed')
+        self.assertEqual(
+            response.data['result'],
+            {'validation_error': {'orders': [{'id': 4}, {'id': 6}]}}
+        )
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_wrong_job_id(self):
+        """Запрос несуществующей задачи, проверка статуса 400"""
+        response = self.client.get('/jobs/100')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(JOBS_WORKERS=2)
+class OrdersAsyncWorkersTestCase(TransactionTestCase):
+    def test_orders_async_workers(self):
+        """Обработка задачи фоновым пулом, опрос статуса до завершения"""
+        with open('rest_api/tests/orders/good_orders.json', 'r',
+                  encoding='utf-8') as file:
+            orders = json.load(file)
+        response = self.client.post(
+            '/orders?async=true',
+            data=orders,
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 202)
+        for _ in range(100):
+            response = self.client.get(f'/jobs/{response.data["job_id"]}')
+            if response.data['status'] == 'complete':
+                break
+            time.sleep(0.05)
+        self.assertEqual(response.data['status'], 'complete')
+        self.assertEqual(Order.objects.count(), 11)
@@ -0,0 +1,167 @@
+import json
+from datetime import timedelta
+
+from django.test import TestCase
+
+from rest_api.const import StatusOrder, StatusCourier
+from rest_api.models import Courier, Order
+from rest_api.tests.utils import CaptureAppQueries
+
+
+class OrdersCompleteBatchTestCase(TestCase):
+    def setUp(self):
+        """Инициализация данных, курьеру 1 назначены заказы 3 и 5"""
+        with open('rest_api/tests/orders/good_orders.json', 'r',
+                  encoding='utf-8') as file:
+            self.orders = json.load(file)
+        self.client.post(
+            '/orders',
+            data=self.orders,
+            content_type='application/json'
+        )
+        with open('rest_api/tests/couriers/good_couriers.json', 'r',
+                  encoding='utf-8') as file:
+            self.couriers = json.load(file)
+        self.client.post(
+            '/couriers',
+            data=self.couriers,
+            content_type='application/json'
+        )
+        for courier_id in (1, 2):
+            self.client.post(
+                '/orders/assign',
+                data={'courier_id': courier_id},
+                content_type='application/json'
+            )
+        self.assign_time = Courier.objects.get(courier_id=1).assign_time
+
+    def get_time(self, minutes):
+        """Время через minutes минут после назначения заказов курьеру 1"""
+        return (self.assign_time + timedelta(minutes=minutes)).isoformat()
+
+    def complete(self, data):
+        response = self.client.post(
+            '/orders/complete/batch',
+            data={'data': data},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data['orders']
+
+    def test_missing_data(self):
+        """Обращение к обработчику без списка data, проверка статуса 400"""
+        response = self.client.post(
+            '/orders/complete/batch',
+            data={'orders': []},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_complete_batch(self):
+        """
+        Завершения применяются в порядке времени: время доставки считается
+        от предыдущего завершения, курьер освобождается после последнего
+        """
+        results = self.complete([
+            {
+                "courier_id": 1,
+                "order_id": 5,
+                "complete_time": self.get_time(25)
+            },
+            {
+                "courier_id": 1,
+                "order_id": 3,
+                "complete_time": self.get_time(10)
+            },
+        ])
+        self.assertEqual(results, [{'order_id': 5}, {'order_id': 3}])
+        self.assertEqual(Order.objects.get(order_id=3).delivery_time, 600)
+        self.assertEqual(Order.objects.get(order_id=5).delivery_time, 900)
+        self.assertEqual(Order.objects.filter(
+            order_id__in=[3, 5], status_order=StatusOrder.COMPLETE
+        ).count(), 2)
+        courier = Courier.objects.get(courier_id=1)
+        self.assertEqual(courier.status_courier, StatusCourier.FREE)
+        self.assertEqual(courier.complete_order_in_delivery, 0)
+        self.assertEqual(courier.quantity_orders.foot, 1)
+        self.assertIsNone(courier.courier_type_in_delivery)
+
+    def test_item_errors(self):
+        """Ошибочные элементы возвращают ошибки, остальные применяются"""
+        results = self.complete([
+            {
+                "courier_id": 1,
+                "order_id": 500,
+                "complete_time": self.get_time(5)
+            },
+            {
+                "courier_id": 1,
+                "order_id": 1,
+                "complete_time": self.get_time(5)
+            },
+            {
+                "courier_id": 1,
+                "order_id": 3,
+                "complete_time": self.get_time(-5)
+            },
+            {
+                "courier_id": 2,
+                "order_id": 5,
+                "complete_time": self.get_time(5)
+            },
+            {
+                "order_id": 5,
+                "complete_time": self.get_time(5)
+            },
+            {
+                "courier_id": 1,
+                "order_id": 5,
+                "complete_time": self.get_time(5)
+            },
+        ])
+        self.assertEqual(
+            [sorted(result.get('validation_error', {})) for result in results],
+            [['order_id'], ['courier_id'], ['complete_time'],
+             ['courier_id'], ['courier_id'], []]
+        )
+        self.assertEqual(results[-1], {'order_id': 5})
+        self.assertEqual(Order.objects.get(order_id=5).status_order,
+                         StatusOrder.COMPLETE)
+        self.assertEqual(Order.objects.get(order_id=3).status_order,
+                         StatusOrder.IN_PROCESS)
+        courier = Courier.objects.get(courier_id=1)
+        self.assertEqual(courier.status_courier, StatusCourier.BUSY)
+        self.assertEqual(courier.complete_order_in_delivery, 1)
+
+    def test_idempotence(self):
+        """Повторное завершение заказа не изменяет время доставки"""
+        results = self.complete([
+            {
+                "courier_id": 1,
+                "order_id": 3,
+                "complete_time": self.get_time(10)
+            },
+            {
+                "courier_id": 1,
+                "order_id": 3,
+                "complete_time": self.get_time(20)
+            },
+        ])
+        self.assertEqual(results, [{'order_id': 3}, {'order_id': 3}])
+        order = Order.objects.get(order_id=3)
+        self.assertEqual(order.delivery_time, 600)
+        self.assertEqual(
+            Courier.objects.get(courier_id=1).complete_order_in_delivery, 1
+        )
+
+    def test_queries_count(self):
+        """Количество запросов к базе не зависит от количества завершений"""
+        with CaptureAppQueries() as queries:
+            self.complete([
+                {
+                    "courier_id": courier_id,
+                    "order_id": order_id,
+                    "complete_time": self.get_time(10)
+                } for courier_id, order_id in ((1, 3), (1, 5), (2, 10))
+            ])
+        self.assertLessEqual(len(queries), 7)
@@ -0,0 +1,113 @@
+import threading
+from datetime import timedelta
+
+from django.db import connection
+from django.test import Client, TransactionTestCase
+
+from rest_api.const import StatusOrder, StatusCourier
+from rest_api.models import Courier, Order
+
+COURIERS = 4
+ORDERS = 8
+
+
+class OrdersCompleteConcurrencyTestCase(TransactionTestCase):
+    def setUp(self):
+        """Инициализация курьеров, каждому назначено ORDERS заказов"""
+        self.client.post(
+            '/couriers',
+            data={
+                "data": [
+                    {
+                        "courier_id": courier_id,
+                        "courier_type": "bike",
+                        "regions": [courier_id],
+                        "working_hours": ["09:00-18:00"]
+                    } for courier_id in range(1, COURIERS + 1)
+                ]
+            },
+            content_type='application/json'
+        )
+        self.client.post(
+            '/orders',
+            data={
+                "data": [
+                    {
+                        "order_id": order_id,
+                        "weight": 1,
+                        "region": order_id % COURIERS + 1,
+                        "delivery_hours": ["10:00-11:00"]
+                    } for order_id in range(1, COURIERS * ORDERS + 1)
+                ]
+            },
+            content_type='application/json'
+        )
+        for courier_id in range(1, COURIERS + 1):
+            self.client.post(
+                '/orders/assign',
+                data={'courier_id': courier_id},
+                content_type='application/json'
+            )
+
+    def complete_concurrently(self, orders):
+        """
+        Одновременные запросы завершения заказов [(id курьера, id)]
+        через 30 минут после назначения
+        """
+        complete_time = {
+            courier_id: (assign_time + timedelta(minutes=30)).isoformat()
+            for courier_id, assign_time in Courier.objects.values_list(
+                'courier_id', 'assign_time'
+            )
+        }
+        barrier = threading.Barrier(len(orders))
+        responses = [None] * len(orders)
+
+        def complete(number, courier_id, order_id):
+            try:
+                client = Client()
+                barrier.wait()
+                responses[number] = client.post(
+                    '/orders/complete',
+                    data={
+                        'courier_id': courier_id,
+                        'order_id': order_id,
+                        'complete_time': complete_time[courier_id]
+                    },
+                    content_type='application/json'
+                )
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=complete, args=(number, *order))
+            for number, order in enumerate(orders)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return responses
+
+    def test_complete_in_parallel(self):
+        """
+        Все заказы курьеров завершаются одновременно, в том числе
+        повторно: каждый курьер освобождается один раз, время доставки
+        считается от предыдущего завершения
+        """
+        orders = list(Order.objects.values_list('courier_id', 'order_id'))
+        self.assertEqual(len(orders), COURIERS * ORDERS)
+        responses = self.complete_concurrently(orders + orders[:COURIERS])
+        for response in responses:
+            self.assertEqual(response.status_code, 200)
+        self.assertFalse(Order.objects.exclude(
+            status_order=StatusOrder.COMPLETE
+        ).exists())
+        for courier in Courier.objects.select_related('quantity_orders'):
+            self.assertEqual(courier.status_courier, StatusCourier.FREE)
+            self.assertEqual(courier.complete_order_in_delivery, 0)
+            self.assertEqual(courier.quantity_orders.bike, 1)
+            delivery_times = sorted(Order.objects.filter(
+                courier_id=courier.courier_id
+            ).values_list('delivery_time', flat=True))
+            self.assertEqual(delivery_times, [0] * (ORDERS - 1) + [30 * 60])
@@ -0,0 +1,136 @@
+import threading
+from decimal import Decimal
+
+from django.db import connection
+from django.test import Client, TransactionTestCase, override_settings
+
+from rest_api.const import StatusOrder
+from rest_api.dispatch import dispatch_index
+from rest_api.models import Courier, Order
+
+COURIERS = 12
+ORDERS = 300
+REPEATS = 3
+
+
+class OrdersConcurrencyTestCase(TransactionTestCase):
+    def setUp(self):
+        """Инициализация курьеров с общими районами и заказов"""
+        dispatch_index.reset()
+        self.client.post(
+            '/couriers',
+            data={
+                "data": [
+                    {
+                        "courier_id": courier_id,
+                        "courier_type": "car",
+                        "regions": [1, 2, courier_id % 3 + 3],
+                        "working_hours": ["09:00-18:00"]
+                    } for courier_id in range(1, COURIERS + 1)
+                ]
+            },
+            content_type='application/json'
+        )
+        self.client.post(
+            '/orders',
+            data={
+                "data": [
+                    {
+                        "order_id": order_id,
+                        "weight": order_id % 50 / 10 + 0.5,
+                        "region": order_id % 5 + 1,
+                        "delivery_hours": ["10:00-11:00"]
+                    } for order_id in range(1, ORDERS + 1)
+                ]
+            },
+            content_type='application/json'
+        )
+
+    def tearDown(self):
+        dispatch_index.reset()
+
+    def assign_concurrently(self, couriers_id):
+        """Одновременные запросы назначения: [(id курьера, ответ)]"""
+        barrier = threading.Barrier(len(couriers_id))
+        responses = [None] * len(couriers_id)
+
+        def assign(number, courier_id):
+            try:
+                client = Client()
+                barrier.wait()
+                responses[number] = client.post(
+                    '/orders/assign',
+                    data={'courier_id': courier_id},
+                    content_type='application/json'
+                )
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=assign, args=(number, courier_id))
+            for number, courier_id in enumerate(couriers_id)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return list(zip(couriers_id, responses))
+
+    def check_assignment(self, responses):
+        """
+        Каждый заказ выдан одному курьеру, повторные запросы курьера
+        получают тот же развоз, ответы совпадают с базой
+        """
+        assigned = {}
+        courier_orders = {}
+        for courier_id, response in responses:
+            self.assertEqual(response.status_code, 200)
+            orders_id = {order['id'] for order in response.data['orders']}
+            self.assertEqual(
+                courier_orders.setdefault(courier_id, orders_id), orders_id
+            )
+            for order_id in orders_id:
+                self.assertEqual(assigned.setdefault(order_id, courier_id),
+                                 courier_id)
+        for courier in Courier.objects.all():
+            orders = Order.objects.filter(
+                courier=courier,
+                status_order=StatusOrder.IN_PROCESS
+            )
+            self.assertEqual(
+                {order.order_id for order in orders},
+                {order_id for order_id, courier_id in assigned.items()
+                 if courier_id == courier.courier_id}
+            )
+            self.assertEqual(
+                courier.current_weight_orders,
+                sum((order.weight for order in orders), Decimal(0))
+            )
+            self.assertLessEqual(courier.current_weight_orders,
+                                 courier.lifting_capacity)
+
+    def run_assign(self):
+        couriers_id = list(range(1, COURIERS + 1)) * REPEATS
+        self.check_assignment(self.assign_concurrently(couriers_id))
+        self.assertTrue(Order.objects.filter(
+            status_order=StatusOrder.IN_PROCESS
+        ).exists())
+
+    def test_assign_orm(self):
+        """Параллельное назначение запросом к базе"""
+        self.run_assign()
+
+    @override_settings(ASSIGN_BACKEND='index')
+    def test_assign_index(self):
+        """Параллельное назначение по индексу новых заказов"""
+        self.run_assign()
+
+    @override_settings(ASSIGN_BACKEND='vector')
+    def test_assign_vector(self):
+        """Параллельное назначение проверкой кандидатов по столбцам"""
+        self.run_assign()
+
+    @override_settings(ASSIGN_BACKEND='sql')
+    def test_assign_sql(self):
+        """Параллельное назначение одним запросом к базе"""
+        self.run_assign()
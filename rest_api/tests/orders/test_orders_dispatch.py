@@ -0,0 +1,90 @@
+from django.test import override_settings
+
+from rest_api.const import StatusOrder
+from rest_api.dispatch import dispatch_index
+from rest_api.models import Order
+from rest_api.tests.orders import test_orders_assign
+
+
+@override_settings(ASSIGN_BACKEND='index')
+class OrdersDispatchTestCase(test_orders_assign.OrdersAssignTestCase):
+    """Назначение заказов по индексу новых заказов"""
+    def setUp(self):
+        """Инициализация данных, индекс загружается заново в каждом тесте"""
+        dispatch_index.reset()
+        super().setUp()
+
+    def tearDown(self):
+        dispatch_index.reset()
+
+    def assign(self, courier_id):
+        return self.client.post(
+            '/orders/assign',
+            data={'courier_id': courier_id},
+            content_type='application/json'
+        )
+
+    def test_created_orders(self):
+        """Заказы, загруженные после загрузки индекса, попадают в индекс"""
+        self.assign(4)
+        self.assertTrue(dispatch_index.is_loaded)
+        orders = {
+            "data": [
+                {
+                    "order_id": 100,
+                    "weight": 1,
+                    "region": 13,
+                    "delivery_hours": ["10:00-11:00"]
+                }
+            ]
+        }
+        self.client.post(
+            '/orders',
+            data=orders,
+            content_type='application/json'
+        )
+        response = self.assign(4)
+        self.assertEqual(response.data['orders'], [{'id': 100}])
+        self.assertNotIn(100, dispatch_index.orders)
+
+    def test_assigned_by_another_process(self):
+        """
+        Заказ, выданный другим процессом, не выдается повторно
+        и удаляется из индекса
+        """
+        self.assign(4)
+        Order.objects.filter(order_id=3).update(
+            status_order=StatusOrder.IN_PROCESS,
+            courier_id=6
+        )
+        self.assertIn(3, dispatch_index.orders)
+        response = self.assign(1)
+        orders = [order['id'] for order in response.data['orders']]
+        self.assertNotIn(3, orders)
+        self.assertNotIn(3, dispatch_index.orders)
+        self.assertEqual(Order.objects.filter(
+            courier_id=1, status_order=StatusOrder.IN_PROCESS
+        ).count(), len(orders))
+
+    def test_released_orders(self):
+        """Заказы, снятые с курьера при изменении, возвращаются в индекс"""
+        self.assign(1)
+        self.assertNotIn(3, dispatch_index.orders)
+        self.client.patch(
+            '/couriers/1',
+            data={'regions': [50]},
+            content_type='application/json'
+        )
+        self.assertIn(3, dispatch_index.orders)
+        response = self.assign(5)
+        orders = [order['id'] for order in response.data['orders']]
+        self.assertIn(3, orders)
+
+    @override_settings(DISPATCH_INDEX_TTL=0)
+    def test_expired_index(self):
+        """Устаревший индекс перечитывается из базы"""
+        self.assign(4)
+        Order.objects.create(order_id=100, weight=1, region=13) \
+            .deliveryhours_set.create(start_time='10:00', stop_time='11:00')
+        response = self.assign(4)
+        self.assertEqual(response.data['orders'], [{'id': 100}])
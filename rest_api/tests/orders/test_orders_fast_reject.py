@@ -0,0 +1,213 @@
+import random
+from datetime import time
+
+from django.test import override_settings
+
+from rest_api.dispatch import dispatch_index
+from rest_api.models import Courier, DeliveryHours, Order
+from rest_api.tests.orders import test_orders_assign
+from rest_api.tests.utils import CaptureAppQueries
+
+
+@override_settings(ASSIGN_FAST_REJECT=True)
+class OrdersFastRejectTestCase(test_orders_assign.OrdersAssignTestCase):
+    """Назначение заказов с быстрым отказом по сводке районов"""
+    def setUp(self):
+        """Инициализация данных, индекс загружается заново в каждом тесте"""
+        dispatch_index.reset()
+        super().setUp()
+        self.client.post(
+            '/couriers',
+            data={
+                "data": [
+                    {
+                        "courier_id": 20,
+                        "courier_type": "foot",
+                        "regions": [70, 71],
+                        "working_hours": ["09:00-18:00"]
+                    }
+                ]
+            },
+            content_type='application/json'
+        )
+
+    def tearDown(self):
+        dispatch_index.reset()
+
+    def assign(self, courier_id):
+        """Назначение заказов курьеру: (id заказов, запросы к базе)"""
+        with CaptureAppQueries() as queries:
+            response = self.client.post(
+                '/orders/assign',
+                data={'courier_id': courier_id},
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+        return [order['id'] for order in response.data['orders']], \
+            [query['sql'] for query in queries.app_queries]
+
+    def assertNoOrderQueries(self, queries):
+        """Заказы не загружаются, отказ подтверждается одним запросом"""
+        order_queries = [sql for sql in queries
+                         if 'rest_api_order' in sql
+                         or 'rest_api_deliveryhours' in sql]
+        self.assertEqual(len(order_queries), 1)
+        self.assertIn('LIMIT 1', order_queries[0])
+
+    def test_empty_regions(self):
+        """В районах курьера нет новых заказов: отказ без запросов заказов"""
+        dispatch_index.load()
+        orders_id, queries = self.assign(20)
+        self.assertEqual(orders_id, [])
+        self.assertNoOrderQueries(queries)
+        self.assertEqual(dispatch_index.rejects, 1)
+
+    def test_heavy_orders(self):
+        """Самый легкий заказ района тяжелее грузоподъемности курьера"""
+        self.client.post(
+            '/orders',
+            data={
+                "data": [
+                    {
+                        "order_id": 100,
+                        "weight": 15,
+                        "region": 70,
+                        "delivery_hours": ["10:00-11:00"]
+                    }
+                ]
+            },
+            content_type='application/json'
+        )
+        dispatch_index.load()
+        orders_id, queries = self.assign(20)
+        self.assertEqual(orders_id, [])
+        self.assertNoOrderQueries(queries)
+
+    def test_other_hours(self):
+        """Время доставки заказов района не пересекается со временем работы"""
+        self.client.post(
+            '/orders',
+            data={
+                "data": [
+                    {
+                        "order_id": 100,
+                        "weight": 1,
+                        "region": 71,
+                        "delivery_hours": ["18:00-19:00", "07:00-09:00"]
+                    }
+                ]
+            },
+            content_type='application/json'
+        )
+        dispatch_index.load()
+        orders_id, queries = self.assign(20)
+        self.assertEqual(orders_id, [])
+        self.assertNoOrderQueries(queries)
+        self.client.post(
+            '/orders',
+            data={
+                "data": [
+                    {
+                        "order_id": 101,
+                        "weight": 1,
+                        "region": 71,
+                        "delivery_hours": ["17:00-19:00"]
+                    }
+                ]
+            },
+            content_type='application/json'
+        )
+        orders_id, _ = self.assign(20)
+        self.assertEqual(orders_id, [101])
+
+    def test_assigned_region(self):
+        """После выдачи всех заказов района курьер получает быстрый отказ"""
+        orders_id, _ = self.assign(7)
+        self.assertEqual(orders_id, [7, 6])
+        self.assertNotIn(50, dispatch_index.regions)
+        self.client.patch(
+            '/couriers/20',
+            data={'regions': [50, 51]},
+            content_type='application/json'
+        )
+        orders_id, queries = self.assign(20)
+        self.assertEqual(orders_id, [])
+        self.assertNoOrderQueries(queries)
+
+    def test_metrics(self):
+        """Счетчики быстрого отказа в GET /metrics"""
+        self.assign(20)
+        self.assign(2)
+        response = self.client.get('/metrics')
+        fast_reject = response.data['dispatch_index']['fast_reject']
+        self.assertEqual(fast_reject['checks'], 2)
+        self.assertEqual(fast_reject['rejects'], 1)
+        self.assertEqual(fast_reject['index_misses'], 0)
+
+    def test_orders_outside_index(self):
+        """
+        Заказ, загруженный мимо индекса (другим процессом), выдается:
+        отказ по индексу не подтверждается базой
+        """
+        dispatch_index.load()
+        order = Order.objects.create(order_id=100, weight=1, region=71)
+        DeliveryHours.objects.create(order=order, start_time='17:00',
+                                     stop_time='19:00')
+        orders_id, _ = self.assign(20)
+        self.assertEqual(orders_id, [100])
+        self.assertEqual(dispatch_index.rejects, 0)
+        self.assertEqual(dispatch_index.index_misses, 1)
+
+    def test_removed_from_index(self):
+        """
+        Заказ, удаленный из индекса выдачей, которая не зафиксирована,
+        выдается следующему курьеру
+        """
+        orders_id, _ = self.assign(7)
+        self.assertEqual(orders_id, [7, 6])
+        Order.objects.filter(order_id__in=orders_id).update(
+            status_order='N', courier=None, assign_time=None
+        )
+        self.client.patch(
+            '/couriers/20',
+            data={'regions': [50, 51]},
+            content_type='application/json'
+        )
+        orders_id, _ = self.assign(20)
+        self.assertEqual(sorted(orders_id), [6, 7])
+
+    def test_candidates_query(self):
+        """
+        Подтверждение отказа запросом находит каждый заказ, подходящий
+        по маскам минут, в том числе для периодов с секундами
+        """
+        random.seed(2)
+
+        def random_hours():
+            return [tuple(sorted(
+                time(random.randint(0, 23), random.randint(0, 59),
+                     random.choice((0, 0, 30)))
+                for _ in range(2)
+            )) for _ in range(random.randint(1, 2))]
+        courier = Courier.objects.get(courier_id=20)
+        feasible = 0
+        for order_id in range(100, 120):
+            order = Order.objects.create(order_id=order_id, weight=1,
+                                         region=70)
+            for start, stop in random_hours():
+                DeliveryHours.objects.create(order=order, start_time=start,
+                                             stop_time=stop)
+            for _ in range(10):
+                working_hours = random_hours()
+                courier.workinghours_set.all().delete()
+                for start, stop in working_hours:
+                    courier.workinghours_set.create(start_time=start,
+                                                    stop_time=stop)
+                if Order.get_feasible(courier, [order_id]):
+                    feasible += 1
+                    self.assertTrue(Order.has_candidates(
+                        [70], courier.lifting_capacity, working_hours
+                    ))
+            order.status_order = 'C'
+            order.save()
+        self.assertGreater(feasible, 10)
@@ -0,0 +1,66 @@
+import random
+from datetime import time
+from decimal import Decimal
+
+from django.test import SimpleTestCase, override_settings
+
+from rest_api.feasibility import CandidateOrders, get_feasible, \
+    get_feasible_orders
+from rest_api.packing import pack
+from rest_api.tests.orders import test_orders_assign
+from rest_api.utils import get_hours_mask, is_intersections
+
+
+@override_settings(ASSIGN_BACKEND='vector')
+class OrdersVectorAssignTestCase(test_orders_assign.OrdersAssignTestCase):
+    """Назначение заказов проверкой кандидатов по столбцам"""
+
+
+class FeasibilityTestCase(SimpleTestCase):
+    def random_hours(self):
+        """Случайные периоды, в том числе пустые и с секундами"""
+        hours = []
+        for _ in range(random.randint(0, 3)):
+            start, stop = (
+                time(random.randint(0, 23), random.randint(0, 59),
+                     random.choice((0, 0, 30)))
+                for _ in range(2)
+            )
+            hours.append((start, stop))
+        return hours
+
+    @override_settings(ASSIGN_PACKING='greedy')
+    def test_same_as_greedy(self):
+        """
+        Выбор по столбцам совпадает с последовательным жадным выбором
+        по маскам минут на случайных заказах
+        """
+        random.seed(1)
+        for _ in range(50):
+            orders = [
+                (order_id, Decimal(random.randint(1, 5000)).scaleb(-2),
+                 random.randint(1, 10), self.random_hours())
+                for order_id in random.sample(range(1, 10000), 300)
+            ]
+            regions = random.sample(range(1, 10), 3)
+            capacity = Decimal(random.choice((10, 15, 50)))
+            working_hours = self.random_hours()
+            candidates = CandidateOrders.from_orders(orders)
+            chosen = pack(get_feasible_orders(
+                candidates,
+                get_feasible(candidates, regions, capacity, working_hours)
+            ), capacity)
+            expected = []
+            current_weight = Decimal(0)
+            working_mask = get_hours_mask(working_hours)
+            for order_id, weight, region, hours in sorted(
+                orders, key=lambda order: (order[1], order[0])
+            ):
+                if region not in regions or weight > capacity:
+                    continue
+                if current_weight + weight > capacity:
+                    break
+                if is_intersections(working_mask, get_hours_mask(hours)):
+                    expected.append(order_id)
+                    current_weight += weight
+            self.assertEqual([order_id for order_id, _ in chosen], expected)
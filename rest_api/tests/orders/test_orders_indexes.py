@@ -0,0 +1,116 @@
+from django.db import connection
+from django.db.models import Avg
+from django.test import TestCase
+
+from rest_api.const import StatusOrder
+from rest_api.models import Order, Regions, WorkingHours, DeliveryHours
+
+COURIERS = 5000
+ORDERS = 60000
+REGIONS = 200
+
+
+class OrdersIndexesTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Инициализация большого набора данных напрямую в базе,
+        после загрузки обновляется статистика планировщика
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO rest_api_quantityorders (id, foot, bike, car) '
+                'SELECT i, 0, 0, 0 FROM generate_series(1, %s) i',
+                [COURIERS]
+            )
+            cursor.execute(
+                'INSERT INTO rest_api_courier (courier_id, courier_type, '
+                'lifting_capacity, current_weight_orders, orders_in_process, '
+                'status_courier, complete_order_in_delivery, '
+                'quantity_orders_id) '
+                "SELECT i, 'car', 50, 0, 0, 'F', 0, i "
+                'FROM generate_series(1, %s) i',
+                [COURIERS]
+            )
+            cursor.execute(
+                'INSERT INTO rest_api_regions (courier_id, region) '
+                'SELECT i, (i * 7 + j) %% %s + 1 '
+                'FROM generate_series(1, %s) i, generate_series(1, 3) j',
+                [REGIONS, COURIERS]
+            )
+            cursor.execute(
+                'INSERT INTO rest_api_workinghours '
+                '(courier_id, start_time, stop_time) '
+                "SELECT i, time '09:00' + j * interval '4 hours', "
+                "time '12:00' + j * interval '4 hours' "
+                'FROM generate_series(1, %s) i, generate_series(0, 1) j',
+                [COURIERS]
+            )
+            # Большая часть заказов выполнена, часть в работе и новые
+            cursor.execute(
+                'INSERT INTO rest_api_order (order_id, weight, region, '
+                'status_order, courier_id, delivery_time) '
+                'SELECT i, (i %% 5000 + 1) / 100.0, i %% %s + 1, '
+                "CASE WHEN i %% 10 < 7 THEN 'C' "
+                "WHEN i %% 10 < 9 THEN 'I' ELSE 'N' END, "
+                'CASE WHEN i %% 10 < 9 THEN i %% %s + 1 END, '
+                'CASE WHEN i %% 10 < 7 THEN i %% 3600 END '
+                'FROM generate_series(1, %s) i',
+                [REGIONS, COURIERS, ORDERS]
+            )
+            cursor.execute(
+                'INSERT INTO rest_api_deliveryhours '
+                '(order_id, start_time, stop_time) '
+                "SELECT i, time '10:00', time '18:00' "
+                'FROM generate_series(1, %s) i',
+                [ORDERS]
+            )
+            for table in ('rest_api_courier', 'rest_api_regions',
+                          'rest_api_workinghours', 'rest_api_order',
+                          'rest_api_deliveryhours'):
+                cursor.execute(f'ANALYZE {table}')
+
+    def assertIndexScan(self, queryset):
+        """Проверка, что план запроса не использует полный просмотр таблиц"""
+        plan = queryset.explain()
+        self.assertNotIn('Seq Scan', plan, plan)
+
+    def test_new_orders(self):
+        """Поиск новых заказов в районах курьера для назначения"""
+        self.assertIndexScan(Order.objects.filter(
+            status_order=StatusOrder.NEW,
+            region__in=Regions.objects.filter(
+                courier_id=1
+            ).values('region'),
+            weight__lte=50
+        ).order_by('weight', 'order_id'))
+
+    def test_in_process_orders(self):
+        """Заказы в текущем развозе курьера"""
+        self.assertIndexScan(Order.objects.filter(
+            courier_id=1,
+            status_order=StatusOrder.IN_PROCESS
+        ).order_by('-weight'))
+
+    def test_complete_orders(self):
+        """Выполненные заказы курьера для расчета рейтинга"""
+        self.assertIndexScan(Order.objects.filter(
+            courier_id=1,
+            status_order=StatusOrder.COMPLETE
+        ).values('region').order_by('region').annotate(
+            Avg('delivery_time')
+        ))
+
+    def test_courier_regions(self):
+        """Районы курьера"""
+        self.assertIndexScan(Regions.objects.filter(courier_id=1))
+
+    def test_courier_working_hours(self):
+        """Время работы курьера"""
+        self.assertIndexScan(WorkingHours.objects.filter(courier_id=1))
+
+    def test_delivery_hours(self):
+        """Время доставки заказов-кандидатов"""
+        self.assertIndexScan(DeliveryHours.objects.filter(
+            order_id__in=range(1, ORDERS, 100)
+        ))
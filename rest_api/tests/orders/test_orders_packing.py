@@ -0,0 +1,105 @@
+import random
+import time
+from decimal import Decimal
+from itertools import combinations
+
+from django.test import TestCase, SimpleTestCase, override_settings
+
+from rest_api.packing import pack, pack_greedy, pack_knapsack, stats
+
+
+class PackingTestCase(SimpleTestCase):
+    def random_orders(self, size):
+        """Случайные заказы, отсортированные по весу и id"""
+        return sorted(
+            ((order_id, Decimal(random.randint(1, 2000)).scaleb(-2))
+             for order_id in random.sample(range(1, 1000), size)),
+            key=lambda order: (order[1], order[0])
+        )
+
+    def test_knapsack_optimal(self):
+        """Точный подбор дает наибольший возможный вес набора"""
+        random.seed(1)
+        for _ in range(30):
+            orders = self.random_orders(10)
+            capacity = Decimal(random.choice((10, 15, 25)))
+            chosen = pack_knapsack(orders, capacity, time.monotonic() + 10)
+            best = max(
+                sum((weight for _, weight in subset), Decimal(0))
+                for size in range(len(orders) + 1)
+                for subset in combinations(orders, size)
+                if sum(weight for _, weight in subset) <= capacity
+            )
+            weight = sum((weight for _, weight in chosen), Decimal(0))
+            self.assertEqual(weight, best)
+            self.assertEqual(len(set(chosen)), len(chosen))
+            greedy = pack_greedy(orders, capacity)
+            self.assertGreaterEqual(
+                weight, sum((weight for _, weight in greedy), Decimal(0))
+            )
+
+    def test_knapsack_deadline(self):
+        """Точный подбор прерывается по истечении времени"""
+        orders = self.random_orders(500)
+        self.assertIsNone(pack_knapsack(orders, Decimal(50), 0))
+
+    @override_settings(ASSIGN_PACKING='knapsack',
+                       ASSIGN_PACKING_TIME_BUDGET=0)
+    def test_fallback_to_greedy(self):
+        """Без времени на точный подбор заказы выбираются жадно"""
+        orders = self.random_orders(500)
+        fallbacks = stats.fallbacks
+        chosen = pack(orders, Decimal(50))
+        self.assertEqual(chosen, pack_greedy(orders, Decimal(50)))
+        self.assertEqual(stats.fallbacks, fallbacks + 1)
+
+
+@override_settings(ASSIGN_PACKING='knapsack')
+class OrdersPackingTestCase(TestCase):
+    def setUp(self):
+        """Инициализация курьера и заказов, которые жадный выбор не уложит"""
+        self.client.post(
+            '/couriers',
+            data={
+                "data": [
+                    {
+                        "courier_id": 1,
+                        "courier_type": "foot",
+                        "regions": [1],
+                        "working_hours": ["09:00-18:00"]
+                    }
+                ]
+            },
+            content_type='application/json'
+        )
+        self.client.post(
+            '/orders',
+            data={
+                "data": [
+                    {
+                        "order_id": order_id,
+                        "weight": weight,
+                        "region": 1,
+                        "delivery_hours": ["10:00-12:00"]
+                    } for order_id, weight in ((1, 3), (2, 4), (3, 7))
+                ]
+            },
+            content_type='application/json'
+        )
+
+    def test_full_load(self):
+        """
+        Обращение к обработчику, курьер получает набор заказов
+        с наибольшим весом, проверка статуса 200
+        """
+        trips = stats.trips
+        response = self.client.post(
+            '/orders/assign',
+            data={'courier_id': 1},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['orders'], [{'id': 1}, {'id': 3}])
+        self.assertEqual(stats.trips, trips + 1)
+        response = self.client.get('/metrics')
+        self.assertEqual(response.data['packing']['engine'], 'knapsack')
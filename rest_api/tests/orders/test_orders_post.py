@@ -270,3 +270,121 @@ class OrdersPostTestCase(TestCase):
             }
         }
         self.assertEqual(response.data, response_data)
+
+    def test_duplicate_id_in_data(self):
+        """
+        Загрузка данных с повторяющимся order_id внутри запроса,
+        проверка статуса 400
+        """
+        orders = {
+            "data": [
+                {
+                    "order_id": 1,
+                    "weight": 0.23,
+                    "region": 12,
+                    "delivery_hours": [
+                        "09:00-18:00"
+                    ]
+                },
+                {
+                    "order_id": 2,
+                    "weight": 1,
+                    "region": 12,
+                    "delivery_hours": [
+                        "09:00-18:00"
+                    ]
+                },
+                {
+                    "order_id": 1,
+                    "weight": 5,
+                    "region": 1,
+                    "delivery_hours": [
+                        "10:00-11:00"
+                    ]
+                }
+            ]
+        }
+        response = self.client.post(
+            '/orders',
+            data=orders,
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        response_data = {
+            'validation_error': {
+                "orders": [
+                    {"id": 1}
+                ]
+            }
+        }
+        self.assertEqual(response.data, response_data)
+
+    def test_wrong_hours_format(self):
+        """
+        Загрузка данных с периодом времени в неверном формате,
+        проверка статуса 400
+        """
+        orders = {
+            "data": [
+                {
+                    "order_id": 1,
+                    "weight": 1,
+                    "region": 1,
+                    "delivery_hours": ["09:00"]
+                },
+                {
+                    "order_id": 2,
+                    "weight": 1,
+                    "region": 1,
+                    "delivery_hours": [900]
+                },
+                {
+                    "order_id": 3,
+                    "weight": 1,
+                    "region": 1,
+                    "delivery_hours": "09:00-18:00"
+                }
+            ]
+        }
+        response = self.client.post(
+            '/orders',
+            data=orders,
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        response_data = {
+            'validation_error': {
+                "orders": [
+                    {"id": 1},
+                    {"id": 2},
+                    {"id": 3}
+                ]
+            }
+        }
+        self.assertEqual(response.data, response_data)
+
+    def test_hours_cache(self):
+        """
+        Загрузка заказов с одинаковыми периодами времени,
+        проверка счетчиков кэша разбора периодов в GET /metrics
+        """
+        orders = {
+            "data": [
+                {
+                    "order_id": order_id,
+                    "weight": 1,
+                    "region": 1,
+                    "delivery_hours": ["07:13-19:47"]
+                } for order_id in range(1, 11)
+            ]
+        }
+        before = self.client.get('/metrics').data['hours_cache']
+        response = self.client.post(
+            '/orders',
+            data=orders,
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        after = self.client.get('/metrics').data['hours_cache']
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 9)
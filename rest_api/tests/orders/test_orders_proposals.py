@@ -0,0 +1,154 @@
+import json
+from decimal import Decimal
+
+from django.test import TransactionTestCase, override_settings
+
+from rest_api.const import StatusOrder
+from rest_api.models import Courier, Order
+from rest_api.proposals import proposal_store
+
+
+@override_settings(ASSIGN_PROPOSALS=True, JOBS_WORKERS=0)
+class OrdersProposalsTestCase(TransactionTestCase):
+    def setUp(self):
+        """
+        Инициализация данных, развозы рассчитываются после фиксации
+        транзакции, поэтому тесты выполняются без общей транзакции
+        """
+        proposal_store.reset()
+        with open('rest_api/tests/orders/good_orders.json', 'r',
+                  encoding='utf-8') as file:
+            self.orders = json.load(file)
+        self.client.post(
+            '/orders',
+            data=self.orders,
+            content_type='application/json'
+        )
+        with open('rest_api/tests/couriers/good_couriers.json', 'r',
+                  encoding='utf-8') as file:
+            self.couriers = json.load(file)
+        self.client.post(
+            '/couriers',
+            data=self.couriers,
+            content_type='application/json'
+        )
+
+    def tearDown(self):
+        proposal_store.reset()
+
+    def assign(self, courier_id):
+        response = self.client.post(
+            '/orders/assign',
+            data={'courier_id': courier_id},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return [order['id'] for order in response.data['orders']]
+
+    def test_proposal_assign(self):
+        """Развозы рассчитаны для новых курьеров, назначение выдает развоз"""
+        self.assertIn(2, proposal_store.proposals)
+        self.assertEqual(self.assign(2), [3, 5])
+        self.assertEqual(proposal_store.hits, 1)
+        self.assertNotIn(2, proposal_store.proposals)
+        self.assertEqual(Order.objects.filter(
+            courier_id=2, status_order=StatusOrder.IN_PROCESS
+        ).count(), 2)
+
+    def test_new_orders(self):
+        """Новый заказ в районе курьера попадает в пересчитанный развоз"""
+        self.client.post(
+            '/orders',
+            data={
+                "data": [
+                    {
+                        "order_id": 100,
+                        "weight": 0.01,
+                        "region": 22,
+                        "delivery_hours": ["10:00-11:00"]
+                    }
+                ]
+            },
+            content_type='application/json'
+        )
+        self.assertEqual(self.assign(2), [3, 100, 5])
+        self.assertEqual(proposal_store.hits, 1)
+
+    def test_taken_orders(self):
+        """
+        Заказы развоза, выданные другому курьеру, не выдаются повторно,
+        остаток подбирается заново
+        """
+        self.assertEqual(self.assign(2), [3, 5])
+        self.assertEqual(self.assign(3), [])
+        self.assertEqual(Order.objects.filter(
+            courier_id=2, status_order=StatusOrder.IN_PROCESS
+        ).count(), 2)
+
+    def test_courier_patch(self):
+        """Изменение районов курьера пересчитывает развоз"""
+        self.client.patch(
+            '/couriers/2',
+            data={'regions': [1]},
+            content_type='application/json'
+        )
+        self.assertEqual(self.assign(2), [4])
+        self.assertEqual(proposal_store.hits, 1)
+
+    def test_expired_proposal(self):
+        """Устаревший развоз не используется"""
+        with override_settings(ASSIGN_PROPOSAL_TTL=-1):
+            self.assertEqual(self.assign(2), [3, 5])
+        self.assertEqual(proposal_store.hits, 0)
+        self.assertEqual(proposal_store.misses, 1)
+
+    def test_metrics(self):
+        """Счетчики развозов в GET /metrics"""
+        self.assign(2)
+        response = self.client.get('/metrics')
+        self.assertEqual(response.data['proposals']['hits'], 1)
+        self.assertTrue(response.data['proposals']['enabled'])
+
+    def test_courier_changed_elsewhere(self):
+        """
+        Курьер изменен без сброса развоза (в другом процессе): развоз,
+        рассчитанный для прежней грузоподъемности, не выдается
+        """
+        self.client.patch(
+            '/couriers/2',
+            data={'courier_type': 'car', 'regions': [60]},
+            content_type='application/json'
+        )
+        self.client.post(
+            '/orders',
+            data={
+                "data": [
+                    {
+                        "order_id": order_id,
+                        "weight": 5,
+                        "region": 60,
+                        "delivery_hours": ["00:00-23:59"]
+                    } for order_id in range(100, 110)
+                ]
+            },
+            content_type='application/json'
+        )
+        self.assertEqual(len(proposal_store.proposals[2][0]), 10)
+        Courier.objects.filter(courier_id=2).update(
+            courier_type='foot', lifting_capacity=Decimal(10)
+        )
+        orders_id = self.assign(2)
+        self.assertEqual(len(orders_id), 2)
+        self.assertEqual(proposal_store.hits, 0)
+        self.assertEqual(proposal_store.misses, 1)
+        courier = Courier.objects.get(courier_id=2)
+        self.assertEqual(courier.current_weight_orders, Decimal(10))
+
+    def test_orders_checked(self):
+        """
+        Заказы развоза, переставшие подходить курьеру, не выдаются,
+        грузоподъемность заполняется подбором по базе
+        """
+        Order.objects.filter(order_id=3).update(region=1)
+        self.assertEqual(self.assign(2), [5])
+        self.assertEqual(proposal_store.hits, 1)
@@ -0,0 +1,128 @@
+import json
+
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from rest_api.const import StatusOrder, StatusCourier
+from rest_api.dispatch import courier_index, dispatch_index
+from rest_api.models import Courier, Order
+
+
+@override_settings(ASSIGN_PUSH=True, JOBS_WORKERS=0)
+class OrdersPushTestCase(TransactionTestCase):
+    def setUp(self):
+        """
+        Инициализация курьеров, заказы выдаются после фиксации
+        транзакции загрузки, поэтому тесты выполняются без общей транзакции
+        """
+        courier_index.reset()
+        dispatch_index.reset()
+        with open('rest_api/tests/couriers/good_couriers.json', 'r',
+                  encoding='utf-8') as file:
+            self.couriers = json.load(file)
+        self.client.post(
+            '/couriers',
+            data=self.couriers,
+            content_type='application/json'
+        )
+
+    def tearDown(self):
+        courier_index.reset()
+        dispatch_index.reset()
+
+    def post_orders(self, orders):
+        response = self.client.post(
+            '/orders',
+            data=orders,
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def get_courier_orders(self, courier_id):
+        return set(Order.objects.filter(
+            courier_id=courier_id,
+            status_order=StatusOrder.IN_PROCESS
+        ).values_list('order_id', flat=True))
+
+    def test_push_on_create(self):
+        """
+        Новые заказы выдаются подходящим свободным курьерам без запроса
+        назначения, курьер получает их в ответе POST /orders/assign
+        """
+        with open('rest_api/tests/orders/good_orders.json', 'r',
+                  encoding='utf-8') as file:
+            self.post_orders(json.load(file))
+        self.assertEqual(self.get_courier_orders(8), {10})
+        self.assertEqual(self.get_courier_orders(7), {6, 7})
+        self.assertEqual(self.get_courier_orders(4), set())
+        for courier in Courier.objects.all():
+            self.assertEqual(
+                courier.status_courier == StatusCourier.BUSY,
+                bool(self.get_courier_orders(courier.courier_id))
+            )
+        self.assertNotIn(7, courier_index.couriers)
+        self.assertIn(4, courier_index.couriers)
+        response = self.client.post(
+            '/orders/assign',
+            data={'courier_id': 7},
+            content_type='application/json'
+        )
+        self.assertEqual({order['id'] for order in response.data['orders']},
+                         {6, 7})
+
+    def test_courier_patch(self):
+        """Изменение районов курьера обновляет индекс свободных курьеров"""
+        courier_index.load()
+        self.client.patch(
+            '/couriers/4',
+            data={'regions': [60]},
+            content_type='application/json'
+        )
+        self.assertEqual(courier_index.couriers[4][1], [60])
+        self.post_orders({
+            "data": [
+                {
+                    "order_id": 1,
+                    "weight": 1,
+                    "region": 60,
+                    "delivery_hours": ["10:00-11:00"]
+                }
+            ]
+        })
+        self.assertEqual(self.get_courier_orders(4), {1})
+
+    def test_complete(self):
+        """Курьер, доставивший все заказы, снова получает новые заказы"""
+        order = {
+            "order_id": 1,
+            "weight": 1,
+            "region": 13,
+            "delivery_hours": ["10:00-11:00"]
+        }
+        self.post_orders({"data": [order]})
+        self.assertEqual(self.get_courier_orders(4), {1})
+        self.assertNotIn(4, courier_index.couriers)
+        response = self.client.post(
+            '/orders/complete',
+            data={
+                'courier_id': 4,
+                'order_id': 1,
+                'complete_time': timezone.now().isoformat()
+            },
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(4, courier_index.couriers)
+        self.post_orders({"data": [dict(order, order_id=2)]})
+        self.assertEqual(self.get_courier_orders(4), {2})
+
+    @override_settings(ASSIGN_PUSH=False)
+    def test_push_disabled(self):
+        """Без ASSIGN_PUSH заказы ждут запроса назначения"""
+        with open('rest_api/tests/orders/good_orders.json', 'r',
+                  encoding='utf-8') as file:
+            self.post_orders(json.load(file))
+        self.assertFalse(Order.objects.exclude(
+            status_order=StatusOrder.NEW
+        ).exists())
+        self.assertFalse(courier_index.is_loaded)
@@ -0,0 +1,25 @@
+from decimal import Decimal
+
+from django.test import override_settings
+
+from rest_api.const import StatusCourier
+from rest_api.models import Courier
+from rest_api.tests.orders import test_orders_assign
+
+
+@override_settings(ASSIGN_BACKEND='sql')
+class OrdersSqlAssignTestCase(test_orders_assign.OrdersAssignTestCase):
+    """Назначение заказов одним запросом к базе"""
+    def test_single_statement(self):
+        """
+        Назначение выполняется блокировкой курьера и одним запросом,
+        курьер обновляется тем же запросом
+        """
+        response, queries = self.assign_queries(2)
+        self.assertEqual(queries, 2)
+        self.assertEqual(response.data['orders'], [{'id': 3}, {'id': 5}])
+        courier = Courier.objects.get(courier_id=2)
+        self.assertEqual(courier.status_courier, StatusCourier.BUSY)
+        self.assertEqual(courier.current_weight_orders, Decimal('1.02'))
+        self.assertEqual(courier.assign_time, response.data['assign_time'])
+        self.assertEqual(courier.courier_type_in_delivery, 'bike')
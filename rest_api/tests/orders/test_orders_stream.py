@@ -0,0 +1,106 @@
+import json
+from io import BytesIO
+from unittest import mock
+
+from django.test import TestCase
+
+from rest_api.models import Order, DeliveryHours
+from rest_api.views import OrdersStream
+
+
+class OrdersStreamTestCase(TestCase):
+    def setUp(self):
+        """Инициализация данных"""
+        with open('rest_api/tests/orders/good_orders.json', 'r',
+                  encoding='utf-8') as file:
+            self.orders = json.load(file)['data']
+
+    def post_stream(self, lines):
+        response = self.client.post(
+            '/orders/stream',
+            data='\n'.join(lines),
+            content_type='application/x-ndjson'
+        )
+        content = b''.join(response.streaming_content).decode()
+        return response, [json.loads(line) for line in content.splitlines()]
+
+    def test_missing_data(self):
+        """Обращение к обработчику с пустым телом, проверка статуса 400"""
+        response = self.client.post(
+            '/orders/stream',
+            data='',
+            content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_orders_stream(self):
+        """
+        Загрузка заказов построчно, проверка ответа по порциям
+        и сохранения заказов
+        """
+        with mock.patch.object(OrdersStream, 'chunk_size', 4):
+            response, chunks = self.post_stream(
+                [json.dumps(order) for order in self.orders]
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(chunks), 3)
+        orders_id = [order['id'] for chunk in chunks
+                     for order in chunk['orders']]
+        self.assertEqual(orders_id, list(range(1, 12)))
+        self.assertEqual(Order.objects.count(), 11)
+        self.assertEqual(
+            DeliveryHours.objects.count(), 11
+        )
+
+    def test_bad_chunk(self):
+        """
+        Загрузка порции с невалидным заказом, проверка что отклоняется
+        только эта порция
+        """
+        lines = [json.dumps(order) for order in self.orders[:4]]
+        lines[3] = json.dumps({
+            "order_id": 4,
+            "weight": 0,
+            "region": 1,
+            "delivery_hours": ["09:00-15:00"]
+        })
+        lines.append('not json')
+        with mock.patch.object(OrdersStream, 'chunk_size', 2):
+            response, chunks = self.post_stream(lines)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(chunks, [
+            {'orders': [{'id': 1}, {'id': 2}]},
+            {'validation_error': {'orders': [{'id': 4}]}},
+            {'validation_error': {'orders': [{'id': None}]}},
+        ])
+        self.assertEqual(
+            list(Order.objects.values_list('order_id', flat=True)
+                 .order_by('order_id')),
+            [1, 2]
+        )
+
+    def post_chunked(self, lines, **extra):
+        """Запрос без Content-Length, как при Transfer-Encoding: chunked"""
+        return self.client.generic(
+            'POST', '/orders/stream',
+            content_type='application/x-ndjson',
+            **{'wsgi.input': BytesIO('\n'.join(lines).encode())},
+            **extra
+        )
+
+    def test_chunked_stream(self):
+        """
+        Загрузка без Content-Length читается из wsgi.input, если сервер
+        отмечает конец тела, иначе проверка статуса 400
+        """
+        lines = [json.dumps(order) for order in self.orders]
+        response = self.post_chunked(lines)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Order.objects.count(), 0)
+        response = self.post_chunked(lines, **{'wsgi.input_terminated': True})
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        orders_id = [order['id'] for line in content.splitlines()
+                     for order in json.loads(line)['orders']]
+        self.assertEqual(orders_id, list(range(1, 12)))
+        self.assertEqual(Order.objects.count(), 11)
@@ -0,0 +1,20 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class CaptureAppQueries(CaptureQueriesContext):
+    """
+    Подсчет запросов к базе данных без запросов django-silk,
+    который сохраняет в базу каждый запрос к API
+    """
+    def __init__(self):
+        super().__init__(connection)
+
+    @property
+    def app_queries(self):
+        return [query for query in self.captured_queries
+                if 'silk_' not in query['sql']
+                and not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+
+    def __len__(self):
+        return len(self.app_queries)
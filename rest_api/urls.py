@@ -1,11 +1,19 @@
 from django.urls import path
 
-from .views import Couriers, Orders, OrdersAssign, OrdersComplete
+from .views import Couriers, Orders, OrdersStream, OrdersAssign, \
+    OrdersAssignBatch, OrdersComplete, OrdersCompleteBatch, Jobs, Metrics
 
 urlpatterns = [
     path('couriers', Couriers.as_view(), name='couriers_create'),
     path('couriers/<int:courier_id>', Couriers.as_view(), name='courier'),
     path('orders', Orders.as_view(), name='orders_create'),
+    path('orders/stream', OrdersStream.as_view(), name='orders_stream'),
     path('orders/assign', OrdersAssign.as_view(), name='orders_assign'),
+    path('orders/assign/batch', OrdersAssignBatch.as_view(),
+         name='orders_assign_batch'),
     path('orders/complete', OrdersComplete.as_view(), name='orders_complete'),
+    path('orders/complete/batch', OrdersCompleteBatch.as_view(),
+         name='orders_complete_batch'),
+    path('jobs/<int:job_id>', Jobs.as_view(), name='job'),
+    path('metrics', Metrics.as_view(), name='metrics'),
 ]
@@ -1,8 +1,10 @@
 import tracemalloc
-from functools import wraps
-from itertools import product
+from functools import wraps, lru_cache
 
-from .const import EARNINGS_COEFFICIENT
+from django.utils import dateparse
+
+from .const import EARNINGS_COEFFICIENT, HOURS_CACHE_SIZE
+from .metrics import collector
 
 
 def parse_time(time):
@@ -11,16 +13,32 @@ def parse_time(time):
     return start, stop
 
 
-def get_correct_hours(list_hours):
-    """Разделение времени на начало и конец"""
-    time = []
-    for current_time in list_hours:
-        start, stop = parse_time(current_time)
-        time.append({
-            'start_time': start,
-            'stop_time': stop
-        })
-    return time
+@lru_cache(maxsize=HOURS_CACHE_SIZE)
+def parse_hours(hours):
+    """
+    Период "HH:MM-HH:MM" в пару (начало, конец) datetime.time.
+    Время разбирается так же, как TimeField в DRF.
+    Результат кэшируется: одинаковые строки периодов
+    разбираются один раз и возвращают один и тот же кортеж
+    """
+    start, stop = parse_time(hours)
+    start_time = dateparse.parse_time(start)
+    stop_time = dateparse.parse_time(stop)
+    if start_time is None or stop_time is None:
+        raise ValueError(f'Wrong format of hours: {hours}')
+    return start_time, stop_time
+
+
+@collector('hours_cache')
+def get_hours_cache_info():
+    """Счетчики кэша разбора периодов времени"""
+    info = parse_hours.cache_info()
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'max_size': info.maxsize,
+    }
 
 
 def get_regions(regions):
@@ -32,14 +50,50 @@ def get_regions(regions):
     ]
 
 
-def is_intersections(working_hours, delivery_hours):
+def get_error_id(errors, data, field_id):
+    """Список id объектов, не прошедших валидацию"""
+    return [
+        {
+            'id': obj.get(field_id) if isinstance(obj, dict) else None
+        } for error, obj in zip(errors, data) if error
+    ]
+
+
+def get_minute(time, round_up=False):
+    """Номер минуты суток, неполная минута округляется вверх по запросу"""
+    minute = time.hour * 60 + time.minute
+    if round_up and (time.second or time.microsecond):
+        minute += 1
+    return minute
+
+
+@lru_cache(maxsize=HOURS_CACHE_SIZE)
+def hours_to_mask(hours):
+    """
+    Кортеж периодов (начало, конец) в битовую маску минут суток:
+    бит i установлен, если минута i входит в один из периодов.
+    Период, у которого конец не позже начала, не занимает ни одной минуты
+    """
+    mask = 0
+    for start, stop in hours:
+        first = get_minute(start)
+        last = get_minute(stop, round_up=True)
+        if last > first:
+            mask |= ((1 << (last - first)) - 1) << first
+    return mask
+
+
+def get_hours_mask(hours):
+    """Битовая маска минут суток для списка периодов (начало, конец)"""
+    return hours_to_mask(tuple(hours))
+
+
+def is_intersections(working_mask, delivery_mask):
     """
     Проверка пересечения времени работы курьера и промежутков,
-    в которые клиенту удобно принять заказ
+    в которые клиенту удобно принять заказ, по маскам минут суток
     """
-    return any([True for (w_start, w_end), (d_start, d_end)
-                in product(working_hours, delivery_hours)
-                if w_start < d_end and w_end > d_start])
+    return working_mask & delivery_mask != 0
 
 
 def calculate_rating(quantity, courier_type):
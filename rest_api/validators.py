@@ -0,0 +1,210 @@
+from decimal import Decimal, getcontext
+
+from django.utils.dateparse import parse_time
+from rest_framework import serializers
+from rest_framework.fields import empty
+
+from .const import ErrorMessage
+from .utils import parse_hours
+
+
+def compile_field(field):
+    """
+    Проверка значения поля DRF. Значения типичных типов проверяются
+    напрямую, остальные передаются самому полю, чтобы получить
+    то же значение или то же сообщение об ошибке
+    """
+    if isinstance(field, serializers.IntegerField):
+        min_value, max_value = field.min_value, field.max_value
+
+        def check(value):
+            if type(value) is int \
+                    and (min_value is None or value >= min_value) \
+                    and (max_value is None or value <= max_value):
+                return value
+            return field.run_validation(value)
+
+    elif isinstance(field, serializers.DecimalField):
+        min_value, max_value = field.min_value, field.max_value
+        quantum = Decimal(1).scaleb(-field.decimal_places)
+        context = getcontext().copy()
+        context.prec = field.max_digits
+
+        def check(value):
+            if type(value) in (int, float):
+                number = Decimal(str(value))
+                _, digits, exponent = number.as_tuple()
+                if number.is_finite() \
+                        and -field.decimal_places <= exponent <= 0 \
+                        and len(digits) <= field.max_digits \
+                        and len(digits) + exponent <= field.max_whole_digits \
+                        and (min_value is None or number >= min_value) \
+                        and (max_value is None or number <= max_value):
+                    return number.quantize(quantum, context=context)
+            return field.run_validation(value)
+
+    elif isinstance(field, serializers.ChoiceField):
+        choices = field.choice_strings_to_values
+
+        def check(value):
+            if type(value) is str and value in choices:
+                return choices[value]
+            return field.run_validation(value)
+
+    elif isinstance(field, serializers.TimeField):
+        def check(value):
+            if type(value) is str:
+                try:
+                    time = parse_time(value)
+                except ValueError:
+                    time = None
+                if time is not None:
+                    return time
+            return field.run_validation(value)
+
+    else:
+        check = field.run_validation
+    return check
+
+
+class ItemValidator:
+    """
+    Проверка списка объектов по правилам сериализатора DRF без создания
+    вложенных сериализаторов на каждый объект. Правила собираются один раз.
+    Вложенные списки принимаются в формате API: периоды времени
+    строками "HH:MM-HH:MM", районы числами
+    """
+    def __init__(self, serializer_class, id_field,
+                 exist_message, not_unique_message):
+        serializer = serializer_class()
+        self.model = serializer.Meta.model
+        self.id_field = id_field
+        self.exist_message = exist_message
+        self.not_unique_message = not_unique_message
+        self.fields = []
+        for name, field in serializer.fields.items():
+            if isinstance(field, serializers.ListSerializer):
+                check = self.compile_list(
+                    field, getattr(serializer, f'validate_{name}', None)
+                )
+            else:
+                check = compile_field(field)
+            self.fields.append((name, field, check))
+        self.checks = {name: check for name, _, check in self.fields}
+
+    def compile_list(self, field, validate_list):
+        """Проверка вложенного списка и правила validate_<поле>"""
+        child_fields = field.child.fields
+        if set(child_fields) == {'start_time', 'stop_time'}:
+            check_time = {
+                name: compile_field(child_fields[name])
+                for name in ('start_time', 'stop_time')
+            }
+
+            def check_child(value):
+                if type(value) is not str:
+                    raise serializers.ValidationError(
+                        {'non_field_errors': [ErrorMessage.WRONG_HOURS]}
+                    )
+                try:
+                    start, stop = parse_hours(value)
+                except ValueError:
+                    times = value.split('-')
+                    if len(times) != 2:
+                        raise serializers.ValidationError(
+                            {'non_field_errors': [ErrorMessage.WRONG_HOURS]}
+                        )
+                    # Сообщение об ошибке формирует поле DRF
+                    errors = {}
+                    for (name, check), time in zip(check_time.items(),
+                                                   times):
+                        try:
+                            check(time)
+                        except serializers.ValidationError as exc:
+                            errors[name] = exc.detail
+                    raise serializers.ValidationError(errors)
+                return {
+                    'start_time': start,
+                    'stop_time': stop,
+                }
+        else:
+            (name, child_field), = child_fields.items()
+            check_value = compile_field(child_field)
+
+            def check_child(value):
+                try:
+                    return {name: check_value(value)}
+                except serializers.ValidationError as exc:
+                    raise serializers.ValidationError({name: exc.detail})
+
+        def check(value):
+            if not isinstance(value, list):
+                return field.run_validation(value)
+            result = []
+            errors = []
+            for child in value:
+                try:
+                    result.append(check_child(child))
+                    errors.append({})
+                except serializers.ValidationError as exc:
+                    errors.append(exc.detail)
+            if any(errors):
+                raise serializers.ValidationError(errors)
+            if validate_list:
+                validate_list(result)
+            return result
+        return check
+
+    def validate_field(self, name, value):
+        """
+        Проверка одного поля по тем же правилам, что и в списке объектов.
+        Невалидное значение вызывает ValidationError
+        """
+        return self.checks[name](value)
+
+    def validate_item(self, item):
+        """Проверка одного объекта: (значения, ошибки)"""
+        if not isinstance(item, dict):
+            message = serializers.Serializer.default_error_messages[
+                'invalid'
+            ].format(datatype=type(item).__name__)
+            return None, {'non_field_errors': [message]}
+        result = {}
+        errors = {}
+        for name, field, check in self.fields:
+            try:
+                result[name] = check(item.get(name, empty))
+            except serializers.ValidationError as exc:
+                errors[name] = exc.detail
+        return result, errors
+
+    def validate(self, items):
+        """
+        Проверка списка объектов: (значения, ошибки по каждому объекту).
+        Повторные id внутри списка и id, уже сохраненные в базе,
+        проверяются одним запросом на весь список
+        """
+        result = []
+        errors = []
+        for item in items:
+            values, item_errors = self.validate_item(item)
+            result.append(values)
+            errors.append(item_errors)
+        received_id = {
+            values[self.id_field] for values in result
+            if values and self.id_field in values
+        }
+        existing_id = set(self.model.objects.filter(
+            pk__in=received_id
+        ).values_list('pk', flat=True))
+        unique_id = set()
+        for values, item_errors in zip(result, errors):
+            if not values or self.id_field not in values:
+                continue
+            current_id = values[self.id_field]
+            if current_id in existing_id:
+                item_errors[self.id_field] = [self.exist_message]
+            elif current_id in unique_id:
+                item_errors[self.id_field] = [self.not_unique_message]
+            unique_id.add(current_id)
+        return result, errors
@@ -1,18 +1,32 @@
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .serializer import *
-from .models import Courier, Order
-from .const import ErrorMessage
-from .utils import profile
+from .models import Courier, Order, Job
+from .const import ErrorMessage, STREAM_CHUNK_SIZE
+from .jobs import submit, process_orders_job
+from .metrics import collect
+from .courier_cache import courier_cache
+from .utils import profile, get_error_id
 
 
 class Couriers(APIView):
     @profile
     def get(self, request, courier_id):
         """API GET /couriers/$courier_id"""
-        instance = Courier.objects.filter(courier_id=courier_id).first()
+        if settings.COURIER_CACHE:
+            data, version = courier_cache.get(courier_id)
+            if data is not None:
+                return Response(data, status=status.HTTP_200_OK)
+        instance = CouriersGetSerializer.get_queryset().filter(
+            courier_id=courier_id
+        ).first()
         if not instance:
             return Response(
                 {
@@ -21,6 +35,8 @@ class Couriers(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         serializer = CouriersGetSerializer(instance)
+        if settings.COURIER_CACHE:
+            courier_cache.set(courier_id, version, dict(serializer.data))
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def post(self, request):
@@ -38,10 +54,9 @@ class Couriers(APIView):
         if serializer.is_valid():
             data = serializer.save()
             return Response({'couriers': data}, status=status.HTTP_201_CREATED)
-        error_id = [{'id': courier['courier_id']}
-                    for error, courier in zip(serializer.errors['data'],
-                                              serializer.initial_data['data']
-                                              ) if error]
+        error_id = get_error_id(serializer.errors['data'],
+                                serializer.initial_data['data'],
+                                'courier_id')
         return Response(
             {
                 'validation_error': {
@@ -60,22 +75,27 @@ class Couriers(APIView):
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
-        instance = Courier.objects.filter(courier_id=courier_id).first()
-        if not instance:
-            return Response(
-                {
-                    'courier_id': ErrorMessage.INSTANCE_NOT_FOUND
-                },
-                status=status.HTTP_400_BAD_REQUEST
+        # Счетчики развоза курьера изменяются по очереди с назначением
+        # и завершением заказов: строка курьера блокируется
+        with transaction.atomic():
+            instance = Courier.objects.select_for_update().filter(
+                courier_id=courier_id
+            ).first()
+            if not instance:
+                return Response(
+                    {
+                        'courier_id': ErrorMessage.INSTANCE_NOT_FOUND
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            serializer = CourierUpdateSerializer(
+                instance,
+                data=request.data,
+                partial=True
             )
-        serializer = CourierUpdateSerializer(
-            instance,
-            data=request.data,
-            partial=True
-        )
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            if serializer.is_valid():
+                serializer.save()
+                return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -91,6 +111,20 @@ class Orders(APIView):
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if request.query_params.get('async') == 'true':
+            orders = request.data['data']
+            job = Job.objects.create(
+                data=request.data,
+                total=len(orders) if isinstance(orders, list) else 0
+            )
+            submit(process_orders_job, job.pk)
+            return Response(
+                {
+                    'job_id': job.pk
+                },
+                status=status.HTTP_202_ACCEPTED,
+                headers={'Location': f'/jobs/{job.pk}'}
+            )
         serializer = OrderCreateSerializer(data=request.data)
         if serializer.is_valid():
             data = serializer.save()
@@ -100,10 +134,9 @@ class Orders(APIView):
                 },
                 status=status.HTTP_201_CREATED
             )
-        error_id = [{'id': order['order_id']}
-                    for error, order in zip(serializer.errors['data'],
-                                            serializer.initial_data['data']
-                                            ) if error]
+        error_id = get_error_id(serializer.errors['data'],
+                                serializer.initial_data['data'],
+                                'order_id')
         return Response(
             {
                 'validation_error': {
@@ -114,46 +147,146 @@ class Orders(APIView):
         )
 
 
-class OrdersAssign(APIView):
+class OrdersStream(APIView):
+    chunk_size = STREAM_CHUNK_SIZE
+
     def post(self, request):
-        """API POST /orders/assign"""
-        if not request.data:
+        """API POST /orders/stream"""
+        stream = self.get_stream(request)
+        if not stream:
             return Response(
                 {
-                    'data': ErrorMessage.DATA_NOT_FOUND
+                    'validation_error': {
+                        'orders': []
+                    }
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
-        try:
-            instance = Courier.objects.filter(
-                courier_id=request.data['courier_id']
-            ).first()
-        except Exception as e:
+        return StreamingHttpResponse(
+            self.process_chunks(stream),
+            content_type='application/x-ndjson'
+        )
+
+    @staticmethod
+    def get_stream(request):
+        """
+        Тело запроса. Без Content-Length (Transfer-Encoding: chunked)
+        DRF не читает тело, оно читается из wsgi.input, если сервер
+        отмечает его конец (wsgi.input_terminated, например gunicorn)
+        """
+        if request.stream is not None:
+            return request.stream
+        environ = getattr(request._request, 'environ', {})
+        if environ.get('wsgi.input_terminated'):
+            return environ['wsgi.input']
+        return None
+
+    def get_chunks(self, stream):
+        """Чтение заказов из потока порциями по chunk_size строк"""
+        chunk = []
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                chunk.append(json.loads(line))
+            except ValueError:
+                chunk.append(None)
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def process_chunks(self, stream):
+        """Валидация и сохранение заказов по порциям"""
+        for chunk in self.get_chunks(stream):
+            serializer = OrderCreateSerializer(data={'data': chunk})
+            if serializer.is_valid():
+                result = {
+                    'orders': serializer.save()
+                }
+            else:
+                result = {
+                    'validation_error': {
+                        'orders': get_error_id(serializer.errors['data'],
+                                               serializer.initial_data['data'],
+                                               'order_id')
+                    }
+                }
+            yield json.dumps(result) + '\n'
+
+
+class OrdersAssign(APIView):
+    def post(self, request):
+        """API POST /orders/assign"""
+        if not request.data:
             return Response(
                 {
-                    'courier_id': ErrorMessage.ERROR_DATA,
+                    'data': ErrorMessage.DATA_NOT_FOUND
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
-        if not instance:
+        # Назначения одному курьеру выполняются по очереди: строка курьера
+        # блокируется до конца транзакции
+        with transaction.atomic():
+            try:
+                instance = Courier.objects.select_for_update().filter(
+                    courier_id=request.data['courier_id']
+                ).first()
+            except Exception as e:
+                return Response(
+                    {
+                        'courier_id': ErrorMessage.ERROR_DATA,
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if not instance:
+                return Response(
+                    {
+                        'courier_id': ErrorMessage.INSTANCE_NOT_FOUND
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            serializer = OrdersAssignSerializer(
+                instance,
+                data=request.data,
+                partial=True
+            )
+            if serializer.is_valid():
+                serializer.save()
+                return Response(
+                    serializer.validated_data,
+                    status=status.HTTP_200_OK
+                )
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class OrdersAssignBatch(APIView):
+    def post(self, request):
+        """API POST /orders/assign/batch"""
+        if not isinstance(request.data, dict) \
+                or not isinstance(request.data.get('data'), list):
             return Response(
                 {
-                    'courier_id': ErrorMessage.INSTANCE_NOT_FOUND
+                    'data': ErrorMessage.DATA_NOT_FOUND
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
-        serializer = OrdersAssignSerializer(
-            instance,
-            data=request.data,
-            partial=True
-        )
+        serializer = OrdersAssignBatchSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
-            return Response(
-                serializer.validated_data,
-                status=status.HTTP_200_OK
-            )
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            data = serializer.save()
+            return Response({'couriers': data}, status=status.HTTP_200_OK)
+        error_id = get_error_id(serializer.errors['data'],
+                                serializer.initial_data['data'],
+                                'courier_id')
+        return Response(
+            {
+                'validation_error': {
+                    'couriers': error_id
+                }
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
 
 class OrdersComplete(APIView):
@@ -193,3 +326,42 @@ class OrdersComplete(APIView):
                 status=status.HTTP_200_OK
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class OrdersCompleteBatch(APIView):
+    def post(self, request):
+        """API POST /orders/complete/batch"""
+        if not isinstance(request.data, dict) \
+                or not isinstance(request.data.get('data'), list):
+            return Response(
+                {
+                    'data': ErrorMessage.DATA_NOT_FOUND
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = OrdersCompleteBatchSerializer(data=request.data)
+        if serializer.is_valid():
+            return Response({'orders': serializer.save()},
+                            status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class Jobs(APIView):
+    def get(self, request, job_id):
+        """API GET /jobs/$job_id"""
+        instance = Job.objects.filter(pk=job_id).first()
+        if not instance:
+            return Response(
+                {
+                    'job_id': ErrorMessage.INSTANCE_NOT_FOUND
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = JobGetSerializer(instance)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class Metrics(APIView):
+    def get(self, request):
+        """API GET /metrics"""
+        return Response(collect(), status=status.HTTP_200_OK)